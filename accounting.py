@@ -0,0 +1,294 @@
+"""Token, byte and cost accounting for ad runs, with a per-run budget.
+
+Every Gemini call through the ``GeminiGateway`` records the token counts from
+its response: ``usage_metadata`` on google-genai responses, ``usage`` on the
+browser agent's completions. Call sites add what only they know, such as the
+bytes of a prompt, reference image or upload, the bytes of a generated image or
+video, and the seconds of video Veo rendered. Each record is attributed to the
+URL and ad id in the tracing context and to the innermost stage span
+(analyze, concepts, image, video, ...). The run summary can then break usage
+and cost down by stage and by URL.
+
+Costs come from ``PRICES``, which holds list prices in USD per million tokens
+and per second of generated video. Models that are not listed are counted but
+cost nothing. Prices change, so treat the totals as an estimate.
+
+With a token or cost budget, ``Ledger.admit`` decides whether another ad may
+start. The run's spend so far, plus the expected cost of every ad already in
+flight, plus this ad's expected cost, must stay within the budget. An ad's
+expected cost is the mean of the ads of its mode that finished so far, or
+``AD_ESTIMATES`` until one has. An ad that does not fit fails with
+``BudgetExceeded`` before it makes a single request.
+
+A long-lived process (``--serve``) gives each job its own ledger with
+``scoped(get_ledger().child())``: the job's budget then caps that job alone,
+and once it is over ``absorb`` rolls its rows up into the process-wide ledger
+by stage and model, so the process keeps totals without a row per URL and ad.
+"""
+
+import contextlib
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass, fields
+from typing import Any
+
+import tracing
+
+# Veo renders 8 second clips unless a duration is requested
+VEO_SECONDS = 8
+
+
+@dataclass(frozen=True)
+class Price:
+	input: float = 0.0  # USD per million input tokens
+	output: float = 0.0  # USD per million output tokens, thinking included
+	media_second: float = 0.0  # USD per second of generated video
+
+
+PRICES = {
+	'gemini-2.5-pro': Price(1.25, 10.0),
+	'gemini-2.5-flash': Price(0.30, 2.50),
+	'gemini-flash-latest': Price(0.30, 2.50),
+	'gemini-2.5-flash-image': Price(0.30, 30.0),
+	'veo-3.1-generate-preview': Price(media_second=0.40),
+}
+
+
+def cost_of(model: str, input_tokens: int = 0, output_tokens: int = 0, media_seconds: float = 0.0, prices: dict[str, Price] | None = None) -> float:
+	"""Estimated USD cost of the given usage of model (0 for models without a price)"""
+	price = (prices or PRICES).get(model, Price())
+	return (input_tokens * price.input + output_tokens * price.output) / 1e6 + media_seconds * price.media_second
+
+
+@dataclass
+class Usage:
+	requests: int = 0
+	input_tokens: int = 0
+	output_tokens: int = 0
+	request_bytes: int = 0
+	response_bytes: int = 0
+	media_seconds: float = 0.0
+	cost: float = 0.0
+
+	@property
+	def tokens(self) -> int:
+		return self.input_tokens + self.output_tokens
+
+	def add(self, other: 'Usage', factor: float = 1):
+		for f in fields(self):
+			setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name) * factor)
+
+
+# What one ad is expected to cost before any ad of its mode has finished:
+# instagram is a prompt and reference image in, one image (1290 tokens) out;
+# tiktok is a concept call on gemini-2.5-pro and an 8 second Veo clip
+AD_ESTIMATES = {
+	'instagram': Usage(requests=1, input_tokens=1_600, output_tokens=1_290, cost=0.039),
+	'tiktok': Usage(requests=2, input_tokens=1_500, output_tokens=300, media_seconds=VEO_SECONDS, cost=3.21),
+}
+
+
+class BudgetExceeded(RuntimeError):
+	pass
+
+
+def usage_of(response: Any) -> tuple[int, int]:
+	"""(input, output) tokens reported by a google-genai response or a browser_use completion, (0, 0) if it has none"""
+	usage = getattr(response, 'usage_metadata', None)
+	if usage is not None:
+		output = (getattr(usage, 'candidates_token_count', 0) or 0) + (getattr(usage, 'thoughts_token_count', 0) or 0)
+		return getattr(usage, 'prompt_token_count', 0) or 0, output
+	usage = getattr(response, 'usage', None)
+	if usage is not None:
+		return getattr(usage, 'prompt_tokens', 0) or 0, getattr(usage, 'completion_tokens', 0) or 0
+	return 0, 0
+
+
+def _count(n: float) -> str:
+	return f'{n / 1e6:.1f}M' if n >= 1e6 else f'{n / 1e3:.1f}k' if n >= 1e3 else f'{n:.0f}'
+
+
+def _megabytes(n: float) -> str:
+	return f'{n / (1024 * 1024):.1f} MB'
+
+
+# Usage of the ad admitted in this context, so admit() learns what its ad really cost
+_ad: ContextVar[Usage | None] = ContextVar('accounting_ad', default=None)
+
+
+class Ledger:
+	"""Usage of every call in a run by (url, ad id, stage, model), and the budget new ads are admitted against"""
+
+	def __init__(self, token_budget: int | None = None, cost_budget: float | None = None, prices: dict[str, Price] | None = None):
+		self.token_budget = token_budget
+		self.cost_budget = cost_budget
+		self.prices = {**PRICES, **(prices or {})}
+		self.rows: dict[tuple[str | None, int | None, str | None, str], Usage] = defaultdict(Usage)
+		self.total = Usage()
+		# Expected usage of the ads admitted and still running
+		self.reserved = Usage()
+		self.finished: dict[str, Usage] = defaultdict(Usage)
+		self.finished_ads: Counter[str] = Counter()
+		self.refused = 0
+
+	def record(
+		self,
+		model: str,
+		requests: int = 0,
+		input_tokens: int = 0,
+		output_tokens: int = 0,
+		request_bytes: int = 0,
+		response_bytes: int = 0,
+		media_seconds: float = 0.0,
+	) -> Usage:
+		"""Add usage of model, attributed to the URL, ad and stage in the current tracing context"""
+		cost = cost_of(model, input_tokens, output_tokens, media_seconds, self.prices)
+		usage = Usage(requests, input_tokens, output_tokens, request_bytes, response_bytes, media_seconds, cost)
+		where = tracing.current()
+		self.rows[(where.get('url'), where.get('ad_id'), where['stage'], model)].add(usage)
+		self.total.add(usage)
+		ad = _ad.get()
+		if ad is not None:
+			ad.add(usage)
+		return usage
+
+	def record_response(self, model: str, response: Any) -> Usage:
+		"""Count one request to model with the tokens its response reports"""
+		input_tokens, output_tokens = usage_of(response)
+		return self.record(model, requests=1, input_tokens=input_tokens, output_tokens=output_tokens)
+
+	def estimate(self, mode: str) -> Usage:
+		"""Expected usage of one more ad of mode: the mean of the finished ones, or AD_ESTIMATES before any"""
+		if not self.finished_ads[mode]:
+			return AD_ESTIMATES.get(mode, Usage())
+		mean = Usage()
+		mean.add(self.finished[mode], 1 / self.finished_ads[mode])
+		return mean
+
+	def over_budget(self, expected: Usage) -> str | None:
+		"""Why starting work with the expected usage would pass the budget, None if it fits"""
+		if self.cost_budget is not None and self.total.cost + self.reserved.cost + expected.cost > self.cost_budget:
+			return (
+				f'${self.total.cost:.2f} spent and ${self.reserved.cost:.2f} in flight, '
+				f'another ${expected.cost:.2f} would pass the ${self.cost_budget:.2f} budget'
+			)
+		if self.token_budget is not None and self.total.tokens + self.reserved.tokens + expected.tokens > self.token_budget:
+			return (
+				f'{_count(self.total.tokens)} tokens spent and {_count(self.reserved.tokens)} in flight, '
+				f'another {_count(expected.tokens)} would pass the {_count(self.token_budget)} token budget'
+			)
+		return None
+
+	@contextlib.contextmanager
+	def admit(self, mode: str) -> Iterator[Usage]:
+		"""Run one ad of mode within the budget, raising BudgetExceeded instead of starting it when it would not fit"""
+		expected = self.estimate(mode)
+		reason = self.over_budget(expected)
+		if reason is not None:
+			self.refused += 1
+			raise BudgetExceeded(f'budget reached, not starting the ad: {reason}')
+		self.reserved.add(expected)
+		usage = Usage()
+		token = _ad.set(usage)
+		try:
+			yield usage
+		finally:
+			_ad.reset(token)
+			self.reserved.add(expected, -1)
+			if usage.requests:
+				self.finished[mode].add(usage)
+				self.finished_ads[mode] += 1
+
+	def child(self) -> 'Ledger':
+		"""A fresh ledger with this one's budgets and prices, estimating ads from the ones this ledger saw finish"""
+		ledger = Ledger(self.token_budget, self.cost_budget, self.prices)
+		for mode, usage in self.finished.items():
+			ledger.finished[mode].add(usage)
+		ledger.finished_ads.update(self.finished_ads)
+		return ledger
+
+	def absorb(self, other: 'Ledger'):
+		"""Add other's usage to this ledger, rolled up to one row per stage and model"""
+		for (url, ad_id, stage, model), usage in other.rows.items():
+			self.rows[(None, None, stage, model)].add(usage)
+		self.total.add(other.total)
+		for mode, usage in other.finished.items():
+			self.finished[mode].add(usage)
+		self.finished_ads.update(other.finished_ads)
+		self.refused += other.refused
+
+	def breakdown(self, key: str) -> dict[Any, Usage]:
+		"""Usage summed by 'url', 'ad' (url, ad id), 'stage' or 'model'"""
+		totals: dict[Any, Usage] = defaultdict(Usage)
+		for (url, ad_id, stage, model), usage in self.rows.items():
+			totals[{'url': url, 'ad': (url, ad_id), 'stage': stage, 'model': model}[key]].add(usage)
+		return dict(totals)
+
+	def summary(self) -> str:
+		t = self.total
+		if not t.requests and not t.request_bytes:
+			return '💰 No API usage recorded'
+		lines = [
+			f'💰 {t.requests} requests, {_count(t.input_tokens)} tokens in, {_count(t.output_tokens)} out, '
+			f'{_megabytes(t.request_bytes)} sent, {_megabytes(t.response_bytes)} received'
+			+ (f', {t.media_seconds:.0f}s of video' if t.media_seconds else '')
+			+ f', about ${t.cost:.2f}'
+		]
+		stages = self.breakdown('stage')
+		width = max(len(str(stage)) for stage in stages)
+		lines.append(f'   {"stage":<{width}}  {"requests":>8}  {"tokens in":>9}  {"tokens out":>10}  {"sent":>9}  {"received":>9}  {"cost":>8}')
+		for stage, usage in sorted(stages.items(), key=lambda item: -item[1].cost):
+			lines.append(
+				f'   {str(stage):<{width}}  {usage.requests:>8}  {_count(usage.input_tokens):>9}  {_count(usage.output_tokens):>10}  '
+				f'{_megabytes(usage.request_bytes):>9}  {_megabytes(usage.response_bytes):>9}  {f"${usage.cost:.3f}":>8}'
+			)
+		ads = Counter(url for url, ad_id in self.breakdown('ad') if ad_id is not None)
+		for url, usage in self.breakdown('url').items():
+			if url is not None:
+				per_ad = f', ${usage.cost / ads[url]:.3f} per ad' if ads[url] else ''
+				lines.append(f'   {url}: {ads[url]} ads, {_count(usage.tokens)} tokens, ${usage.cost:.3f}{per_ad}')
+		budgets = []
+		if self.cost_budget is not None:
+			budgets.append(f'${t.cost:.2f} of ${self.cost_budget:.2f}')
+		if self.token_budget is not None:
+			budgets.append(f'{_count(t.tokens)} of {_count(self.token_budget)} tokens')
+		if budgets:
+			lines.append(f'   Budget: {", ".join(budgets)} used' + (f', {self.refused} ads not started' if self.refused else ''))
+		return '\n'.join(lines)
+
+
+_ledger = Ledger()
+# The ledger of the job running in this context, when it has one of its own
+_scoped: ContextVar[Ledger | None] = ContextVar('accounting_ledger', default=None)
+
+
+def configure(token_budget: int | None = None, cost_budget: float | None = None, prices: dict[str, Price] | None = None) -> Ledger:
+	"""Replace the process-wide ledger, e.g. to give this run a budget"""
+	global _ledger
+	_ledger = Ledger(token_budget, cost_budget, prices)
+	return _ledger
+
+
+def get_ledger() -> Ledger:
+	"""The ledger of the current job if it has one (see scoped), otherwise the process-wide one"""
+	ledger = _scoped.get()
+	return ledger if ledger is not None else _ledger
+
+
+@contextlib.contextmanager
+def scoped(ledger: Ledger) -> Iterator[Ledger]:
+	"""Record usage and admit ads against ledger inside the block, including in tasks started from it"""
+	token = _scoped.set(ledger)
+	try:
+		yield ledger
+	finally:
+		_scoped.reset(token)
+
+
+def record(model: str, **usage) -> Usage:
+	return get_ledger().record(model, **usage)
+
+
+def record_response(model: str, response: Any) -> Usage:
+	return get_ledger().record_response(model, response)
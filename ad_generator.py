@@ -1,14 +1,90 @@
+"""Generate Instagram image ads and TikTok video ads from landing pages.
+
+Importable as a library (``AdGenerator``, ``LandingPageAnalyzer``,
+``create_multiple_ads`` and friends) without side effects: the command line is
+only parsed by ``main()``, and environment and logging are only touched by
+``setup_environment``. The heavy dependencies are imported on first use, so an
+import costs almost nothing and a run only loads what its mode needs:
+``google.genai`` with the first client, the Veo poller with the first video,
+and ``browser_use`` only when an analysis really needs the browser agent (not
+for a cached or HTML fast-path analysis).
+"""
+
 import argparse
 import asyncio
+import importlib
 import logging
 import os
 import subprocess
 import sys
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable
 from datetime import datetime
 from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from pydantic import BaseModel
+
+import accounting
+from ad_service import AdService, Job
+from batch_pipeline import BatchPipeline, BatchStats, read_urls
+from browser_pool import BrowserSessionPool
+from completion_stream import CompletionStream, Progress
+from gemini_client import GeminiGateway, is_retryable_submission
+from hedging import Hedger
+from image_variants import DEFAULT_FORMATS, DEFAULT_PLACEMENTS, VariantPipeline, parse_formats, parse_placements
+from job_store import JobRun, JobStore
+from page_cache import PageAnalysisCache
+from page_extractor import extract_page_data
+from page_readiness import capture_when_ready, last_step_actions
+from media_io import iter_url, write_atomic
+from output_store import OutputStore
+from reference_image import ReferenceImages
+import tracing
+
+if TYPE_CHECKING:
+	from browser_use import BrowserSession
+	from google import genai
+
+	from veo_poller import OperationPoller
+
+# Module attributes imported on first access, name -> module
+_LAZY_IMPORTS = {
+	'Agent': 'browser_use',
+	'BrowserSession': 'browser_use',
+	'GatewayChatGoogle': 'gateway_chat',
+	'OperationPoller': 'veo_poller',
+}
+
+
+def __getattr__(name: str):
+	if name not in _LAZY_IMPORTS:
+		raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+	value = globals()[name] = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+	return value
+
+
+def _lazy(name: str):
+	"""A lazily imported module attribute, importing it on first use; a value set on the module (a fake, say) wins"""
+	return globals()[name] if name in globals() else __getattr__(name)
+
+
+def preload(mode: str = 'instagram', browser: bool = False):
+	"""Import up front what a run in mode (and, with browser, the browser agent) needs.
+
+	Lazy imports run on the event loop and google.genai alone takes seconds, so the CLI
+	calls this before starting its loop; long-lived callers should too.
+	"""
+	importlib.import_module('google.genai.types')
+	if mode == 'tiktok':
+		_lazy('OperationPoller')
+	if browser:
+		for name in ('Agent', 'BrowserSession', 'GatewayChatGoogle'):
+			_lazy(name)
 
 
 def setup_environment(debug: bool):
+	"""Quiet browser-use and the root logger unless debugging; call before the browser stack is first imported"""
 	if not debug:
 		os.environ['BROWSER_USE_SETUP_LOGGING'] = 'false'
 		os.environ['BROWSER_USE_LOGGING_LEVEL'] = 'critical'
@@ -18,45 +94,158 @@ def setup_environment(debug: bool):
 		os.environ['BROWSER_USE_LOGGING_LEVEL'] = 'info'
 
 
-parser = argparse.ArgumentParser(description='Generate ads from landing pages using browser-use + 🍌')
-parser.add_argument('--url', nargs='?', help='Landing page URL to analyze')
-parser.add_argument('--debug', action='store_true', default=False, help='Enable debug mode (show browser, verbose logs)')
-parser.add_argument('--count', type=int, default=1, help='Number of ads to generate in parallel (default: 1)')
-group = parser.add_mutually_exclusive_group()
-group.add_argument('--instagram', action='store_true', default=False, help='Generate Instagram image ad (default)')
-group.add_argument('--tiktok', action='store_true', default=False, help='Generate TikTok video ad using Veo3')
-args = parser.parse_args()
-if not args.instagram and not args.tiktok:
-	args.instagram = True
-setup_environment(args.debug)
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
-from typing import Any, cast
-import time
+_clients: dict[str, 'genai.Client'] = {}
+_gateway: GeminiGateway | None = None
+_hedger: Hedger | None = None
+_output_store: OutputStore | None = None
 
-import aiofiles
-from google import genai
-from google.genai import types
-from PIL import Image
 
-from browser_use import Agent, BrowserSession
-from browser_use.llm.google import ChatGoogle
+def get_client(api_key: str | None = GEMINI_API_KEY) -> 'genai.Client':
+	"""Return the process-wide genai client for api_key, creating it (and importing google.genai) on first use"""
+	if not api_key:
+		raise ValueError('GEMINI_API_KEY is missing or empty – set the environment variable or pass api_key explicitly')
+	client = _clients.get(api_key)
+	if client is None:
+		from google import genai
 
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+		client = _clients[api_key] = genai.Client(api_key=api_key)
+	return client
+
+
+def get_gateway() -> GeminiGateway:
+	"""Return the process-wide gateway that rate limits and retries every Gemini request"""
+	global _gateway
+	if _gateway is None:
+		_gateway = GeminiGateway()
+	return _gateway
+
+
+def enable_hedging(percentile: float = 0.95, budget: float = 0.1) -> Hedger:
+	"""Hedge the image requests of every AdGenerator created from now on, on the process-wide gateway"""
+	global _hedger
+	_hedger = Hedger(get_gateway(), percentile=percentile, budget=budget)
+	return _hedger
+
+
+def get_output_store() -> OutputStore:
+	"""Return the process-wide content-addressed store every ad, analysis and prompt is saved to"""
+	global _output_store
+	if _output_store is None:
+		_output_store = OutputStore(Path('output'))
+	return _output_store
+
+
+def configure_output_store(root: Path | str) -> OutputStore:
+	"""Save every ad, analysis and prompt under root from now on instead of ./output"""
+	global _output_store
+	_output_store = OutputStore(root)
+	return _output_store
+
+
+def create_browser_pool(debug: bool = False, size: int = 2, max_uses: int = 20, max_memory_mb: float | None = None) -> BrowserSessionPool:
+	"""Pool of warm keep_alive browser sessions, headless unless debugging"""
+	return BrowserSessionPool(
+		lambda: _lazy('BrowserSession')(headless=not debug, keep_alive=True),
+		size=size,
+		max_uses=max_uses,
+		max_memory_mb=max_memory_mb,
+	)
 
 
 class LandingPageAnalyzer:
-	def __init__(self, debug: bool = False):
+	def __init__(
+		self,
+		debug: bool = False,
+		pool: BrowserSessionPool | None = None,
+		cache: PageAnalysisCache | None = None,
+		fast_path_threshold: float | None = 0.8,
+		viewport_screenshots: int = 0,
+	):
 		self.debug = debug
-		self.llm = ChatGoogle(model='gemini-2.5-pro', api_key=GEMINI_API_KEY)
-		self.output_dir = Path('output')
-		self.output_dir.mkdir(exist_ok=True)
+		self.pool = pool
+		self.cache = cache
+		self.fast_path_threshold = fast_path_threshold
+		self.viewport_screenshots = viewport_screenshots
+		self._llm = None
+		# Screenshots go next to the ads they are the reference for
+		self.output_dir = get_output_store().root
+
+	@property
+	def llm(self):
+		"""The browser agent's LLM, created (importing browser_use) the first time an analysis needs the agent"""
+		if self._llm is None:
+			# The gateway owns retries, so ChatGoogle makes a single attempt per call
+			self._llm = _lazy('GatewayChatGoogle')(model='gemini-2.5-pro', api_key=GEMINI_API_KEY, max_retries=1, gateway=get_gateway())
+		return self._llm
 
 	async def analyze_landing_page(self, url: str, mode: str = 'instagram') -> dict:
-		browser_session = BrowserSession(
-			headless=not self.debug,
-		)
-
-		agent = Agent(
+		with tracing.context(url=url), tracing.span('analyze') as span:
+			page_data = await self._analyze(url)
+			span.attributes['source'] = page_data.get('source')
+			return page_data
+
+	async def _analyze(self, url: str) -> dict:
+		if self.cache is not None:
+			page_data = await self.cache.get(url)
+			if page_data is not None:
+				print(f'⚡ Using cached analysis for {url}')
+				return page_data
+
+		page_data, fingerprint = await self._fast_path(url)
+		if page_data is None:
+			page_data = await self._agent_path(url)
+			# The HTML the fast path fetched fingerprints the page the agent analyzed, so the cache need not fetch it again
+			if fingerprint is not None:
+				page_data['fingerprint'] = fingerprint
+
+		if self.cache is not None:
+			try:
+				await self.cache.put(page_data)
+			except Exception as e:
+				print(f'Could not cache analysis for {url}: {e}')
+		return page_data
+
+	async def _fast_path(self, url: str) -> tuple[dict | None, dict | None]:
+		"""(page_data, fingerprint): brand info parsed from the raw HTML, or None when it is below the completeness
+		threshold, and the fingerprint of the fetched page either way (None when it was not fetched)"""
+		if self.fast_path_threshold is None:
+			return None, None
+		try:
+			page_data = await extract_page_data(url, self.output_dir)
+		except Exception as e:
+			print(f'HTML extraction failed for {url}: {e}')
+			return None, None
+		if page_data is None:
+			return None, None
+		if page_data['completeness'] < self.fast_path_threshold:
+			if page_data['screenshot_path']:
+				page_data['screenshot_path'].unlink(missing_ok=True)
+			print(f'🔎 HTML extraction for {url} only {page_data["completeness"]:.0%} complete, falling back to the browser agent')
+			return None, page_data['fingerprint']
+		print(f'⚡ Extracted brand info for {url} from HTML ({page_data["completeness"]:.0%} complete)')
+		return page_data, page_data['fingerprint']
+
+	async def _agent_path(self, url: str) -> dict:
+		if self.pool is not None:
+			# Borrow a warm browser instead of paying Chromium startup for every URL (the first borrows launch them)
+			async with self.pool.session() as browser_session:
+				page_data = await self._analyze_with_session(url, browser_session)
+		else:
+			# keep_alive so the browser outlives agent.run() until the screenshot is taken
+			browser_session = _lazy('BrowserSession')(
+				headless=not self.debug,
+				keep_alive=True,
+			)
+			try:
+				page_data = await self._analyze_with_session(url, browser_session)
+			finally:
+				await browser_session.kill()
+		return page_data
+
+	async def _analyze_with_session(self, url: str, browser_session: 'BrowserSession') -> dict:
+		agent = _lazy('Agent')(
 			task=f"""Go to {url} and quickly extract key brand information for Instagram ad creation.
 
 Steps:
@@ -78,36 +267,95 @@ Return ONLY the key brand info, not page structure details.""",
 			vision_detail_level='high',
 		)
 
-		screenshot_path = None
-		timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+		# Microseconds keep screenshots of landing pages analyzed concurrently from overwriting each other
+		timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+		# Screenshot as soon as the first navigation has settled instead of after a fixed delay
+		screenshot_task = asyncio.create_task(capture_when_ready(browser_session, self.output_dir / f'landing_page_{timestamp}.png'))
 
-		async def screenshot_callback(agent_instance):
-			nonlocal screenshot_path
-			await asyncio.sleep(4)
-			screenshot_path = self.output_dir / f'landing_page_{timestamp}.png'
-			await agent_instance.browser_session.take_screenshot(path=str(screenshot_path), full_page=False)
+		viewport_paths: list[Path] = []
 
-		screenshot_task = asyncio.create_task(screenshot_callback(agent))
-		history = await agent.run()
+		async def capture_scroll_viewport(agent_instance):
+			if len(viewport_paths) >= self.viewport_screenshots or 'scroll' not in last_step_actions(agent_instance):
+				return
+			path = self.output_dir / f'landing_page_{timestamp}_scroll{len(viewport_paths) + 1}.png'
+			try:
+				await agent_instance.browser_session.take_screenshot(path=str(path), full_page=False)
+				viewport_paths.append(path)
+			except Exception as e:
+				print(f'Viewport screenshot failed: {e}')
+
+		screenshot_path = None
 		try:
-			await screenshot_task
-		except Exception as e:
-			print(f'Screenshot task failed: {e}')
+			history = await agent.run(on_step_end=capture_scroll_viewport if self.viewport_screenshots else None)
+			try:
+				# Still pending here means the page is mid-settle (or never loaded), so only wait briefly
+				screenshot_path = await asyncio.wait_for(screenshot_task, timeout=5)
+			except asyncio.TimeoutError:
+				print('Screenshot task timed out waiting for the page to load')
+			except Exception as e:
+				print(f'Screenshot task failed: {e}')
+		finally:
+			# A failed or cancelled run must not leave the capture polling a session that goes back to the pool
+			if not screenshot_task.done():
+				screenshot_task.cancel()
 
 		analysis = history.final_result() or 'No analysis content extracted'
-		return {'url': url, 'analysis': analysis, 'screenshot_path': screenshot_path, 'timestamp': timestamp}
+		return {
+			'url': url,
+			'analysis': analysis,
+			'screenshot_path': screenshot_path,
+			'viewport_screenshots': viewport_paths,
+			'timestamp': timestamp,
+			'source': 'agent',
+		}
 
 
-class AdGenerator:
-	def __init__(self, api_key: str | None = GEMINI_API_KEY, mode: str = 'instagram'):
-		if not api_key:
-			raise ValueError('GEMINI_API_KEY is missing or empty – set the environment variable or pass api_key explicitly')
+CONCEPT_GUIDELINES = """Be creative and different! Consider various approaches like:
+- Different visual metaphors and storytelling angles
+- Various trending TikTok formats (transitions, reveals, transformations)
+- Different emotional appeals (funny, inspiring, surprising, relatable)
+- Unique visual styles (neon, retro, minimalist, maximalist, surreal)
+- Different perspectives (first-person, aerial, macro, time-lapse)"""
+
+
+class VideoConcepts(BaseModel):
+	concepts: list[str]
+
 
-		self.client = genai.Client(api_key=api_key)
-		self.output_dir = Path('output')
-		self.output_dir.mkdir(exist_ok=True)
+class AdGenerator:
+	def __init__(
+		self,
+		api_key: str | None = GEMINI_API_KEY,
+		mode: str = 'instagram',
+		client: 'genai.Client | None' = None,
+		gateway: GeminiGateway | None = None,
+		store: OutputStore | None = None,
+		variants: VariantPipeline | None = None,
+		hedger: Hedger | None = None,
+	):
+		self.api_key = api_key
+		self.client = client or get_client(api_key)
+		self.gateway = gateway or get_gateway()
+		self._poller = None
+		# Screenshots are prepared and uploaded once per URL, then shared by every ad
+		self.references = ReferenceImages(self.client, gateway=self.gateway)
+		self.image_latencies: list[float] = []
+		self.store = store or get_output_store()
+		self.output_dir = self.store.root
+		# Image ads are handed to it as they are saved, to be cropped into placement variants off the event loop
+		self.variants = variants
+		# Opt-in: image requests that straggle past a latency percentile are raced against a duplicate
+		self.hedger = hedger or _hedger
 		self.mode = mode
 
+	@property
+	def poller(self) -> 'OperationPoller':
+		"""The Veo operation poller, created with the first video so image ads never load it"""
+		if self._poller is None:
+			self._poller = _lazy('OperationPoller')(self.client, gateway=self.gateway)
+		return self._poller
+
+	@tracing.traced('concept')
 	async def create_video_concept(self, browser_analysis: str, ad_id: int) -> str:
 		"""Generate a unique creative concept for each video ad"""
 		if self.mode != 'tiktok':
@@ -118,18 +366,87 @@ class AdGenerator:
 
 Create a UNIQUE and SPECIFIC TikTok video concept #{ad_id}.
 
-Be creative and different! Consider various approaches like:
-- Different visual metaphors and storytelling angles
-- Various trending TikTok formats (transitions, reveals, transformations)
-- Different emotional appeals (funny, inspiring, surprising, relatable)
-- Unique visual styles (neon, retro, minimalist, maximalist, surreal)
-- Different perspectives (first-person, aerial, macro, time-lapse)
+{CONCEPT_GUIDELINES}
 
 Return a 2-3 sentence description of a specific, unique video concept that would work for this brand.
 Make it visually interesting and different from typical ads. Be specific about visual elements, transitions, and mood."""
 
-		response = self.client.models.generate_content(model='gemini-2.5-pro', contents=concept_prompt)
-		return response.text if response and response.text else ''
+		response = await self.gateway.call(
+			'gemini-2.5-pro', lambda: self.client.aio.models.generate_content(model='gemini-2.5-pro', contents=concept_prompt)
+		)
+		concept = response.text if response and response.text else ''
+		accounting.record('gemini-2.5-pro', request_bytes=len(concept_prompt.encode()), response_bytes=len(concept.encode()))
+		return concept
+
+	@tracing.traced('concepts')
+	async def create_video_concepts(self, browser_analysis: str, count: int, chunk_size: int = 8, max_attempts: int = 3) -> list[str]:
+		"""Generate count distinct video concepts with one structured-output call per chunk.
+
+		Chunks run in order and each one is told which concepts already exist, so the whole set
+		stays diverse. A chunk that comes back short is retried only for the missing entries;
+		slots still empty after max_attempts are returned as '' (the generic TikTok prompt).
+		"""
+		if self.mode != 'tiktok' or count <= 0:
+			return [''] * max(count, 0)
+
+		concepts: list[str] = []
+		attempts = 0
+		while len(concepts) < count and attempts < max_attempts * -(-count // chunk_size):
+			attempts += 1
+			wanted = min(chunk_size, count - len(concepts))
+			try:
+				concepts.extend(await self._request_concepts(browser_analysis, wanted, concepts))
+			except Exception as e:
+				print(f'❌ Concept batch failed: {e}')
+
+		if len(concepts) < count:
+			print(f'⚠️ Only {len(concepts)}/{count} video concepts generated, the rest use the generic prompt')
+		return (concepts + [''] * count)[:count]
+
+	async def _request_concepts(self, browser_analysis: str, wanted: int, existing: list[str]) -> list[str]:
+		avoid = ''
+		if existing:
+			avoid = '\n\nThese concepts are already taken, make every new one clearly different from them:\n' + '\n'.join(
+				f'- {concept}' for concept in existing
+			)
+
+		batch_prompt = f"""Based on this brand analysis:
+{browser_analysis}
+
+Create {wanted} UNIQUE and SPECIFIC TikTok video concepts for this brand. Every concept must be different from all the others.
+
+{CONCEPT_GUIDELINES}
+
+Each concept is a 2-3 sentence description of a specific video that would work for this brand.
+Make them visually interesting and different from typical ads. Be specific about visual elements, transitions, and mood.{avoid}"""
+
+		from google.genai import types
+
+		config = types.GenerateContentConfig(response_mime_type='application/json', response_schema=VideoConcepts)
+		response = await self.gateway.call(
+			'gemini-2.5-pro',
+			lambda: self.client.aio.models.generate_content(model='gemini-2.5-pro', contents=batch_prompt, config=config),
+		)
+		accounting.record('gemini-2.5-pro', request_bytes=len(batch_prompt.encode()), response_bytes=len((response.text or '').encode()))
+		parsed = response.parsed if isinstance(response.parsed, VideoConcepts) else VideoConcepts.model_validate_json(response.text or '{}')
+		seen = {concept.strip().lower() for concept in existing}
+		fresh = []
+		for concept in parsed.concepts:
+			key = concept.strip().lower()
+			if key and key not in seen:
+				seen.add(key)
+				fresh.append(concept.strip())
+		return fresh[:wanted]
+
+	def image_stats_summary(self) -> str:
+		"""Reference upload volume and per-ad image latency for the run"""
+		summary = f'📦 {self.references.stats.summary()}'
+		if self.image_latencies:
+			latencies = sorted(self.image_latencies)
+			summary += f', image request p50 {latencies[len(latencies) // 2]:.1f}s max {latencies[-1]:.1f}s'
+		if self.hedger is not None:
+			summary += f'\n{self.hedger.summary()}'
+		return summary
 
 	def create_ad_prompt(self, browser_analysis: str, video_concept: str = '') -> str:
 		if self.mode == 'instagram':
@@ -179,85 +496,129 @@ Create a dynamic, engaging vertical video with:
 Style: Modern TikTok advertisement, viral potential, authentic energy, minimal text, maximum visual impact"""
 		return prompt
 
+	@tracing.traced('image')
 	async def generate_ad_image(self, prompt: str, screenshot_path: Path | None = None) -> bytes | None:
 		"""Generate ad image bytes using Gemini. Returns None on failure."""
 		try:
-			from typing import Any
-
 			contents: list[Any] = [prompt]
 
 			if screenshot_path and screenshot_path.exists():
-				img = Image.open(screenshot_path)
-				w, h = img.size
-				side = min(w, h)
-				img = img.crop(((w - side) // 2, (h - side) // 2, (w + side) // 2, (h + side) // 2))
-				contents = [prompt + '\n\nHere is the actual landing page screenshot to reference for design inspiration:', img]
-
-			response = await self.client.aio.models.generate_content(
-				model='gemini-2.5-flash-image',
-				contents=contents,
+				reference = await self.references.get(screenshot_path)
+				contents = [prompt + '\n\nHere is the actual landing page screenshot to reference for design inspiration:', reference]
+
+			started = time.perf_counter()
+			# Throttling (429) is retried with backoff by the gateway, so only hard failures end up below
+			call = self.hedger.call if self.hedger is not None else self.gateway.call
+			response = await call(
+				'gemini-2.5-flash-image',
+				lambda: self.client.aio.models.generate_content(
+					model='gemini-2.5-flash-image',
+					contents=contents,
+				),
 			)
+			self.image_latencies.append(time.perf_counter() - started)
 
+			# An uploaded reference is a file URI, one that fell back to inline travels with every request
+			sent = sum(len(c.encode()) if isinstance(c, str) else len(getattr(getattr(c, 'inline_data', None), 'data', None) or b'') for c in contents)
 			cand = getattr(response, 'candidates', None)
 			if cand:
 				for part in getattr(cand[0].content, 'parts', []):
 					inline = getattr(part, 'inline_data', None)
 					if inline:
+						accounting.record('gemini-2.5-flash-image', request_bytes=sent, response_bytes=len(inline.data))
 						return inline.data
+			accounting.record('gemini-2.5-flash-image', request_bytes=sent)
 		except Exception as e:
 			print(f'❌ Image generation failed: {e}')
 		return None
 
-	async def generate_ad_video(self, prompt: str, screenshot_path: Path | None = None, ad_id: int = 1) -> bytes:
-		"""Generate ad video using Veo 3.1."""
-		client = genai.Client(api_key=GEMINI_API_KEY)
-
-		operation = client.models.generate_videos(
-			model="veo-3.1-generate-preview",
-			prompt=prompt,
-		)
-
-		# Poll the operation status until the video is ready
-		while not operation.done:
-			print(f"Waiting for video generation to complete for ad #{ad_id}...")
-			await asyncio.sleep(10)
-			operation = client.operations.get(operation)
-
-		# Download the generated video
+	@tracing.traced('video')
+	async def generate_ad_video(
+		self,
+		prompt: str,
+		screenshot_path: Path | None = None,
+		ad_id: int = 1,
+		destination: Path | None = None,
+		operation_name: str | None = None,
+		on_submitted: Callable[[str], Awaitable[None]] | None = None,
+	) -> Path:
+		"""Generate ad video using Veo 3.1 and stream it to destination (defaults to the ad's output path).
+
+		With operation_name, an earlier submission is picked up instead of paying for a new one.
+		on_submitted is awaited with the operation name as soon as Veo has accepted a new job.
+		"""
+		if operation_name:
+			from google.genai import types
+
+			print(f'♻️ Video ad #{ad_id} resuming Veo operation {operation_name}')
+			operation = types.GenerateVideosOperation(name=operation_name)
+		else:
+			# Queued: waiting on our rate limits plus the submission round trip, until Veo has accepted the job.
+			# A submission that timed out or got a 5xx may still have been accepted, so only 429s and refused
+			# connections are retried; anything else fails the ad rather than rendering (and billing) it twice
+			with tracing.span('video.queued'):
+				operation = await self.gateway.call(
+					'veo-3.1-generate-preview',
+					lambda: self.client.aio.models.generate_videos(
+						model='veo-3.1-generate-preview',
+						prompt=prompt,
+					),
+					retryable=is_retryable_submission,
+				)
+			accounting.record('veo-3.1-generate-preview', request_bytes=len(prompt.encode()))
+			if on_submitted is not None:
+				await on_submitted(operation.name)
+
+		# The shared poller refreshes every pending Veo job together and wakes us once ours is done
+		print(f'⏳ Video ad #{ad_id} queued with Veo, waiting for it to render...')
+		operation = await self.poller.wait(operation, label=f'ad #{ad_id}')
+		if operation.error:
+			raise RuntimeError(f'Video generation failed for ad #{ad_id}: {operation.error}')
+
+		# Stream the video in chunks straight to its final location
 		generated_video = operation.response.generated_videos[0]
-		client.files.download(file=generated_video.video)
-		
-		# Read the video file and return bytes
-		video_path = f"temp_video_{ad_id}.mp4"
-		generated_video.video.save(video_path)
-		
-		# Read the saved video file as bytes
-		with open(video_path, 'rb') as f:
-			video_bytes = f.read()
-		
-		# Clean up temporary file
-		os.remove(video_path)
-		
-		return video_bytes
-
-	async def save_results(self, ad_content: bytes, prompt: str, analysis: str, url: str, timestamp: str) -> str:
-		if self.mode == 'instagram':
-			content_path = self.output_dir / f'ad_{timestamp}.png'
-		else:  # tiktok
-			content_path = self.output_dir / f'ad_{timestamp}.mp4'
-
-		async with aiofiles.open(content_path, 'wb') as f:
-			await f.write(ad_content)
-
-		analysis_path = self.output_dir / f'analysis_{timestamp}.txt'
-		async with aiofiles.open(analysis_path, 'w', encoding='utf-8') as f:
-			await f.write(f'URL: {url}\n\n')
-			await f.write('BROWSER-USE ANALYSIS:\n')
-			await f.write(analysis)
-			await f.write('\n\nGENERATED PROMPT:\n')
-			await f.write(prompt)
-
-		return str(content_path)
+		destination = destination or self.content_path(datetime.now().strftime('%Y%m%d_%H%M%S') + f'_{ad_id}')
+		with tracing.span('video.download'):
+			await write_atomic(destination, self.iter_video_chunks(generated_video.video))
+		# A resumed operation was paid for by the run that submitted it
+		accounting.record('veo-3.1-generate-preview', response_bytes=destination.stat().st_size, media_seconds=0 if operation_name else accounting.VEO_SECONDS)
+		return destination
+
+	async def iter_video_chunks(self, video) -> AsyncIterator[bytes]:
+		"""Yield a generated video's bytes, inline if the API returned them or streamed from its download URI"""
+		if video.video_bytes:
+			yield video.video_bytes
+			return
+		headers = {'x-goog-api-key': self.api_key} if self.api_key else None
+		async for chunk in iter_url(video.uri, headers=headers):
+			yield chunk
+
+	def content_path(self, timestamp: str) -> Path:
+		"""Where a video is streamed to before save_results moves it into the store under its hash"""
+		extension = 'png' if self.mode == 'instagram' else 'mp4'
+		return self.store.staging / f'ad_{timestamp}.{extension}'
+
+	@tracing.traced('save')
+	async def save_results(
+		self,
+		ad_content: Path | bytes | AsyncIterable[bytes],
+		prompt: str,
+		analysis: str,
+		url: str,
+		ad_id: int | None = None,
+		screenshot_path: Path | None = None,
+	) -> str:
+		"""Save the ad to the output store, indexed in its manifest with its prompt and the page analysis.
+
+		ad_content is either a path the ad was already streamed to, or bytes / an async
+		chunk stream. The analysis and screenshot are stored once per page, not per ad.
+		An image ad is then queued for its placement variants (waiting if that queue is full).
+		"""
+		extension = 'png' if self.mode == 'instagram' else 'mp4'
+		path = await self.store.record_ad(url, self.mode, ad_content, extension, analysis, prompt, ad_id=ad_id, screenshot_path=screenshot_path)
+		if self.variants is not None and self.mode == 'instagram':
+			await self.variants.submit(path, url, ad_id)
+		return str(path)
 
 
 def open_file(file_path: str):
@@ -273,128 +634,584 @@ def open_file(file_path: str):
 		print(f'❌ Could not open file: {e}')
 
 
-async def create_ad_from_landing_page(url: str, debug: bool = False, mode: str = 'instagram', ad_id: int = 1):
-	analyzer = LandingPageAnalyzer(debug=debug)
+async def create_ad_from_landing_page(
+	url: str,
+	debug: bool = False,
+	mode: str = 'instagram',
+	ad_id: int = 1,
+	analyzer: LandingPageAnalyzer | None = None,
+	variants: VariantPipeline | None = None,
+):
+	analyzer = analyzer or LandingPageAnalyzer(debug=debug)
 
-	try:
-		if ad_id == 1:
-			print(f'🚀 Analyzing {url} for {mode.capitalize()} ad...')
+	with tracing.context(url=url, ad_id=ad_id), tracing.span('ad', mode=mode):
+		page_data: dict = {}
+		try:
+			if ad_id == 1:
+				print(f'🚀 Analyzing {url} for {mode.capitalize()} ad...')
 			page_data = await analyzer.analyze_landing_page(url, mode=mode)
-		else:
-			analyzer_temp = LandingPageAnalyzer(debug=debug)
-			page_data = await analyzer_temp.analyze_landing_page(url, mode=mode)
 
-		generator = AdGenerator(mode=mode)
+			generator = AdGenerator(mode=mode, variants=variants)
 
-		if mode == 'instagram':
-			prompt = generator.create_ad_prompt(page_data['analysis'])
-			ad_content = await generator.generate_ad_image(prompt, page_data.get('screenshot_path'))
-			if ad_content is None:
-				raise RuntimeError(f'Ad image generation failed for ad #{ad_id}')
-		else:  # tiktok
-			video_concept = await generator.create_video_concept(page_data['analysis'], ad_id)
-			prompt = generator.create_ad_prompt(page_data['analysis'], video_concept)
-			ad_content = await generator.generate_ad_video(prompt, page_data.get('screenshot_path'), ad_id)
+			with accounting.get_ledger().admit(mode):
+				if mode == 'instagram':
+					prompt = generator.create_ad_prompt(page_data['analysis'])
+					ad_content = await generator.generate_ad_image(prompt, page_data.get('screenshot_path'))
+					if ad_content is None:
+						raise RuntimeError(f'Ad image generation failed for ad #{ad_id}')
+				else:  # tiktok
+					video_concept = await generator.create_video_concept(page_data['analysis'], ad_id)
+					prompt = generator.create_ad_prompt(page_data['analysis'], video_concept)
+					destination = generator.content_path(datetime.now().strftime('%Y%m%d_%H%M%S_%f') + f'_{ad_id}')
+					ad_content = await generator.generate_ad_video(prompt, page_data.get('screenshot_path'), ad_id, destination)
 
-		result_path = await generator.save_results(ad_content, prompt, page_data['analysis'], url, page_data['timestamp'])
-
-		if mode == 'instagram':
-			print(f'🎨 Generated image ad #{ad_id}: {result_path}')
-		else:
-			print(f'🎬 Generated video ad #{ad_id}: {result_path}')
+			result_path = await generator.save_results(ad_content, prompt, page_data['analysis'], url, ad_id, page_data.get('screenshot_path'))
 
-		open_file(result_path)
-
-		return result_path
-
-	except Exception as e:
-		print(f'❌ Error for ad #{ad_id}: {e}')
-		raise
-	finally:
-		if ad_id == 1 and page_data.get('screenshot_path'):
-			print(f'📸 Page screenshot: {page_data["screenshot_path"]}')
+			if mode == 'instagram':
+				print(f'🎨 Generated image ad #{ad_id}: {result_path}')
+			else:
+				print(f'🎬 Generated video ad #{ad_id}: {result_path}')
 
+			open_file(result_path)
+			if variants is not None:
+				await variants.join()
+				print(variants.stats.summary())
+			print(accounting.get_ledger().summary())
 
-async def generate_single_ad(page_data: dict, mode: str, ad_id: int):
-	"""Generate a single ad using pre-analyzed page data"""
-	generator = AdGenerator(mode=mode)
+			return result_path
 
-	try:
+		except Exception as e:
+			print(f'❌ Error for ad #{ad_id}: {e}')
+			raise
+		finally:
+			if ad_id == 1 and page_data.get('screenshot_path'):
+				print(f'📸 Page screenshot: {page_data["screenshot_path"]}')
+
+
+async def render_ad(
+	page_data: dict,
+	mode: str,
+	ad_id: int,
+	generator: AdGenerator,
+	video_concept: str | None = None,
+	job: JobRun | None = None,
+	timestamp: str | None = None,
+) -> tuple[str, bytes | Path]:
+	"""Generate one ad without saving it, returning its prompt and payload (image bytes, or the path a video was streamed to).
+
+	With a job, the prompt and Veo submission are recorded, and a submitted Veo operation is resumed rather than paid for again.
+	The ad is admitted against the run's budget first (see accounting.Ledger.admit).
+	"""
+	record = job.ad(ad_id) if job else None
+	# Create unique timestamp for each ad, videos are streamed straight to the matching output path.
+	# Microseconds keep names apart when batch mode generates the same ad_id for several URLs at once.
+	timestamp = timestamp or datetime.now().strftime('%Y%m%d_%H%M%S_%f') + f'_{ad_id}'
+
+	# Refused with BudgetExceeded before its first request when the run's budget cannot cover another ad
+	with accounting.get_ledger().admit(mode):
 		if mode == 'instagram':
 			prompt = generator.create_ad_prompt(page_data['analysis'])
+			if job:
+				await job.save_prompt(ad_id, prompt)
 			ad_content = await generator.generate_ad_image(prompt, page_data.get('screenshot_path'))
 			if ad_content is None:
 				raise RuntimeError(f'Ad image generation failed for ad #{ad_id}')
-		else:  # tiktok
-			video_concept = await generator.create_video_concept(page_data['analysis'], ad_id)
-			prompt = generator.create_ad_prompt(page_data['analysis'], video_concept)
-			ad_content = await generator.generate_ad_video(prompt, page_data.get('screenshot_path'), ad_id)
+			return prompt, ad_content
 
-		# Create unique timestamp for each ad
-		timestamp = datetime.now().strftime('%Y%m%d_%H%M%S') + f'_{ad_id}'
-		result_path = await generator.save_results(ad_content, prompt, page_data['analysis'], page_data['url'], timestamp)
-
-		if mode == 'instagram':
-			print(f'🎨 Generated image ad #{ad_id}: {result_path}')
+		# tiktok
+		if record and record.prompt:
+			prompt = record.prompt
 		else:
-			print(f'🎬 Generated video ad #{ad_id}: {result_path}')
-
-		return result_path
+			if video_concept is None:
+				video_concept = await generator.create_video_concept(page_data['analysis'], ad_id)
+			prompt = generator.create_ad_prompt(page_data['analysis'], video_concept)
+			if job:
+				await job.save_prompt(ad_id, prompt)
+		on_submitted = (lambda name: job.submitted(ad_id, name)) if job else None
+		if record and record.operation:
+			try:
+				return prompt, await generator.generate_ad_video(
+					prompt, page_data.get('screenshot_path'), ad_id, generator.content_path(timestamp), operation_name=record.operation
+				)
+			except Exception as e:
+				# Expired or failed on Veo's side, render it again
+				print(f'⚠️ Could not resume the Veo operation of ad #{ad_id} ({e}), submitting it again')
+		return prompt, await generator.generate_ad_video(
+			prompt, page_data.get('screenshot_path'), ad_id, generator.content_path(timestamp), on_submitted=on_submitted
+		)
 
-	except Exception as e:
-		print(f'❌ Error for ad #{ad_id}: {e}')
-		raise
 
+async def save_ad(page_data: dict, mode: str, ad_id: int, generator: AdGenerator, prompt: str, ad_content: bytes | Path, job: JobRun | None = None) -> str:
+	"""Save a rendered ad to the output store (recording it on the job) and report it"""
+	result_path = await generator.save_results(ad_content, prompt, page_data['analysis'], page_data['url'], ad_id, page_data.get('screenshot_path'))
+	if job:
+		await job.done(ad_id, result_path)
 
-async def create_multiple_ads(url: str, debug: bool = False, mode: str = 'instagram', count: int = 1):
-	"""Generate multiple ads in parallel using asyncio concurrency"""
-	if count == 1:
-		return await create_ad_from_landing_page(url, debug, mode, 1)
+	if mode == 'instagram':
+		print(f'🎨 Generated image ad #{ad_id}: {result_path}')
+	else:
+		print(f'🎬 Generated video ad #{ad_id}: {result_path}')
+	return result_path
+
+
+async def generate_single_ad(
+	page_data: dict,
+	mode: str,
+	ad_id: int,
+	generator: AdGenerator | None = None,
+	video_concept: str | None = None,
+	job: JobRun | None = None,
+):
+	"""Generate a single ad using pre-analyzed page data (and a pre-made video concept, if batched).
+
+	With a job, progress is recorded as it happens, and an ad the job already finished is returned as is.
+	"""
+	record = job.ad(ad_id) if job else None
+	if record and record.completed:
+		print(f'⏭️ Ad #{ad_id} already generated: {record.output_path}')
+		return record.output_path
+
+	generator = generator or AdGenerator(mode=mode)
+
+	with tracing.context(url=page_data['url'], ad_id=ad_id), tracing.span('ad', mode=mode):
+		try:
+			prompt, ad_content = await render_ad(page_data, mode, ad_id, generator, video_concept, job)
+			return await save_ad(page_data, mode, ad_id, generator, prompt, ad_content, job)
+		except Exception as e:
+			if job:
+				await job.failed(ad_id, str(e))
+			print(f'❌ Error for ad #{ad_id}: {e}')
+			raise
+
+
+async def stream_ads(
+	page_data: dict,
+	mode: str,
+	count: int,
+	generator: AdGenerator,
+	concepts: list[str | None],
+	job: JobRun | None = None,
+	max_in_flight: int = 8,
+	max_buffered: int = 2,
+) -> tuple[list[str], list[int]]:
+	"""Generate count ads, at most max_in_flight at a time, saving, reporting and opening each one as soon as it lands.
+
+	Returns the ad paths (in ad order) and the ids of the ads that failed.
+	"""
+	paths: dict[int, str] = {}
+	records = job.ads() if job else {}
+	for ad_id, record in records.items():
+		if record.completed:
+			print(f'⏭️ Ad #{ad_id} already generated: {record.output_path}')
+			paths[ad_id] = record.output_path
+
+	def render(ad_id: int):
+		async def run():
+			with tracing.context(url=page_data['url'], ad_id=ad_id), tracing.span('ad', mode=mode):
+				return await render_ad(page_data, mode, ad_id, generator, concepts[ad_id - 1], job)
+
+		return run
+
+	stream = CompletionStream([(ad_id, render(ad_id)) for ad_id in range(1, count + 1) if ad_id not in paths], max_in_flight, max_buffered)
+	progress = Progress(count)
+	progress.done = len(paths)
+	failed = []
+	async for completion in stream:
+		ad_id, error = completion.key, completion.error
+		progress.clear()
+		if error is None:
+			try:
+				with tracing.context(url=page_data['url'], ad_id=ad_id):
+					paths[ad_id] = await save_ad(page_data, mode, ad_id, generator, *completion.result, job)
+			except Exception as e:
+				error = e
+		if error is not None:
+			if job:
+				await job.failed(ad_id, str(error))
+			print(f'❌ Error for ad #{ad_id}: {error}')
+			failed.append(ad_id)
+			progress.update(ok=False)
+			continue
+		progress.update()
+		open_file(paths[ad_id])
+	progress.close()
+	if progress.first_at is not None:
+		print(f'⚡ First ad ready {progress.first_at:.1f}s after generation started')
+	return [paths[ad_id] for ad_id in sorted(paths)], sorted(failed)
+
+
+async def create_multiple_ads(
+	url: str,
+	debug: bool = False,
+	mode: str = 'instagram',
+	count: int = 1,
+	analyzer: LandingPageAnalyzer | None = None,
+	store: JobStore | None = None,
+	resume: bool = False,
+	variants: VariantPipeline | None = None,
+	stream: bool = False,
+	max_in_flight: int = 8,
+	max_buffered: int = 2,
+):
+	"""Generate multiple ads in parallel using asyncio concurrency.
+
+	With a store the run is recorded step by step; resume continues the last unfinished run for url and mode.
+	With stream, ads are handled as they land instead of all at the end (see stream_ads).
+	"""
+	job = None
+	if store is not None:
+		job = store.latest_unfinished(url, mode) if resume else None
+		if job is not None:
+			if job.count != count:
+				print(f'♻️ Resuming with the original ad count of {job.count}')
+			count = job.count
+			done = len([record for record in job.ads().values() if record.completed])
+			print(f'♻️ Resuming run #{job.id} for {url}: {done}/{count} ads already generated')
+		else:
+			if resume:
+				print(f'ℹ️ No unfinished {mode} run for {url}, starting a new one')
+			job = await store.start_run(url, mode, count)
+	elif count == 1:
+		return await create_ad_from_landing_page(url, debug, mode, 1, analyzer, variants)
+
+	page_data = job.page_data() if job else None
+	if page_data is None:
+		print(f'🚀 Analyzing {url} for {count} {mode} ads...')
+		analyzer = analyzer or LandingPageAnalyzer(debug=debug)
+		page_data = await analyzer.analyze_landing_page(url, mode=mode)
+		if job:
+			await job.save_analysis(page_data)
 
-	print(f'🚀 Analyzing {url} for {count} {mode} ads...')
+	print(f'🎯 Generating {count} {mode} ads in parallel...')
 
-	analyzer = LandingPageAnalyzer(debug=debug)
-	page_data = await analyzer.analyze_landing_page(url, mode=mode)
+	# One generator (and so one genai client) is shared by every ad task
+	generator = AdGenerator(mode=mode, variants=variants)
 
-	print(f'🎯 Generating {count} {mode} ads in parallel...')
+	# One structured call yields all the distinct concepts instead of one call per ad
+	concepts = job.concepts() if job and mode == 'tiktok' else None
+	if concepts is None:
+		with tracing.context(url=url):
+			concepts = await generator.create_video_concepts(page_data['analysis'], count) if mode == 'tiktok' else [None] * count
+		if job and mode == 'tiktok':
+			await job.save_concepts(concepts)
 
-	tasks = []
-	for i in range(count):
-		task = asyncio.create_task(generate_single_ad(page_data, mode, i + 1))
-		tasks.append(task)
+	if stream:
+		successful, failed = await stream_ads(page_data, mode, count, generator, concepts, job, max_in_flight, max_buffered)
+	else:
+		tasks = []
+		for i in range(count):
+			task = asyncio.create_task(generate_single_ad(page_data, mode, i + 1, generator, concepts[i], job))
+			tasks.append(task)
 
-	results = await asyncio.gather(*tasks, return_exceptions=True)
+		results = await asyncio.gather(*tasks, return_exceptions=True)
 
-	successful = []
-	failed = []
+		successful = []
+		failed = []
 
-	for i, result in enumerate(results):
-		if isinstance(result, Exception):
-			failed.append(i + 1)
-		else:
-			successful.append(result)
+		for i, result in enumerate(results):
+			if isinstance(result, Exception):
+				failed.append(i + 1)
+			else:
+				successful.append(result)
 
 	print(f'\n✅ Successfully generated {len(successful)}/{count} ads')
 	if failed:
 		print(f'❌ Failed ads: {failed}')
+	if job and await job.finish() != 'done':
+		print(f'💾 Run #{job.id} is recorded in {store.path}, rerun with --resume to retry the failed ads')
+	if mode == 'instagram':
+		print(generator.image_stats_summary())
+		if variants is not None:
+			await variants.join()
+			print(variants.stats.summary())
+	print(generator.gateway.summary())
+	print(accounting.get_ledger().summary())
 
 	if page_data.get('screenshot_path'):
 		print(f'📸 Page screenshot: {page_data["screenshot_path"]}')
 
-	for ad_path in successful:
-		open_file(ad_path)
+	if not stream:
+		for ad_path in successful:
+			open_file(ad_path)
 
 	return successful
 
 
-if __name__ == '__main__':
-	url = args.url
-	if not url:
-		url = input('🔗 Enter URL: ').strip() or 'https://www.apple.com/iphone-17-pro/'
+async def create_ads_for_urls(
+	urls_source: str,
+	debug: bool = False,
+	mode: str = 'instagram',
+	count: int = 1,
+	analysis_concurrency: int = 2,
+	generation_concurrency: int = 8,
+	browser_max_uses: int = 20,
+	browser_max_memory_mb: float | None = None,
+	analyzer: LandingPageAnalyzer | None = None,
+	variants: VariantPipeline | None = None,
+) -> BatchStats:
+	"""Batch mode: analyze every URL from urls_source and generate count ads for each, pipelining the two stages"""
+	# Up to one warm browser per concurrent analysis, launched by the first analysis that needs the agent:
+	# URLs served from the cache or the HTML fast path never start Chromium
+	pool = create_browser_pool(debug, size=analysis_concurrency, max_uses=browser_max_uses, max_memory_mb=browser_max_memory_mb)
+	analyzer = analyzer or LandingPageAnalyzer(debug=debug)
+	analyzer.pool = pool
+	generator = AdGenerator(mode=mode, variants=variants)
+
+	async def analyze(url: str) -> dict:
+		print(f'🚀 Analyzing {url}...')
+		with tracing.context(url=url):
+			page_data = await analyzer.analyze_landing_page(url, mode=mode)
+			if mode == 'tiktok':
+				page_data['video_concepts'] = await generator.create_video_concepts(page_data['analysis'], count)
+		return page_data
+
+	async def generate(page_data: dict, ad_id: int) -> str:
+		concepts = page_data.get('video_concepts')
+		return await generate_single_ad(page_data, mode, ad_id, generator, concepts[ad_id - 1] if concepts else None)
+
+	pipeline = BatchPipeline(
+		analyze,
+		generate,
+		ads_per_url=count,
+		analysis_concurrency=analysis_concurrency,
+		generation_concurrency=generation_concurrency,
+	)
+	try:
+		stats = await pipeline.run(read_urls(urls_source))
+	finally:
+		await pool.close()
+	print('\n' + stats.summary())
+	if mode == 'instagram':
+		print(generator.image_stats_summary())
+		if variants is not None:
+			await variants.join()
+			print(variants.stats.summary())
+	print(generator.gateway.summary())
+	print(accounting.get_ledger().summary())
+	return stats
+
+
+def ad_job_runner(analyzer: LandingPageAnalyzer, variants: VariantPipeline | None = None) -> Callable[[Job], Awaitable[None]]:
+	"""An AdService runner: analyze the job's URL and generate its ads, reporting progress on the job"""
+	# Created once and reused by every job; both share the process-wide client and gateway
+	generators = {mode: AdGenerator(mode=mode, variants=variants) for mode in ('instagram', 'tiktok')}
+
+	async def run_job(job: Job):
+		# Each job spends against its own budget; its usage is rolled up into the process-wide ledger when it ends
+		process_ledger = accounting.get_ledger()
+		with accounting.scoped(process_ledger.child()) as ledger:
+			try:
+				await run_ads(job)
+			finally:
+				process_ledger.absorb(ledger)
+				job.emit('usage', requests=ledger.total.requests, tokens=ledger.total.tokens, cost=round(ledger.total.cost, 4))
+
+	async def run_ads(job: Job):
+		generator = generators[job.mode]
+		job.emit('analyzing', url=job.url)
+		with tracing.context(url=job.url):
+			page_data = await analyzer.analyze_landing_page(job.url, mode=job.mode)
+			job.emit('analyzed', source=page_data.get('source'))
+			concepts = await generator.create_video_concepts(page_data['analysis'], job.count) if job.mode == 'tiktok' else [None] * job.count
+
+		async def generate(ad_id: int):
+			try:
+				path = await generate_single_ad(page_data, job.mode, ad_id, generator, concepts[ad_id - 1])
+			except Exception as e:
+				job.errors.append(f'ad #{ad_id}: {e}')
+				job.emit('ad_failed', ad_id=ad_id, error=str(e))
+				return
+			job.results.append(path)
+			job.emit('ad_done', ad_id=ad_id, path=path, done=len(job.results), count=job.count)
+
+		await asyncio.gather(*(generate(ad_id) for ad_id in range(1, job.count + 1)))
+
+	return run_job
+
+
+async def serve_ads(
+	host: str = '127.0.0.1',
+	port: int = 8080,
+	debug: bool = False,
+	workers: int = 2,
+	queue_size: int = 32,
+	analysis_concurrency: int = 2,
+	browser_max_uses: int = 20,
+	browser_max_memory_mb: float | None = None,
+	analyzer: LandingPageAnalyzer | None = None,
+	variants: VariantPipeline | None = None,
+):
+	"""Service mode: take ad jobs over HTTP with the genai client, generators and browsers kept warm between them"""
+	# Browsers are launched on the first job whose page needs the agent, then kept warm for the next ones
+	pool = create_browser_pool(debug, size=analysis_concurrency, max_uses=browser_max_uses, max_memory_mb=browser_max_memory_mb)
+	analyzer = analyzer or LandingPageAnalyzer(debug=debug)
+	analyzer.pool = pool
+	service = AdService(ad_job_runner(analyzer, variants), workers=workers, queue_size=queue_size)
+	try:
+		await service.serve(host, port)
+	finally:
+		await pool.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+	parser = argparse.ArgumentParser(description='Generate ads from landing pages using browser-use + 🍌')
+	parser.add_argument('--url', nargs='?', help='Landing page URL to analyze')
+	parser.add_argument('--debug', action='store_true', default=False, help='Enable debug mode (show browser, verbose logs)')
+	parser.add_argument('--count', type=int, default=1, help='Number of ads to generate in parallel (default: 1)')
+	parser.add_argument('--urls-file', help='Batch mode: file with one landing page URL per line, or - for stdin (--count ads per URL)')
+	parser.add_argument('--analysis-concurrency', type=int, default=2, help='Batch mode: landing pages analyzed at once (default: 2)')
+	parser.add_argument('--generation-concurrency', type=int, default=8, help='Batch mode: ads generated at once (default: 8)')
+	parser.add_argument('--browser-max-uses', type=int, default=20, help='Batch mode: recycle a pooled browser after this many analyses (default: 20)')
+	parser.add_argument('--no-cache', action='store_true', default=False, help='Bypass the landing page analysis cache entirely')
+	parser.add_argument('--refresh-cache', action='store_true', default=False, help='Re-analyze landing pages and overwrite their cached analysis')
+	parser.add_argument('--cache-ttl', type=float, default=24.0, help='Hours a cached landing page analysis stays valid (default: 24)')
+	parser.add_argument('--cache-max-mb', type=float, default=200.0, help='Size cap of the analysis cache, least recently used entries go first (default: 200)')
+	parser.add_argument('--cache-validate', action='store_true', default=False, help='Check ETag/Last-Modified or an HTML hash before trusting a cached analysis')
+	parser.add_argument('--fast-path-threshold', type=float, default=0.8, help='Skip the browser agent when HTML extraction is at least this complete, 0-1 (default: 0.8)')
+	parser.add_argument('--no-fast-path', action='store_true', default=False, help='Always analyze landing pages with the browser agent')
+	parser.add_argument('--viewport-screenshots', type=int, default=0, help='Also screenshot up to this many viewports from the agent\'s scroll steps (default: 0)')
+	parser.add_argument('--browser-max-memory-mb', type=float, default=None, help='Batch mode: recycle pooled browsers while their total RSS exceeds this')
+	parser.add_argument('--profile', action='store_true', default=False, help='Print p50/p95 latency per stage at the end of the run')
+	parser.add_argument('--trace-file', help='Where to write the run\'s span JSONL (default: output/traces/trace_<timestamp>.jsonl)')
+	parser.add_argument('--otel', action='store_true', default=False, help='Also export spans through OpenTelemetry, if it is installed')
+	parser.add_argument('--resume', action='store_true', default=False, help='Continue the last unfinished run for this URL and mode: reuse its analysis, skip finished ads, keep polling its Veo jobs')
+	parser.add_argument('--job-store', default=str(Path('output') / 'jobs.sqlite3'), help='SQLite file that records every run for --resume (default: output/jobs.sqlite3)')
+	parser.add_argument('--serve', action='store_true', default=False, help='Service mode: keep running and take ad jobs over HTTP (see ad_service.py)')
+	parser.add_argument('--host', default='127.0.0.1', help='Service mode: address to listen on (default: 127.0.0.1)')
+	parser.add_argument('--port', type=int, default=8080, help='Service mode: port to listen on (default: 8080)')
+	parser.add_argument('--workers', type=int, default=2, help='Service mode: jobs worked on at once (default: 2)')
+	parser.add_argument('--queue-size', type=int, default=32, help='Service mode: queued jobs before submissions get 503 (default: 32)')
+	parser.add_argument(
+		'--placements',
+		type=parse_placements,
+		default=DEFAULT_PLACEMENTS,
+		help='Image ads: placement variants to crop every ad into, NAME=WIDTHxHEIGHT,... or none (default: square=1080x1080,portrait=1080x1350,story=1080x1920)',
+	)
+	parser.add_argument('--variant-formats', type=parse_formats, default=DEFAULT_FORMATS, help='Image ads: formats of every variant, from webp, jpeg, png (default: webp,jpeg)')
+	parser.add_argument('--thumbnail-width', type=int, default=270, help='Image ads: width of each placement\'s review thumbnail, 0 for none (default: 270)')
+	parser.add_argument('--variant-workers', type=int, default=None, help='Image ads: processes making variants (default: up to 4, one per CPU)')
+	parser.add_argument('--stream', action='store_true', default=False, help='Save, report and open each ad as soon as it lands, with a live progress line')
+	parser.add_argument('--max-in-flight', type=int, default=8, help='Streaming: ads generated at once (default: 8)')
+	parser.add_argument('--max-buffered', type=int, default=2, help='Streaming: finished ads waiting to be saved before generation pauses (default: 2)')
+	parser.add_argument('--hedge', action='store_true', default=False, help='Image ads: send a duplicate of any image request slower than --hedge-percentile and keep the first answer')
+	parser.add_argument('--hedge-percentile', type=float, default=95.0, help='Hedging: latency percentile of recent image requests after which one is hedged (default: 95)')
+	parser.add_argument('--hedge-budget', type=float, default=10.0, help='Hedging: most extra image requests, as a percentage of all of them (default: 10)')
+	parser.add_argument('--budget', type=float, default=None, help='Stop starting new ads once the run\'s (with --serve, each job\'s) estimated cost would pass this many USD')
+	parser.add_argument('--token-budget', type=int, default=None, help='Stop starting new ads once the run\'s (with --serve, each job\'s) tokens would pass this many')
+	group = parser.add_mutually_exclusive_group()
+	group.add_argument('--instagram', action='store_true', default=False, help='Generate Instagram image ad (default)')
+	group.add_argument('--tiktok', action='store_true', default=False, help='Generate TikTok video ad using Veo3')
+	return parser
+
+
+def main(argv: list[str] | None = None):
+	"""Command line entry point: parse argv (default sys.argv), set up the environment and run the chosen mode"""
+	args = build_parser().parse_args(argv)
+	if not args.instagram and not args.tiktok:
+		args.instagram = True
+	setup_environment(args.debug)
 
 	if args.tiktok:
 		mode = 'tiktok'
 	else:
 		mode = 'instagram'
+	# The service takes both modes; the browser is certain to be needed only when neither the cache nor HTML can stand in for it
+	preload('tiktok' if args.serve else mode, browser=args.serve or (args.no_cache and args.no_fast_path))
+
+	page_cache = None
+	if not args.no_cache:
+		page_cache = PageAnalysisCache(
+			ttl=args.cache_ttl * 3600,
+			max_bytes=int(args.cache_max_mb * 1024 * 1024),
+			validate=args.cache_validate,
+			refresh=args.refresh_cache,
+		)
+	analyzer = LandingPageAnalyzer(
+		debug=args.debug,
+		cache=page_cache,
+		fast_path_threshold=None if args.no_fast_path else args.fast_path_threshold,
+		viewport_screenshots=args.viewport_screenshots,
+	)
+
+	accounting.configure(token_budget=args.token_budget, cost_budget=args.budget)
+	if args.hedge:
+		enable_hedging(args.hedge_percentile / 100, args.hedge_budget / 100)
+
+	variants = None
+	if args.placements and (mode == 'instagram' or args.serve):
+		variants = VariantPipeline(
+			get_output_store(), placements=args.placements, formats=args.variant_formats, thumbnail_width=args.thumbnail_width, workers=args.variant_workers
+		)
+
+	tracer = tracing.configure(
+		args.trace_file or Path('output') / 'traces' / f'trace_{datetime.now().strftime("%Y%m%d_%H%M%S")}.jsonl',
+		otel=args.otel,
+	)
+
+	try:
+		if args.serve:
+			asyncio.run(
+				serve_ads(
+					args.host,
+					args.port,
+					debug=args.debug,
+					workers=args.workers,
+					queue_size=args.queue_size,
+					analysis_concurrency=args.analysis_concurrency,
+					browser_max_uses=args.browser_max_uses,
+					browser_max_memory_mb=args.browser_max_memory_mb,
+					analyzer=analyzer,
+					variants=variants,
+				)
+			)
+		elif args.urls_file:
+			asyncio.run(
+				create_ads_for_urls(
+					args.urls_file,
+					debug=args.debug,
+					mode=mode,
+					count=args.count,
+					analysis_concurrency=args.analysis_concurrency,
+					generation_concurrency=args.generation_concurrency,
+					browser_max_uses=args.browser_max_uses,
+					browser_max_memory_mb=args.browser_max_memory_mb,
+					analyzer=analyzer,
+					variants=variants,
+				)
+			)
+		else:
+			url = args.url
+			if not url:
+				url = input('🔗 Enter URL: ').strip() or 'https://www.apple.com/iphone-17-pro/'
+
+			job_store = JobStore(args.job_store)
+			try:
+				asyncio.run(
+					create_multiple_ads(
+						url,
+						debug=args.debug,
+						mode=mode,
+						count=args.count,
+						analyzer=analyzer,
+						store=job_store,
+						resume=args.resume,
+						variants=variants,
+						stream=args.stream,
+						max_in_flight=args.max_in_flight,
+						max_buffered=args.max_buffered,
+					)
+				)
+			finally:
+				job_store.close()
+	finally:
+		if variants is not None:
+			variants.shutdown()
+		tracer.close()
+		if args.profile:
+			print('\n' + tracer.summary())
+		if tracer.path and tracer.path.exists():
+			print(f'🧭 Trace: {tracer.path}')
+
 
-	asyncio.run(create_multiple_ads(url, debug=args.debug, mode=mode, count=args.count))
\ No newline at end of file
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,263 @@
+"""Long-running ad generation service: a job queue behind a small local HTTP API.
+
+The one-shot CLI pays for its imports, the genai client and browser start-up
+on every run. ``AdService`` keeps one process, and everything its ``runner``
+holds warm (AdGenerator, genai client, pooled browsers), alive across
+requests. Jobs wait in a bounded queue that a fixed number of workers drain.
+When the queue is full a submission gets ``503`` with a ``Retry-After``
+estimated from recent job durations, rather than piling up unbounded work.
+Every job keeps its progress events, which are streamed as Server-Sent Events.
+
+	POST /jobs               {"url": ..., "mode": "instagram" | "tiktok", "count": 1} -> 202
+	GET  /jobs/<id>          status and progress
+	GET  /jobs/<id>/result   200 with the ad paths once finished, 202 while pending
+	GET  /jobs/<id>/events   text/event-stream of progress events until the job finishes
+	GET  /health             queue depth and busy workers
+
+``python ad_generator.py --serve`` runs it with the real pipeline.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import statistics
+import time
+import uuid
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import tracing
+from local_http import Request, read_request, respond
+
+logger = logging.getLogger(__name__)
+
+MODES = ('instagram', 'tiktok')
+TERMINAL = ('done', 'failed')
+
+
+class QueueFull(Exception):
+	def __init__(self, retry_after: int):
+		super().__init__(f'Job queue is full, retry in {retry_after}s')
+		self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+	"""One submitted request; the runner reports progress with ``emit`` and fills ``results``/``errors``"""
+
+	id: str
+	url: str
+	mode: str = 'instagram'
+	count: int = 1
+	status: str = 'queued'
+	created_at: float = field(default_factory=time.time)
+	started_at: float | None = None
+	finished_at: float | None = None
+	results: list[str] = field(default_factory=list)
+	errors: list[str] = field(default_factory=list)
+	events: list[dict] = field(default_factory=list)
+	_updated: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+	def emit(self, event: str, **data):
+		self.events.append({'event': event, 'time': round(time.time(), 3), **data})
+		# Wake every event stream waiting on this job, later waits get a fresh Event
+		updated, self._updated = self._updated, asyncio.Event()
+		updated.set()
+
+	def to_dict(self) -> dict:
+		return {
+			'id': self.id,
+			'url': self.url,
+			'mode': self.mode,
+			'count': self.count,
+			'status': self.status,
+			'created_at': self.created_at,
+			'started_at': self.started_at,
+			'finished_at': self.finished_at,
+			'ads_done': len(self.results),
+			'ads_failed': len(self.errors),
+			'results': self.results,
+			'errors': self.errors,
+		}
+
+
+class AdService:
+	"""Queue ad jobs and work them with ``workers`` concurrent calls of ``runner(job)``"""
+
+	def __init__(
+		self,
+		runner: Callable[[Job], Awaitable[None]],
+		workers: int = 2,
+		queue_size: int = 32,
+		max_count: int = 20,
+		keep_jobs: int = 1000,
+		keepalive: float = 15.0,
+		expected_duration: float = 60.0,
+	):
+		self.runner = runner
+		self.workers = workers
+		self.max_count = max_count
+		self.keep_jobs = keep_jobs
+		self.keepalive = keepalive
+		self.expected_duration = expected_duration
+		self.jobs: OrderedDict[str, Job] = OrderedDict()
+		self.busy = 0
+		self.rejected = 0
+		self.port: int | None = None
+		self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=queue_size)
+		self._durations: deque[float] = deque(maxlen=50)
+		self._workers: list[asyncio.Task] = []
+
+	async def start(self):
+		if not self._workers:
+			self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+	async def close(self):
+		for task in self._workers:
+			task.cancel()
+		await asyncio.gather(*self._workers, return_exceptions=True)
+		self._workers = []
+
+	def retry_after(self) -> int:
+		"""Seconds until a queue slot is likely to free up"""
+		per_job = statistics.median(self._durations) if self._durations else self.expected_duration
+		return max(math.ceil(per_job / max(self.workers, 1)), 1)
+
+	def submit(self, url: str, mode: str = 'instagram', count: int = 1) -> Job:
+		if not isinstance(url, str) or not url.startswith(('http://', 'https://')):
+			raise ValueError('url must be an http(s) URL')
+		if mode not in MODES:
+			raise ValueError(f'mode must be one of {", ".join(MODES)}')
+		# bool is an int, but {"count": true} is a client bug rather than one ad
+		if not isinstance(count, int) or isinstance(count, bool) or not 1 <= count <= self.max_count:
+			raise ValueError(f'count must be between 1 and {self.max_count}')
+
+		job = Job(id=uuid.uuid4().hex[:12], url=url, mode=mode, count=count)
+		try:
+			self._queue.put_nowait(job)
+		except asyncio.QueueFull:
+			self.rejected += 1
+			raise QueueFull(self.retry_after()) from None
+		self.jobs[job.id] = job
+		job.emit('queued', position=self._queue.qsize())
+		self._evict()
+		return job
+
+	def _evict(self):
+		# Forget the oldest finished jobs once over keep_jobs, never a pending one
+		excess = len(self.jobs) - self.keep_jobs
+		for job_id in [job.id for job in self.jobs.values() if job.status in TERMINAL][: max(excess, 0)]:
+			del self.jobs[job_id]
+
+	async def _work(self):
+		while True:
+			job = await self._queue.get()
+			job.status = 'running'
+			job.started_at = time.time()
+			job.emit('started')
+			self.busy += 1
+			try:
+				with tracing.context(job=job.id):
+					await self.runner(job)
+			except Exception as e:
+				logger.warning('Job %s failed: %s', job.id, e)
+				job.errors.append(f'{type(e).__name__}: {e}')
+			finally:
+				self.busy -= 1
+				self._queue.task_done()
+			job.finished_at = time.time()
+			self._durations.append(job.finished_at - job.started_at)
+			job.status = 'done' if job.results else 'failed'
+			job.emit(job.status, results=job.results, errors=job.errors)
+
+	def health(self) -> dict:
+		return {
+			'queued': self._queue.qsize(),
+			'queue_size': self._queue.maxsize,
+			'busy': self.busy,
+			'workers': self.workers,
+			'rejected': self.rejected,
+			'jobs': len(self.jobs),
+		}
+
+	async def listen(self, host: str = '127.0.0.1', port: int = 8080) -> asyncio.AbstractServer:
+		"""Start the workers and the HTTP server; port 0 picks a free port (stored on self.port)"""
+		await self.start()
+		server = await asyncio.start_server(self._handle, host, port)
+		self.port = server.sockets[0].getsockname()[1]
+		return server
+
+	async def serve(self, host: str = '127.0.0.1', port: int = 8080):
+		server = await self.listen(host, port)
+		print(f'🛰️  Ad service listening on http://{host}:{self.port} ({self.workers} workers, queue of {self._queue.maxsize})')
+		try:
+			async with server:
+				await server.serve_forever()
+		finally:
+			await self.close()
+
+	async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+		try:
+			try:
+				request = await read_request(reader)
+			except (ValueError, asyncio.IncompleteReadError) as e:
+				await respond(writer, 400, {'error': str(e) or 'bad request'})
+				return
+			parts = request.parts
+			if request.method == 'GET' and len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'events':
+				await self._stream_events(writer, parts[1])
+			else:
+				await respond(writer, *self._route(request))
+		except ConnectionError:
+			pass
+		finally:
+			writer.close()
+
+	def _route(self, request: Request) -> tuple[int, object, dict]:
+		method, parts = request.method, request.parts
+		if parts == ['health']:
+			return 200, self.health(), {}
+		if parts == ['jobs']:
+			if method != 'POST':
+				return 405, {'error': 'use POST'}, {}
+			try:
+				fields = json.loads(request.body or b'{}')
+				job = self.submit(fields.get('url'), fields.get('mode', 'instagram'), fields.get('count', 1))
+			except QueueFull as e:
+				return 503, {'error': str(e)}, {'Retry-After': str(e.retry_after)}
+			except (ValueError, AttributeError) as e:
+				return 400, {'error': str(e)}, {}
+			return 202, {**job.to_dict(), 'status_url': f'/jobs/{job.id}', 'events_url': f'/jobs/{job.id}/events'}, {}
+
+		if parts[0] != 'jobs' or len(parts) not in (2, 3) or (len(parts) == 3 and parts[2] != 'result'):
+			return 404, {'error': 'not found'}, {}
+		if method != 'GET':
+			return 405, {'error': 'use GET'}, {}
+		job = self.jobs.get(parts[1])
+		if job is None:
+			return 404, {'error': f'no job {parts[1]}'}, {}
+		if len(parts) == 3 and job.status not in TERMINAL:
+			return 202, job.to_dict(), {'Retry-After': str(self.retry_after())}
+		return 200, job.to_dict(), {}
+
+	async def _stream_events(self, writer: asyncio.StreamWriter, job_id: str):
+		job = self.jobs.get(job_id)
+		if job is None:
+			await respond(writer, 404, {'error': f'no job {job_id}'})
+			return
+		writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n')
+		sent = 0
+		while True:
+			updated = job._updated
+			for event in job.events[sent:]:
+				writer.write(f'event: {event["event"]}\ndata: {json.dumps(event)}\n\n'.encode())
+			sent = len(job.events)
+			await writer.drain()
+			if job.status in TERMINAL:
+				return
+			try:
+				await asyncio.wait_for(updated.wait(), self.keepalive)
+			except asyncio.TimeoutError:
+				writer.write(b': keepalive\n\n')
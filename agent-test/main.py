@@ -1,30 +1,60 @@
 from browser_use import Tools, ActionResult, Browser, Agent, ChatGoogle
 from dotenv import load_dotenv
+from pathlib import Path
+import argparse
 import os
-import asyncio  
+import sys
+import asyncio
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from human_input import ConsoleFrontend, FileQueueFrontend, HTTPFrontend, HumanInputBroker
 
 load_dotenv()
 tools = Tools()
+# Questions from every agent go through one broker; see main() for its front ends
+broker = HumanInputBroker()
 
 os.environ["ANONYMIZED_TELEMETRY"] = "false"
 
 print(tools)
 
 @tools.action('Ask human for help with a question')
-def ask_human(question: str, browser: Browser) -> ActionResult:
+async def ask_human(question: str, browser_session: Browser) -> ActionResult:
     print(f"Tool called with question: {question}")
-    answer = input(f'{question} > ')
+    # Only this agent waits for the answer, the others keep running
+    answer = await broker.ask(question, agent=f"agent-{browser_session.id[-4:]}")
     return ActionResult(extracted_content=f'The human responded with: {answer}')
 
-async def main():
-    agent = Agent(
-        llm = ChatGoogle(model="gemini-flash-latest"),
-        task='You must use the ask_human function to ask the user what their favorite color is. Do not complete the task without calling ask_human.',
-        tools=tools,
-    )
+async def main(args):
+    broker.timeout = args.timeout
+    broker.default = args.default
+    broker.frontends = [ConsoleFrontend()]
+    if args.answers_dir:
+        broker.frontends.append(FileQueueFrontend(args.answers_dir))
+    if args.http_port is not None:
+        broker.frontends.append(HTTPFrontend(port=args.http_port))
+
+    agents = [
+        Agent(
+            llm = ChatGoogle(model="gemini-flash-latest"),
+            task='You must use the ask_human function to ask the user what their favorite color is. Do not complete the task without calling ask_human.',
+            tools=tools,
+        )
+        for _ in range(args.agents)
+    ]
 
-    result = await agent.run()
-    print("Final result:", result)
+    async with broker:
+        results = await asyncio.gather(*(agent.run() for agent in agents))
+    for result in results:
+        print("Final result:", result)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Agents that ask a human for help without blocking each other")
+    parser.add_argument("--agents", type=int, default=1, help="Agents to run concurrently (default: 1)")
+    # browser-use gives up on an action after 180s, so the default answer has to come sooner
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for an answer (default: 120)")
+    parser.add_argument("--default", default="I don't know, use your best judgement", help="Answer used when nobody replies in time")
+    parser.add_argument("--answers-dir", help="Also publish questions as files here and read answers from <dir>/answers/<id>.txt")
+    parser.add_argument("--http-port", type=int, help="Also serve GET/POST /questions on this local port")
+    asyncio.run(main(parser.parse_args()))
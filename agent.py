@@ -1,9 +1,18 @@
-from browser_use import Agent, ChatGoogle
+from browser_use import Agent, BrowserSession, ChatGoogle
 from dotenv import load_dotenv
+import argparse
 import asyncio
+from dataclasses import dataclass
 from datetime import datetime
+from pathlib import Path
 import os
+import shutil
 import json
+import time
+
+from accounting import cost_of
+from browser_pool import BrowserSessionPool
+from history_store import HISTORY_DIR, SUFFIX, HistoryWriter, history_files, load_history
 
 load_dotenv()
 
@@ -28,46 +37,77 @@ def create_table_of_contents(sections):
     return toc + "\n"
 
 
-def format_metadata_table(task, history, timestamp):
+@dataclass
+class ReportStats:
+    """Running aggregates of an agent run, updated once per step"""
+
+    steps: int = 0
+    duration: float = 0.0
+    urls: int = 0
+    actions: int = 0
+    errors: int = 0
+    extracts: int = 0
+    # Action results seen, with or without extracted content
+    results: int = 0
+    thoughts: int = 0
+    done: bool = False
+    success: bool | None = None
+    final_result: str | None = None
+    # Token usage of the agent's LLM, known once the run has finished (stored histories do not keep it)
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float | None = None
+
+    def success_label(self, yes="Yes", no="No"):
+        return yes if self.success else no if self.success is False else "Unknown"
+
+
+def format_metadata_table(task, stats, timestamp):
     """Create a beautiful metadata table"""
-    status_emoji = "✅" if history.is_done() else "❌"
-    success_emoji = "🎯" if history.is_successful() else "⚠️"
-    
+    status_emoji = "✅" if stats.done else "❌"
+    success_emoji = "🎯" if stats.success else "⚠️"
+
     table = "| Attribute | Value |\n"
     table += "|-----------|-------|\n"
     table += f"| 📅 **Generated** | {datetime.now().strftime('%B %d, %Y at %I:%M %p')} |\n"
     table += f"| 🎯 **Task** | {task} |\n"
-    table += f"| {status_emoji} **Status** | {'Completed Successfully' if history.is_done() else 'Incomplete'} |\n"
-    table += f"| {success_emoji} **Success** | {'Yes' if history.is_successful() else 'No' if history.is_successful() is False else 'Unknown'} |\n"
-    table += f"| ⏱️ **Duration** | {format_duration(history.total_duration_seconds())} |\n"
-    table += f"| 🔢 **Steps** | {history.number_of_steps()} |\n"
-    table += f"| 🌐 **URLs Visited** | {len(history.urls())} |\n"
-    table += f"| ⚡ **Actions** | {len(history.action_names())} |\n"
-    table += f"| 🚨 **Errors** | {len([e for e in history.errors() if e is not None])} |\n"
-    
+    table += f"| {status_emoji} **Status** | {'Completed Successfully' if stats.done else 'Incomplete'} |\n"
+    table += f"| {success_emoji} **Success** | {stats.success_label()} |\n"
+    table += f"| ⏱️ **Duration** | {format_duration(stats.duration)} |\n"
+    table += f"| 🔢 **Steps** | {stats.steps} |\n"
+    table += f"| 🌐 **URLs Visited** | {stats.urls} |\n"
+    table += f"| ⚡ **Actions** | {stats.actions} |\n"
+    table += f"| 🚨 **Errors** | {stats.errors} |\n"
+
     return table + "\n"
 
 
-async def main():
-    llm = ChatGoogle(model="gemini-flash-latest")
-    task = "summarize latest 3 hackernews articles"
-    agent = Agent(task=task, llm=llm)
-    
-    print("🚀 Starting Hacker News analysis...")
-    start_time = datetime.now()
-    
-    # Run the agent and capture the history
-    history = await agent.run()
-    
-    # Create output directory if it doesn't exist
-    os.makedirs("output", exist_ok=True)
-    
-    # Generate filename with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"output/hn_analysis_{timestamp}.md"
-    
+def write_banner(f):
+    """Beautiful Header with ASCII art"""
+    f.write("```\n")
+    f.write("██╗  ██╗ █████╗  ██████╗██╗  ██╗███████╗██████╗     ███╗   ██╗███████╗██╗    ██╗███████╗\n")
+    f.write("██║  ██║██╔══██╗██╔════╝██║ ██╔╝██╔════╝██╔══██╗    ████╗  ██║██╔════╝██║    ██║██╔════╝\n")
+    f.write("███████║███████║██║     █████╔╝ █████╗  ██████╔╝    ██╔██╗ ██║█████╗  ██║ █╗ ██║███████╗\n")
+    f.write("██╔══██║██╔══██║██║     ██╔═██╗ ██╔══╝  ██╔══██╗    ██║╚██╗██║██╔══╝  ██║███╗██║╚════██║\n")
+    f.write("██║  ██║██║  ██║╚██████╗██║  ██╗███████╗██║  ██║    ██║ ╚████║███████╗╚███╔███╔╝███████║\n")
+    f.write("╚═╝  ╚═╝╚═╝  ╚═╝ ╚═════╝╚═╝  ╚═╝╚══════╝╚═╝  ╚═╝    ╚═╝  ╚═══╝╚══════╝ ╚══╝╚══╝ ╚══════╝\n")
+    f.write("```\n\n")
+
+    f.write("# 🔥 Hacker News AI Analysis Report\n\n")
+    f.write("> *Powered by Google Gemini Flash & Browser Automation*\n\n")
+
+
+class ReportBuilder:
+    """Write the markdown report while the agent runs instead of after it finishes.
+
+    Every finished step is appended to a live log in the report file straight away, so a
+    crash mid-run still leaves a partial report on disk. The per-section entries go to
+    spool files next to it and only running totals stay in memory. finalize() assembles
+    the full report from the spools and atomically replaces the partial one.
+    """
+
     # Define sections for TOC
-    sections = [
+    SECTIONS = [
         {"title": "Executive Summary", "emoji": "📋", "anchor": "executive-summary"},
         {"title": "Analysis Results", "emoji": "🎯", "anchor": "analysis-results"},
         {"title": "Browsing Journey", "emoji": "🗺️", "anchor": "browsing-journey"},
@@ -76,141 +116,412 @@ async def main():
         {"title": "Agent Intelligence", "emoji": "🧠", "anchor": "agent-intelligence"},
         {"title": "Technical Details", "emoji": "🔧", "anchor": "technical-details"}
     ]
-    
-    # Save comprehensive analysis to markdown file
-    with open(filename, "w", encoding="utf-8") as f:
-        # Beautiful Header with ASCII art
-        f.write("```\n")
-        f.write("██╗  ██╗ █████╗  ██████╗██╗  ██╗███████╗██████╗     ███╗   ██╗███████╗██╗    ██╗███████╗\n")
-        f.write("██║  ██║██╔══██╗██╔════╝██║ ██╔╝██╔════╝██╔══██╗    ████╗  ██║██╔════╝██║    ██║██╔════╝\n")
-        f.write("███████║███████║██║     █████╔╝ █████╗  ██████╔╝    ██╔██╗ ██║█████╗  ██║ █╗ ██║███████╗\n")
-        f.write("██╔══██║██╔══██║██║     ██╔═██╗ ██╔══╝  ██╔══██╗    ██║╚██╗██║██╔══╝  ██║███╗██║╚════██║\n")
-        f.write("██║  ██║██║  ██║╚██████╗██║  ██╗███████╗██║  ██║    ██║ ╚████║███████╗╚███╔███╔╝███████║\n")
-        f.write("╚═╝  ╚═╝╚═╝  ╚═╝ ╚═════╝╚═╝  ╚═╝╚══════╝╚═╝  ╚═╝    ╚═╝  ╚═══╝╚══════╝ ╚══╝╚══╝ ╚══════╝\n")
-        f.write("```\n\n")
-        
-        f.write("# 🔥 Hacker News AI Analysis Report\n\n")
-        f.write("> *Powered by Google Gemini Flash & Browser Automation*\n\n")
-        
-        # Table of Contents
-        f.write(create_table_of_contents(sections))
-        
-        # Metadata Table
-        f.write("## 📊 Report Overview\n\n")
-        f.write(format_metadata_table(task, history, timestamp))
-        
-        # Executive Summary
-        f.write("## 📋 Executive Summary {#executive-summary}\n\n")
-        final_result = history.final_result()
-        if final_result:
-            f.write(f"> **Key Findings:** {final_result}\n\n")
-        else:
-            f.write("> ⚠️ **No final result available** - The analysis may have been interrupted or incomplete.\n\n")
-        
-        # Analysis Results (Main Content)
-        f.write("## 🎯 Analysis Results {#analysis-results}\n\n")
-        if final_result:
-            # Try to format the result nicely
-            lines = str(final_result).split('\n')
-            for line in lines:
-                if line.strip():
-                    if line.startswith('1.') or line.startswith('2.') or line.startswith('3.'):
-                        f.write(f"### {line}\n\n")
-                    else:
-                        f.write(f"{line}\n\n")
-        else:
-            f.write("*Analysis results not available.*\n\n")
-        
-        # Browsing Journey
-        urls = history.urls()
-        if urls:
-            f.write("## 🗺️ Browsing Journey {#browsing-journey}\n\n")
-            f.write("The AI agent visited the following websites during its analysis:\n\n")
-            for i, url in enumerate(urls, 1):
-                f.write(f"**{i}.** [{url}]({url})\n")
+    SPOOLS = ["journey", "actions", "content", "thoughts", "errors"]
+
+    def __init__(self, task, filename, timestamp):
+        self.task = task
+        self.path = Path(filename)
+        self.timestamp = timestamp
+        self.stats = ReportStats()
+        self._seen = 0
+        self._spool_dir = self.path.parent / f".{self.path.stem}.parts"
+        self._spool_dir.mkdir(parents=True, exist_ok=True)
+        self._spools = {name: open(self._spool_dir / f"{name}.md", "w+", encoding="utf-8") for name in self.SPOOLS}
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            write_banner(f)
+            f.write(f"> ⏳ **In progress** - task: {task}. Steps are appended below as the agent completes them.\n\n")
+            f.write("## 🔴 Live Step Log\n\n")
+
+    async def on_step_end(self, agent):
+        """Agent hook: record every history item added since the last call"""
+        self.collect(agent.history)
+
+    def collect(self, history):
+        for item in history.history[self._seen:]:
+            self.add_step(item)
+        self._seen = len(history.history)
+        usage = getattr(history, "usage", None)
+        if usage is not None:
+            self.stats.input_tokens = usage.total_prompt_tokens
+            self.stats.output_tokens = usage.total_completion_tokens
+            # browser_use only prices calls when asked to, otherwise fall back to our price table
+            self.stats.cost = usage.total_cost or sum(
+                cost_of(model, stats.prompt_tokens, stats.completion_tokens) for model, stats in usage.by_model.items()
+            )
+
+    def add_step(self, item):
+        stats = self.stats
+        stats.steps += 1
+        step = stats.steps
+        if item.metadata:
+            stats.duration += item.metadata.duration_seconds
+
+        url = item.state.url if item.state else None
+        if url is not None:
+            stats.urls += 1
+            self._spools["journey"].write(f"**{stats.urls}.** [{url}]({url})\n")
+
+        actions = []
+        for action in item.model_output.action if item.model_output else []:
+            names = list(action.model_dump(exclude_none=True, mode="json").keys())
+            if names:
+                actions.append(names[0])
+                stats.actions += 1
+                self._spools["actions"].write(f"| {stats.actions} | `{names[0]}` | Automated browser action |\n")
+
+        stats.results += len(item.result)
+        extracts = [r.extracted_content for r in item.result if r.extracted_content]
+        for content in extracts:
+            stats.extracts += 1
+            self._spools["content"].write(f"### 📝 Extract {stats.extracts}\n\n")
+            self._spools["content"].write("```text\n")
+            self._spools["content"].write(str(content)[:1000])  # Limit to first 1000 chars
+            if len(str(content)) > 1000:
+                self._spools["content"].write("\n... [truncated for readability]")
+            self._spools["content"].write("\n```\n\n")
+
+        thought = item.model_output.current_state if item.model_output else None
+        if thought is not None:
+            stats.thoughts += 1
+            self._spools["thoughts"].write(f"### 💭 Thought Process {stats.thoughts}\n\n")
+            self._spools["thoughts"].write("```markdown\n")
+            self._spools["thoughts"].write(str(thought)[:800])  # Limit reasoning length
+            if len(str(thought)) > 800:
+                self._spools["thoughts"].write("\n... [truncated]")
+            self._spools["thoughts"].write("\n```\n\n")
+
+        # each step can have only one error
+        error = next((r.error for r in item.result if r.error), None)
+        if error:
+            stats.errors += 1
+            self._spools["errors"].write(f"**Error {step}:**\n```\n{error}\n```\n\n")
+
+        if item.result:
+            last = item.result[-1]
+            stats.done = last.is_done is True
+            stats.success = last.success if stats.done else None
+            stats.final_result = last.extracted_content or None
+
+        # Live log entry, flushed so the partial report on disk is always current
+        with open(self.path, "a", encoding="utf-8") as f:
+            duration = format_duration(item.metadata.duration_seconds) if item.metadata else "?"
+            f.write(f"### Step {step} ({duration})\n\n")
+            if url:
+                f.write(f"- 🌐 [{url}]({url})\n")
+            if actions:
+                f.write(f"- ⚡ {', '.join(f'`{a}`' for a in actions)}\n")
+            if thought is not None and thought.next_goal:
+                f.write(f"- 🧠 {thought.next_goal[:300]}\n")
+            for content in extracts:
+                f.write(f"- 📝 {str(content)[:300]}{'...' if len(str(content)) > 300 else ''}\n")
+            if error:
+                f.write(f"- 🚨 {str(error)[:300]}\n")
             f.write("\n")
-        
-        # Actions Timeline
-        actions = history.action_names()
-        if actions:
-            f.write("## ⚡ Actions Timeline {#actions-timeline}\n\n")
-            f.write("| Step | Action | Description |\n")
-            f.write("|------|--------|-------------|\n")
-            for i, action in enumerate(actions, 1):
-                f.write(f"| {i} | `{action}` | Automated browser action |\n")
+
+    def _copy_spool(self, name, f):
+        spool = self._spools[name]
+        spool.flush()
+        spool.seek(0)
+        shutil.copyfileobj(spool, f)
+
+    def finalize(self):
+        """Assemble the complete report and swap it in for the partial one"""
+        stats = self.stats
+        partial = self.path.with_name(f".{self.path.name}.tmp")
+
+        # Save comprehensive analysis to markdown file
+        with open(partial, "w", encoding="utf-8") as f:
+            write_banner(f)
+
+            # Table of Contents
+            f.write(create_table_of_contents(self.SECTIONS))
+
+            # Metadata Table
+            f.write("## 📊 Report Overview\n\n")
+            f.write(format_metadata_table(self.task, stats, self.timestamp))
+
+            # Executive Summary
+            f.write("## 📋 Executive Summary {#executive-summary}\n\n")
+            final_result = stats.final_result
+            if final_result:
+                f.write(f"> **Key Findings:** {final_result}\n\n")
+            else:
+                f.write("> ⚠️ **No final result available** - The analysis may have been interrupted or incomplete.\n\n")
+
+            # Analysis Results (Main Content)
+            f.write("## 🎯 Analysis Results {#analysis-results}\n\n")
+            if final_result:
+                # Try to format the result nicely
+                lines = str(final_result).split('\n')
+                for line in lines:
+                    if line.strip():
+                        if line.startswith('1.') or line.startswith('2.') or line.startswith('3.'):
+                            f.write(f"### {line}\n\n")
+                        else:
+                            f.write(f"{line}\n\n")
+            else:
+                f.write("*Analysis results not available.*\n\n")
+
+            # Browsing Journey
+            if stats.urls:
+                f.write("## 🗺️ Browsing Journey {#browsing-journey}\n\n")
+                f.write("The AI agent visited the following websites during its analysis:\n\n")
+                self._copy_spool("journey", f)
+                f.write("\n")
+
+            # Actions Timeline
+            if stats.actions:
+                f.write("## ⚡ Actions Timeline {#actions-timeline}\n\n")
+                f.write("| Step | Action | Description |\n")
+                f.write("|------|--------|-------------|\n")
+                self._copy_spool("actions", f)
+                f.write("\n")
+
+            # Content Discovery
+            if stats.extracts:
+                f.write("## 📄 Content Discovery {#content-discovery}\n\n")
+                f.write("Raw content extracted during the browsing session:\n\n")
+                self._copy_spool("content", f)
+
+            # Agent Intelligence (Reasoning)
+            if stats.thoughts:
+                f.write("## 🧠 Agent Intelligence {#agent-intelligence}\n\n")
+                f.write("The AI's reasoning process and decision-making:\n\n")
+                self._copy_spool("thoughts", f)
+
+            # Technical Details
+            f.write("## 🔧 Technical Details {#technical-details}\n\n")
+
+            # Errors section
+            if stats.errors > 0:
+                f.write("### 🚨 Errors Encountered\n\n")
+                f.write(f"**Total Errors:** {stats.errors}\n\n")
+                self._copy_spool("errors", f)
+            else:
+                f.write("### ✅ Error Status\n\n")
+                f.write("🎉 **No errors encountered!** The analysis completed successfully.\n\n")
+
+            # Performance metrics
+            f.write("### 📈 Performance Metrics\n\n")
+            f.write("| Metric | Value |\n")
+            f.write("|--------|-------|\n")
+            f.write(f"| Total Execution Time | {format_duration(stats.duration)} |\n")
+            f.write(f"| Average Time per Step | {format_duration(stats.duration / max(stats.steps, 1))} |\n")
+            f.write(f"| Success Rate | {stats.success_label('100%', '0%')} |\n")
+            f.write(f"| Content Extraction Rate | {stats.extracts}/{stats.results} |\n")
+            if stats.cost is not None:
+                f.write(f"| Input Tokens | {stats.input_tokens:,} |\n")
+                f.write(f"| Output Tokens | {stats.output_tokens:,} |\n")
+                f.write(f"| Tokens per Step | {(stats.input_tokens + stats.output_tokens) / max(stats.steps, 1):,.0f} |\n")
+                f.write(f"| Estimated Cost | ${stats.cost:.4f} |\n")
             f.write("\n")
-        
-        # Content Discovery
-        content = history.extracted_content()
-        if content and any(item for item in content if item):
-            f.write("## 📄 Content Discovery {#content-discovery}\n\n")
-            f.write("Raw content extracted during the browsing session:\n\n")
-            for i, item in enumerate(content, 1):
-                if item and str(item).strip():
-                    f.write(f"### 📝 Extract {i}\n\n")
-                    f.write("```text\n")
-                    f.write(str(item)[:1000])  # Limit to first 1000 chars
-                    if len(str(item)) > 1000:
-                        f.write("\n... [truncated for readability]")
-                    f.write("\n```\n\n")
-        
-        # Agent Intelligence (Reasoning)
-        thoughts = history.model_thoughts()
-        if thoughts:
-            f.write("## 🧠 Agent Intelligence {#agent-intelligence}\n\n")
-            f.write("The AI's reasoning process and decision-making:\n\n")
-            for i, thought in enumerate(thoughts, 1):
-                f.write(f"### 💭 Thought Process {i}\n\n")
-                f.write("```markdown\n")
-                f.write(str(thought)[:800])  # Limit reasoning length
-                if len(str(thought)) > 800:
-                    f.write("\n... [truncated]")
-                f.write("\n```\n\n")
-        
-        # Technical Details
-        f.write("## 🔧 Technical Details {#technical-details}\n\n")
-        
-        # Errors section
-        errors = history.errors()
-        error_count = len([e for e in errors if e is not None])
-        if error_count > 0:
-            f.write("### 🚨 Errors Encountered\n\n")
-            f.write(f"**Total Errors:** {error_count}\n\n")
-            for i, error in enumerate(errors, 1):
-                if error:
-                    f.write(f"**Error {i}:**\n```\n{error}\n```\n\n")
-        else:
-            f.write("### ✅ Error Status\n\n")
-            f.write("🎉 **No errors encountered!** The analysis completed successfully.\n\n")
-        
-        # Performance metrics
-        f.write("### 📈 Performance Metrics\n\n")
-        f.write("| Metric | Value |\n")
-        f.write("|--------|-------|\n")
-        f.write(f"| Total Execution Time | {format_duration(history.total_duration_seconds())} |\n")
-        f.write(f"| Average Time per Step | {format_duration(history.total_duration_seconds() / max(history.number_of_steps(), 1))} |\n")
-        f.write(f"| Success Rate | {('100%' if history.is_successful() else '0%' if history.is_successful() is False else 'Unknown')} |\n")
-        f.write(f"| Content Extraction Rate | {len([c for c in content if c]) if content else 0}/{len(content) if content else 0} |\n\n")
-        
-        # Footer
-        f.write("---\n\n")
-        f.write("*Report generated by Gemini Computer Use Agent*  \n")
-        f.write(f"*Timestamp: {datetime.now().isoformat()}*  \n")
-        f.write("*🤖 Powered by AI automation*\n")
-    
+
+            # Footer
+            f.write("---\n\n")
+            f.write("*Report generated by Gemini Computer Use Agent*  \n")
+            f.write(f"*Timestamp: {datetime.now().isoformat()}*  \n")
+            f.write("*🤖 Powered by AI automation*\n")
+
+        os.replace(partial, self.path)
+        self.close()
+
+    def close(self):
+        for spool in self._spools.values():
+            spool.close()
+        shutil.rmtree(self._spool_dir, ignore_errors=True)
+
+
+async def run_task(task, llm, filename, timestamp, browser_session=None):
+    """Run one agent task with its report streamed to filename; returns its row for the run index"""
+    options = {"browser_session": browser_session} if browser_session is not None else {}
+    agent = Agent(task=task, llm=llm, **options)
+    report = ReportBuilder(task, filename, timestamp)
+    # The history is kept alongside, so the report can be rebuilt later with `agent.py render`
+    stored = HistoryWriter(HISTORY_DIR / f"{Path(filename).stem}{SUFFIX}", task, timestamp, report=filename)
+
+    async def on_step_end(agent):
+        report.collect(agent.history)
+        stored.collect(agent.history)
+
+    started = time.perf_counter()
+    error = None
+    try:
+        history = await agent.run(on_step_end=on_step_end)
+        report.collect(history)
+        stored.collect(history)
+    except Exception as e:
+        error = e
+    finally:
+        stored.close()
+        report.finalize()
+    return {
+        "task": task,
+        "report": filename,
+        "duration": time.perf_counter() - started,
+        "steps": report.stats.steps,
+        "urls": report.stats.urls,
+        "success": report.stats.success,
+        "error": error,
+    }
+
+
+def render_report(path, out_dir):
+    """Rebuild the markdown report of a stored run without re-running the agent"""
+    header, steps = load_history(path)
+    name = Path(header.get("report") or Path(path).name.removesuffix(SUFFIX) + ".md").name
+    report = ReportBuilder(header.get("task", ""), Path(out_dir) / name, header.get("timestamp", ""))
+    try:
+        for item in steps:
+            report.add_step(item)
+    finally:
+        report.finalize()
+    return report.path, report.stats
+
+
+def render(paths, out_dir):
+    """Re-render every stored history in paths (files or directories) into out_dir"""
+    files = history_files(paths)
+    if not files:
+        print(f"⚠️  No stored histories (*{SUFFIX}) found in {', '.join(map(str, paths))}")
+        return
+    os.makedirs(out_dir, exist_ok=True)
+    print(f"🖨️  Rendering {len(files)} report(s) into {out_dir}/")
+    started = time.perf_counter()
+    for path in files:
+        step_started = time.perf_counter()
+        try:
+            filename, stats = render_report(path, out_dir)
+        except Exception as e:
+            print(f"❌ {path}: {type(e).__name__}: {e}")
+            continue
+        print(f"✅ {filename} ({stats.steps} steps) in {(time.perf_counter() - step_started) * 1000:.1f}ms")
+    print(f"⏱️  Rendered in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+
+def read_tasks(path):
+    """One task per line; blank lines and # comments are skipped"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith("#")]
+
+
+def write_index(rows, filename, wall_time, concurrency):
+    """Combined index of a multi-task run: one row per task with a link to its report"""
+    succeeded = len([row for row in rows if row["success"]])
+    task_time = sum(row["duration"] for row in rows)
+
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("# 🗂️ Research Run Index\n\n")
+        f.write("| Attribute | Value |\n")
+        f.write("|-----------|-------|\n")
+        f.write(f"| 📅 **Generated** | {datetime.now().strftime('%B %d, %Y at %I:%M %p')} |\n")
+        f.write(f"| 🧮 **Tasks** | {len(rows)} ({succeeded} successful) |\n")
+        f.write(f"| 🔀 **Concurrency** | {concurrency} |\n")
+        f.write(f"| ⏱️ **Wall Time** | {format_duration(wall_time)} |\n")
+        f.write(f"| ∑ **Task Time** | {format_duration(task_time)} |\n")
+        f.write(f"| 🐢 **Slowest Task** | {format_duration(max((row['duration'] for row in rows), default=0))} |\n\n")
+
+        f.write("| # | Task | Status | Duration | Steps | URLs | Report |\n")
+        f.write("|---|------|--------|----------|-------|------|--------|\n")
+        for i, row in enumerate(rows, 1):
+            if row["error"] is not None:
+                status = f"💥 {type(row['error']).__name__}"
+            else:
+                status = "✅ Success" if row["success"] else "⚠️ Completed with issues"
+            report = os.path.basename(row["report"])
+            task = row["task"].replace("|", "\\|")
+            f.write(f"| {i} | {task} | {status} | {format_duration(row['duration'])} | {row['steps']} | {row['urls']} | [{report}]({report}) |\n")
+
+
+async def run_tasks(tasks, concurrency=4, browser_max_uses=20):
+    """Run every task concurrently, at most concurrency at once, sharing warm browsers and one LLM client"""
+    llm = ChatGoogle(model="gemini-flash-latest")
+    # One pooled browser per concurrent agent, reused (and scrubbed) from task to task
+    pool = BrowserSessionPool(lambda: BrowserSession(keep_alive=True), size=concurrency, max_uses=browser_max_uses)
+
+    os.makedirs("output", exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    print(f"🚀 Running {len(tasks)} research tasks, {concurrency} at a time...")
+    start_time = time.perf_counter()
+
+    async def run_one(i, task):
+        filename = f"output/research_{timestamp}_{i:02d}.md"
+        try:
+            async with pool.session() as browser_session:
+                row = await run_task(task, llm, filename, timestamp, browser_session)
+        except Exception as e:
+            # The pool could not provide a browser, so the task never started
+            row = {"task": task, "report": filename, "duration": 0.0, "steps": 0, "urls": 0, "success": None, "error": e}
+        status = "✅" if row["success"] else "❌" if row["error"] is not None else "⚠️"
+        print(f"{status} Task {i}/{len(tasks)} finished in {format_duration(row['duration'])}: {task}")
+        return row
+
+    await pool.start()
+    try:
+        rows = await asyncio.gather(*(run_one(i, task) for i, task in enumerate(tasks, 1)))
+    finally:
+        await pool.close()
+    wall_time = time.perf_counter() - start_time
+
+    index = f"output/research_index_{timestamp}.md"
+    write_index(rows, index, wall_time, concurrency)
+
+    print("\n" + "="*60)
+    print("🎉 RESEARCH RUN COMPLETE!")
+    print("="*60)
+    print(f"🗂️  Index saved: {index}")
+    print(f"⏱️  Wall time: {format_duration(wall_time)} (sum of tasks: {format_duration(sum(row['duration'] for row in rows))})")
+    print(f"✅ Successful: {len([row for row in rows if row['success']])}/{len(rows)}")
+    print("="*60)
+    return rows
+
+
+async def main():
+    llm = ChatGoogle(model="gemini-flash-latest")
+    task = "summarize latest 3 hackernews articles"
+
+    print("🚀 Starting Hacker News analysis...")
+    start_time = datetime.now()
+
+    # Create output directory if it doesn't exist
+    os.makedirs("output", exist_ok=True)
+
+    # Generate filename with timestamp
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"output/hn_analysis_{timestamp}.md"
+
+    # The report is written step by step as the agent runs and completed once it stops
+    row = await run_task(task, llm, filename, timestamp)
+    if row["error"] is not None:
+        raise row["error"]
+
     # Beautiful console output
     end_time = datetime.now()
     duration = (end_time - start_time).total_seconds()
-    
+
     print("\n" + "="*60)
     print("🎉 ANALYSIS COMPLETE!")
     print("="*60)
     print(f"📁 Report saved: {filename}")
     print(f"⏱️  Total time: {format_duration(duration)}")
-    print(f"📊 Agent steps: {history.number_of_steps()}")
-    print(f"🌐 URLs visited: {len(history.urls())}")
-    print(f"✅ Status: {'Success' if history.is_successful() else 'Completed with issues'}")
+    print(f"📊 Agent steps: {row['steps']}")
+    print(f"🌐 URLs visited: {row['urls']}")
+    print(f"✅ Status: {'Success' if row['success'] else 'Completed with issues'}")
     print("="*60)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run browser research agents and write markdown reports")
+    parser.add_argument("command", nargs="?", choices=["run", "render"], default="run", help="run the agent (default), or render reports from stored history")
+    parser.add_argument("paths", nargs="*", help=f"render: history files or directories (default: {HISTORY_DIR})")
+    parser.add_argument("--out-dir", default="output/rendered", help="render: directory for the rebuilt reports (default: output/rendered)")
+    parser.add_argument("--tasks-file", help="File with one research task per line (# comments allowed), run concurrently")
+    parser.add_argument("--concurrency", type=int, default=4, help="Agents and pooled browsers running at once (default: 4)")
+    parser.add_argument("--browser-max-uses", type=int, default=20, help="Recycle a pooled browser after this many tasks (default: 20)")
+    args = parser.parse_args()
+
+    if args.command == "render":
+        render(args.paths or [HISTORY_DIR], args.out_dir)
+    elif args.tasks_file:
+        asyncio.run(run_tasks(read_tasks(args.tasks_file), args.concurrency, args.browser_max_uses))
+    else:
+        asyncio.run(main())
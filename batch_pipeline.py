@@ -0,0 +1,129 @@
+"""Two-stage batch pipeline: landing-page analysis feeding ad generation.
+
+URLs flow through bounded queues into a pool of analysis workers. Every analysed
+page fans out into one generation item per ad, which a separate pool of
+generation workers consumes. Both stages have their own concurrency limit, so
+URL k+1 is being analysed while URL k's ads are still rendering, and the bounded
+queues keep a fast stage from running arbitrarily far ahead of a slow one.
+"""
+
+import asyncio
+import sys
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+_DONE = object()
+
+
+@dataclass
+class BatchStats:
+	urls_total: int = 0
+	urls_analyzed: int = 0
+	urls_failed: list[str] = field(default_factory=list)
+	ads_ok: int = 0
+	ads_failed: list[tuple[str, int]] = field(default_factory=list)
+	results: list[tuple[str, int, Any]] = field(default_factory=list)
+	started_at: float = field(default_factory=time.perf_counter)
+	finished_at: float | None = None
+
+	@property
+	def elapsed(self) -> float:
+		end = self.finished_at if self.finished_at is not None else time.perf_counter()
+		return end - self.started_at
+
+	def summary(self) -> str:
+		minutes = max(self.elapsed, 1e-9) / 60
+		lines = [
+			f'📦 Batch finished in {self.elapsed:.1f}s',
+			f'   URLs: {self.urls_analyzed}/{self.urls_total} analyzed ({self.urls_analyzed / minutes:.1f} URLs/min)',
+			f'   Ads:  {self.ads_ok} generated ({self.ads_ok / minutes:.1f} ads/min)',
+		]
+		if self.urls_failed:
+			lines.append(f'   ❌ Failed URLs: {self.urls_failed}')
+		if self.ads_failed:
+			lines.append(f'   ❌ Failed ads: {[f"{url} #{ad_id}" for url, ad_id in self.ads_failed]}')
+		return '\n'.join(lines)
+
+
+async def read_urls(source: str) -> AsyncIterator[str]:
+	"""Yield URLs from a file, or from stdin when source is '-'. Blank lines and # comments are skipped.
+
+	Both are read a line at a time on a worker thread, so a slow disk or pipe never blocks the loop.
+	"""
+	f = sys.stdin if source == '-' else await asyncio.to_thread(Path(source).open, encoding='utf-8')
+	try:
+		while line := await asyncio.to_thread(f.readline):
+			if (url := line.strip()) and not url.startswith('#'):
+				yield url
+	finally:
+		if f is not sys.stdin:
+			await asyncio.to_thread(f.close)
+
+
+class BatchPipeline:
+	"""Run ``analyze(url)`` and ``generate(page_data, ad_id)`` as separately bounded stages"""
+
+	def __init__(
+		self,
+		analyze: Callable[[str], Awaitable[dict]],
+		generate: Callable[[dict, int], Awaitable[Any]],
+		ads_per_url: int = 1,
+		analysis_concurrency: int = 2,
+		generation_concurrency: int = 8,
+	):
+		self.analyze = analyze
+		self.generate = generate
+		self.ads_per_url = ads_per_url
+		self.analysis_concurrency = max(analysis_concurrency, 1)
+		self.generation_concurrency = max(generation_concurrency, 1)
+
+	async def run(self, urls: AsyncIterator[str]) -> BatchStats:
+		stats = BatchStats()
+		url_queue: asyncio.Queue = asyncio.Queue(maxsize=self.analysis_concurrency)
+		ad_queue: asyncio.Queue = asyncio.Queue(maxsize=self.generation_concurrency * 2)
+
+		async def feed():
+			async for url in urls:
+				stats.urls_total += 1
+				await url_queue.put(url)
+			for _ in range(self.analysis_concurrency):
+				await url_queue.put(_DONE)
+
+		async def analysis_worker():
+			while (url := await url_queue.get()) is not _DONE:
+				try:
+					page_data = await self.analyze(url)
+				except Exception as e:
+					print(f'❌ Analysis failed for {url}: {e}')
+					stats.urls_failed.append(url)
+					continue
+				stats.urls_analyzed += 1
+				for ad_id in range(1, self.ads_per_url + 1):
+					await ad_queue.put((page_data, ad_id))
+
+		async def generation_worker():
+			while (item := await ad_queue.get()) is not _DONE:
+				page_data, ad_id = item
+				try:
+					result = await self.generate(page_data, ad_id)
+				except Exception:
+					stats.ads_failed.append((page_data['url'], ad_id))
+					continue
+				stats.ads_ok += 1
+				stats.results.append((page_data['url'], ad_id, result))
+
+		analysers = [asyncio.create_task(analysis_worker()) for _ in range(self.analysis_concurrency)]
+		generators = [asyncio.create_task(generation_worker()) for _ in range(self.generation_concurrency)]
+		try:
+			await asyncio.gather(feed(), *analysers)
+			for _ in generators:
+				await ad_queue.put(_DONE)
+			await asyncio.gather(*generators)
+		finally:
+			for task in analysers + generators:
+				task.cancel()
+			stats.finished_at = time.perf_counter()
+		return stats
@@ -0,0 +1,143 @@
+"""Benchmark: token, byte and cost accounting, and budget admission of new ads.
+
+Runs ``create_multiple_ads`` against fake backends that report usage metadata
+like Gemini does (about 4 characters a token, 1290 tokens per generated image).
+Each scenario gets a fresh accounting ledger:
+
+* ``instagram``: ``--count`` image ads without a budget. The ledger must count
+  every image request and its tokens, attribute them to the image stage and to
+  each ad, and add the bytes sent and received.
+* ``instagram-budget`` / ``stream-budget``: the same run, gathered or
+  streamed, with a cost budget that covers ``--budget-ads`` ads. The ads past
+  it must be refused before any request is made, and the spend must stay
+  within the budget.
+* ``tiktok-budget``: video ads with a budget for two Veo clips, counting the
+  rendered seconds.
+
+The report shows the ads made and refused, requests, tokens, bytes and cost
+per scenario, and how long accounting took per recorded call.
+
+Usage:
+	python benchmarks/bench_accounting.py --count 12 --budget-ads 5
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import accounting
+from fakes import BackendProfile, FakeAgent, FakeBrowserSession, FakeGenaiClient
+from harness import patched, unthrottled_gateway
+
+URL = 'https://example.test/'
+
+
+async def run(ad_generator, mode: str, count: int, ledger: accounting.Ledger, bench_args, stream: bool = False) -> dict:
+	profile = BackendProfile.build(scale=bench_args.scale, jitter=0.3, image_bytes=200_000, video_bytes=500_000)
+	client = FakeGenaiClient(profile)
+	with patched(
+		ad_generator,
+		Agent=functools.partial(FakeAgent, profile=profile),
+		BrowserSession=functools.partial(FakeBrowserSession, profile),
+		get_client=lambda api_key=None: client,
+		open_file=lambda path: None,
+		_gateway=unthrottled_gateway(profile),
+	):
+		analyzer = ad_generator.LandingPageAnalyzer(fast_path_threshold=None)
+		results = await ad_generator.create_multiple_ads(URL, count=count, mode=mode, analyzer=analyzer, stream=stream, max_in_flight=4)
+	return {'ads': len(results), 'calls': client.calls, 'ledger': ledger}
+
+
+def check_instagram(result: dict, count: int):
+	ledger = result['ledger']
+	image = ledger.breakdown('model')['gemini-2.5-flash-image']
+	assert image.requests == result['calls']['gemini-2.5-flash-image'] == count, (image, result['calls'])
+	assert image.output_tokens == 1290 * count, image
+	assert image.response_bytes == 200_000 * count, image
+	assert image.input_tokens > 0 and image.request_bytes > 0, image
+	in_stage = [usage for (url, ad_id, stage, model), usage in ledger.rows.items() if stage == 'image' and model == 'gemini-2.5-flash-image']
+	assert sum(usage.requests for usage in in_stage) == count, ledger.breakdown('stage')
+	# The reference screenshot is uploaded once, by the first ad that needs it
+	upload = ledger.breakdown('model')['files']
+	assert upload.requests == 1 and upload.request_bytes > 0, upload
+	ads = {ad_id for (url, ad_id), usage in ledger.breakdown('ad').items() if ad_id is not None and usage.requests}
+	assert ads == set(range(1, count + 1)), ads
+	assert abs(ledger.total.cost - sum(usage.cost for usage in ledger.rows.values())) < 1e-9
+
+
+def check_budget(result: dict, budget_ads: int, count: int):
+	ledger = result['ledger']
+	assert result['ads'] <= budget_ads, result['ads']
+	assert ledger.refused == count - result['ads'], (ledger.refused, result['ads'])
+	assert ledger.total.cost <= ledger.cost_budget, (ledger.total.cost, ledger.cost_budget)
+	assert ledger.breakdown('model')['gemini-2.5-flash-image'].requests == result['ads'], 'a refused ad made a request'
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Check usage accounting and budget admission of new ads')
+	parser.add_argument('--count', type=int, default=12, help='Ads requested in each run')
+	parser.add_argument('--budget-ads', type=int, default=5, help='Image ads the budgeted runs can afford')
+	parser.add_argument('--scale', type=float, default=1.0, help='Multiplier on every fake latency')
+	bench_args = parser.parse_args()
+
+	import ad_generator
+
+	ad_generator.preload('tiktok', browser=True)
+	# Enough for budget_ads image ads at the estimate of one, not enough for one more
+	image_budget = accounting.AD_ESTIMATES['instagram'].cost * (bench_args.budget_ads + 0.5)
+	scenarios = {
+		'instagram': ('instagram', None, False),
+		'instagram-budget': ('instagram', image_budget, False),
+		'stream-budget': ('instagram', image_budget, True),
+		'tiktok-budget': ('tiktok', accounting.AD_ESTIMATES['tiktok'].cost * 2.5, False),
+	}
+
+	results = {}
+	with tempfile.TemporaryDirectory() as workdir:
+		os.chdir(workdir)
+		for name, (mode, budget, stream) in scenarios.items():
+			ledger = accounting.configure(cost_budget=budget)
+			# The code under test prints progress for every ad, keep the output readable
+			with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+				results[name] = asyncio.run(run(ad_generator, mode, bench_args.count, ledger, bench_args, stream))
+		os.chdir(ROOT)
+
+	check_instagram(results['instagram'], bench_args.count)
+	check_budget(results['instagram-budget'], bench_args.budget_ads, bench_args.count)
+	check_budget(results['stream-budget'], bench_args.budget_ads, bench_args.count)
+	video = results['tiktok-budget']['ledger']
+	assert results['tiktok-budget']['ads'] == 2 and video.refused == bench_args.count - 2, (results['tiktok-budget']['ads'], video.refused)
+	assert video.total.media_seconds == 2 * accounting.VEO_SECONDS, video.total
+
+	for name, result in results.items():
+		t = result['ledger'].total
+		print(
+			f'{name:>16}: {result["ads"]:2d} ads, {result["ledger"].refused:2d} refused  {t.requests:3d} requests  '
+			f'{t.input_tokens:7d} tokens in  {t.output_tokens:7d} out  {t.request_bytes / 1024:7.0f} KB sent  '
+			f'{t.response_bytes / 1024:7.0f} KB received  {t.media_seconds:3.0f}s video  ${t.cost:.3f}'
+		)
+	print('\n' + results['instagram-budget']['ledger'].summary())
+
+	ledger = accounting.Ledger()
+	calls = 20_000
+	with ledger.admit('instagram'):
+		started = time.perf_counter()
+		for _ in range(calls):
+			ledger.record('gemini-2.5-flash-image', requests=1, input_tokens=400, output_tokens=1290, response_bytes=200_000)
+		per_call = (time.perf_counter() - started) / calls
+	print(f'\nAccounting cost: {per_call * 1e6:.1f}µs per recorded call')
+	print('✅ Usage is attributed per model, stage and ad, and budgets stop new ads before they are exceeded')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,187 @@
+"""End-to-end check and benchmark of the ad service (ad_service.py) against fake backends.
+
+Starts ``AdService`` with ad_generator's real job runner in-process. The
+browser, genai client and agent are the fakes from fakes.py. ``--jobs`` clients
+then submit at once over HTTP, more than the queue holds, so some get ``503``
+and come back after ``Retry-After``. One job's progress is followed over
+Server-Sent Events. The run checks that:
+
+* every job finishes with ``count`` ads on disk, with a cost budget that
+  covers one job's ads but not all of them: each job is admitted against a
+  budget of its own, and the process-wide ledger keeps rolled-up rows only
+* the event stream ends in ``done``
+* full-queue, unknown-job and bad-request responses are correct
+
+It then reports per-job latency and throughput next to the import cost a
+one-shot CLI run pays before doing any work.
+
+Usage:
+	python benchmarks/bench_ad_service.py --jobs 12 --count 2 --workers 2 --queue-size 4
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import accounting
+from fakes import BackendProfile, FakeAgent, FakeBrowserSession, FakeGenaiClient
+from harness import patched, unthrottled_gateway
+
+
+async def request(port: int, method: str, path: str, payload: dict | None = None) -> tuple[int, dict, object]:
+	body = json.dumps(payload).encode() if payload is not None else b''
+	reader, writer = await asyncio.open_connection('127.0.0.1', port)
+	writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n'.encode() + body)
+	await writer.drain()
+	response = await reader.read()
+	writer.close()
+	head, _, data = response.partition(b'\r\n\r\n')
+	lines = head.decode().split('\r\n')
+	headers = dict(line.split(': ', 1) for line in lines[1:])
+	return int(lines[0].split()[1]), headers, json.loads(data)
+
+
+async def follow_events(port: int, job_id: str) -> list[str]:
+	reader, writer = await asyncio.open_connection('127.0.0.1', port)
+	writer.write(f'GET /jobs/{job_id}/events HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode())
+	await writer.drain()
+	names = []
+	while line := await reader.readline():
+		if line.startswith(b'event: '):
+			names.append(line[7:].decode().strip())
+	writer.close()
+	return names
+
+
+async def client(port: int, url: str, count: int, stats: dict) -> float:
+	"""Submit one job, honouring 503 Retry-After, and wait for its result; returns submit-to-result latency"""
+	started = time.perf_counter()
+	while True:
+		status, headers, job = await request(port, 'POST', '/jobs', {'url': url, 'count': count})
+		if status == 202:
+			break
+		assert status == 503 and 'Retry-After' in headers, (status, job)
+		stats['rejected'] += 1
+		await asyncio.sleep(int(headers['Retry-After']) * stats['retry_scale'])
+	if stats['follow'] is None:
+		stats['follow'] = asyncio.create_task(follow_events(port, job['id']))
+
+	while True:
+		status, headers, job = await request(port, 'GET', f'/jobs/{job["id"]}/result')
+		if status == 200:
+			break
+		await asyncio.sleep(0.02)
+	assert job['status'] == 'done' and len(job['results']) == count, job
+	assert all(Path(path).exists() for path in job['results']), job['results']
+	return time.perf_counter() - started
+
+
+async def run(bench_args) -> dict:
+	import ad_generator
+	from ad_service import AdService
+	from veo_poller import OperationPoller
+
+	# Both modes and the (fake) browser agent, as serve mode preloads them
+	ad_generator.preload('tiktok', browser=True)
+
+	# Enough for one job's ads, far short of every job's: a process-wide budget would refuse the later jobs
+	ledger = accounting.configure(cost_budget=accounting.AD_ESTIMATES['instagram'].cost * (bench_args.count + 0.5))
+	profile = BackendProfile.build(scale=bench_args.scale)
+	fake_client = FakeGenaiClient(profile)
+	poller = functools.partial(OperationPoller, min_interval=0.005, max_interval=0.05, expected_duration=profile.render.mean, max_requests_per_second=0)
+	with patched(
+		ad_generator,
+		Agent=functools.partial(FakeAgent, profile=profile),
+		BrowserSession=functools.partial(FakeBrowserSession, profile),
+		get_client=lambda api_key=None: fake_client,
+		OperationPoller=poller,
+		open_file=lambda path: None,
+		_gateway=unthrottled_gateway(profile),
+	):
+		pool = ad_generator.create_browser_pool(size=bench_args.workers)
+		await pool.start()
+		analyzer = ad_generator.LandingPageAnalyzer(fast_path_threshold=None)
+		analyzer.pool = pool
+		service = AdService(ad_generator.ad_job_runner(analyzer), workers=bench_args.workers, queue_size=bench_args.queue_size, expected_duration=1.0)
+		server = await service.listen(port=0)
+		port = service.port
+		try:
+			assert (await request(port, 'GET', '/jobs/missing'))[0] == 404
+			assert (await request(port, 'POST', '/jobs', {'url': 'not a url'}))[0] == 400
+			assert (await request(port, 'POST', '/jobs', {'url': 'https://a.test/', 'count': 10_000}))[0] == 400
+			for count in (True, '2', 1.5):
+				assert (await request(port, 'POST', '/jobs', {'url': 'https://a.test/', 'count': count}))[0] == 400, count
+
+			stats = {'rejected': 0, 'follow': None, 'retry_scale': bench_args.retry_scale}
+			started = time.perf_counter()
+			latencies = await asyncio.gather(
+				*(client(port, f'https://example{i}.test/', bench_args.count, stats) for i in range(bench_args.jobs))
+			)
+			wall = time.perf_counter() - started
+			events = await stats['follow']
+			assert events[0] == 'queued' and events[-1] == 'done' and events.count('ad_done') == bench_args.count, events
+			health = (await request(port, 'GET', '/health'))[2]
+			assert ledger.refused == 0, ledger.refused
+			assert ledger.breakdown('model')['gemini-2.5-flash-image'].requests == bench_args.jobs * bench_args.count, ledger.breakdown('model')
+			assert all(url is None and ad_id is None for url, ad_id, stage, model in ledger.rows), 'per-ad rows kept after the jobs ended'
+		finally:
+			server.close()
+			await server.wait_closed()
+			await service.close()
+			await pool.close()
+	return {'latencies': latencies, 'wall': wall, 'rejected': stats['rejected'], 'events': events, 'health': health}
+
+
+def import_cost() -> float:
+	"""Seconds a one-shot CLI run spends importing ad_generator and the genai SDK before doing any work"""
+	start = time.perf_counter()
+	subprocess.run(
+		[sys.executable, '-c', f'import sys; sys.path.insert(0, {str(ROOT)!r}); import ad_generator; from google import genai'],
+		check=True,
+		capture_output=True,
+	)
+	return time.perf_counter() - start
+
+
+def main():
+	parser = argparse.ArgumentParser(description='End-to-end check and benchmark of the ad service with fake backends')
+	parser.add_argument('--jobs', type=int, default=12, help='Concurrent clients, one job each')
+	parser.add_argument('--count', type=int, default=2, help='Ads per job')
+	parser.add_argument('--workers', type=int, default=2)
+	parser.add_argument('--queue-size', type=int, default=4, help='Small enough that the burst of jobs hits backpressure')
+	parser.add_argument('--scale', type=float, default=0.5, help='Multiplier on every fake latency')
+	parser.add_argument('--retry-scale', type=float, default=0.1, help='Fraction of Retry-After the clients actually wait')
+	bench_args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as workdir:
+		os.chdir(workdir)
+		# The code under test prints progress for every ad, keep the output readable
+		with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+			result = asyncio.run(run(bench_args))
+		os.chdir(ROOT)
+
+	latencies = sorted(result['latencies'])
+	p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+	print('✅ All end-to-end checks passed')
+	print(f'   events of one job: {" → ".join(result["events"])}')
+	print(f'   {bench_args.jobs} jobs × {bench_args.count} ads in {result["wall"]:.2f}s ({bench_args.jobs / result["wall"]:.1f} jobs/s), {result["rejected"]} submissions got 503 + Retry-After')
+	print(f'   submit-to-result p50 {statistics.median(latencies):.2f}s  p95 {p95:.2f}s')
+	print(f'   one-shot CLI import cost avoided per request: {import_cost():.2f}s')
+	print(f'   health at the end: {result["health"]}')
+
+
+if __name__ == '__main__':
+	main()
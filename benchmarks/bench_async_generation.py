@@ -0,0 +1,119 @@
+"""Benchmark: concurrent ad generation against a fake genai client with injected latency.
+
+Every Gemini call in ad_generator.py should be awaited on the shared client, so the
+wall time for N ads tracks the slowest ad rather than the sum of all of them.
+
+Usage:
+	python benchmarks/bench_async_generation.py --count 8 --latency 0.5 --tiktok
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class _FakeModels:
+	def __init__(self, latency: float, jitter: float):
+		self.latency = latency
+		self.jitter = jitter
+		self.calls = 0
+
+	async def _sleep(self) -> float:
+		self.calls += 1
+		delay = self.latency * random.uniform(1 - self.jitter, 1 + self.jitter)
+		await asyncio.sleep(delay)
+		return delay
+
+	async def generate_content(self, model: str, contents, **kwargs):
+		await self._sleep()
+		if model == 'gemini-2.5-flash-image':
+			part = SimpleNamespace(inline_data=SimpleNamespace(data=b'\x89PNG fake image'))
+			return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))], text=None)
+		if 'config' in kwargs:
+			# Batched concept request: structured output with a list of distinct concepts
+			concepts = [f'Fake video concept {self.calls}.{i}' for i in range(16)]
+			return SimpleNamespace(candidates=[], text=json.dumps({'concepts': concepts}), parsed=None)
+		return SimpleNamespace(candidates=[], text='A fake video concept.')
+
+	async def generate_videos(self, model: str, prompt: str, **kwargs):
+		await self._sleep()
+		video = SimpleNamespace(uri='https://example.invalid/files/fake:download', video_bytes=b'fake mp4 bytes')
+		return SimpleNamespace(name='operations/fake', done=True, error=None, response=SimpleNamespace(generated_videos=[SimpleNamespace(video=video)]))
+
+
+class _FakeOperations:
+	async def get(self, operation):
+		return operation
+
+
+class FakeClient:
+	"""Duck-typed stand-in for genai.Client exposing only the async surface ad_generator uses"""
+
+	def __init__(self, latency: float, jitter: float = 0.2):
+		models = _FakeModels(latency, jitter)
+		self.aio = SimpleNamespace(models=models, operations=_FakeOperations())
+
+
+async def run(count: int, latency: float, mode: str, output_dir: Path) -> dict:
+	import ad_generator
+
+	from gemini_client import DEFAULT_RATE_LIMITS, GeminiGateway
+
+	ad_generator.preload(mode)
+	ad_generator.configure_output_store(output_dir)
+
+	client = FakeClient(latency)
+	# The fake never throttles; lift the gateway limits so this measures concurrency alone
+	gateway = GeminiGateway(rate_limits=dict.fromkeys(DEFAULT_RATE_LIMITS, 1e6), default_rate=1e6, initial_concurrency=max(count, 4) * 4)
+	generator = ad_generator.AdGenerator(mode=mode, client=client, gateway=gateway)
+	assert generator.store.root == output_dir, generator.store.root
+	page_data = {'url': 'https://example.com', 'analysis': 'Brand: Example', 'screenshot_path': None}
+
+	start = time.perf_counter()
+	concepts = await generator.create_video_concepts(page_data['analysis'], count) if mode == 'tiktok' else [None] * count
+	results = await asyncio.gather(
+		*(ad_generator.generate_single_ad(page_data, mode, i + 1, generator, concepts[i]) for i in range(count)),
+		return_exceptions=True,
+	)
+	wall = time.perf_counter() - start
+
+	calls_per_ad = client.aio.models.calls / max(count, 1)
+	return {
+		'count': count,
+		'ok': sum(1 for r in results if not isinstance(r, Exception)),
+		'wall': wall,
+		'serial_estimate': calls_per_ad * latency * count,
+		'single_ad_estimate': calls_per_ad * latency,
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Benchmark concurrent ad generation with a fake genai client')
+	parser.add_argument('--count', type=int, default=8)
+	parser.add_argument('--latency', type=float, default=0.5, help='Mean seconds per fake Gemini call')
+	parser.add_argument('--tiktok', action='store_true', default=False)
+	parser.add_argument('--output-dir', type=Path, default=None, help='Where the ads and manifest go (default: a temporary directory)')
+	bench_args = parser.parse_args()
+
+	mode = 'tiktok' if bench_args.tiktok else 'instagram'
+
+	with tempfile.TemporaryDirectory() as workdir:
+		output_dir = bench_args.output_dir or Path(workdir)
+		stats = asyncio.run(run(bench_args.count, bench_args.latency, mode, output_dir))
+		assert (output_dir / 'manifest.jsonl').exists(), f'no manifest written to {output_dir}'
+	speedup = stats['serial_estimate'] / stats['wall'] if stats['wall'] else float('inf')
+	print(f'{stats["ok"]}/{stats["count"]} {mode} ads in {stats["wall"]:.2f}s')
+	print(f'  serial estimate: {stats["serial_estimate"]:.2f}s  slowest single ad: ~{stats["single_ad_estimate"]:.2f}s')
+	print(f'  speedup vs serial: {speedup:.1f}x')
+
+
+if __name__ == '__main__':
+	main()
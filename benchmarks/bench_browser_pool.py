@@ -0,0 +1,88 @@
+"""Benchmark: pooled vs unpooled browser sessions for landing-page visits.
+
+Runs the browser part of an analysis (start, navigate, screenshot, tear down) for
+each URL, once with a fresh BrowserSession per URL as LandingPageAnalyzer does
+without a pool, and once borrowing from a pre-warmed BrowserSessionPool. No LLM
+is involved, so the difference is browser cold start. Needs a local Chromium.
+
+Usage:
+	python benchmarks/bench_browser_pool.py --urls https://example.com https://example.org --repeat 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from browser_pool import BrowserSessionPool
+
+
+async def visit(browser_session, url: str, screenshot_dir: Path):
+	await browser_session.navigate_to(url)
+	await browser_session.take_screenshot(path=str(screenshot_dir / f'{time.perf_counter_ns()}.png'), full_page=False)
+
+
+async def run_unpooled(urls: list[str], concurrency: int, screenshot_dir: Path) -> list[float]:
+	from browser_use import BrowserSession
+
+	semaphore = asyncio.Semaphore(concurrency)
+
+	async def one(url: str) -> float:
+		async with semaphore:
+			start = time.perf_counter()
+			browser_session = BrowserSession(headless=True)
+			await browser_session.start()
+			try:
+				await visit(browser_session, url, screenshot_dir)
+			finally:
+				await browser_session.kill()
+			return time.perf_counter() - start
+
+	return await asyncio.gather(*(one(url) for url in urls))
+
+
+async def run_pooled(urls: list[str], concurrency: int, screenshot_dir: Path) -> list[float]:
+	from browser_use import BrowserSession
+
+	pool = BrowserSessionPool(lambda: BrowserSession(headless=True, keep_alive=True), size=concurrency)
+	await pool.start()
+
+	async def one(url: str) -> float:
+		start = time.perf_counter()
+		async with pool.session() as browser_session:
+			await visit(browser_session, url, screenshot_dir)
+		return time.perf_counter() - start
+
+	try:
+		return await asyncio.gather(*(one(url) for url in urls))
+	finally:
+		await pool.close()
+
+
+def report(label: str, latencies: list[float], wall: float):
+	p95 = sorted(latencies)[max(int(len(latencies) * 0.95) - 1, 0)]
+	print(f'{label:>9}: wall {wall:6.2f}s  per-URL p50 {statistics.median(latencies):5.2f}s  p95 {p95:5.2f}s')
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Compare pooled and unpooled browser sessions')
+	parser.add_argument('--urls', nargs='+', default=['https://example.com'])
+	parser.add_argument('--repeat', type=int, default=3, help='Visit every URL this many times')
+	parser.add_argument('--concurrency', type=int, default=2)
+	bench_args = parser.parse_args()
+
+	urls = bench_args.urls * bench_args.repeat
+	with tempfile.TemporaryDirectory() as tmp:
+		for label, runner in (('unpooled', run_unpooled), ('pooled', run_pooled)):
+			start = time.perf_counter()
+			latencies = asyncio.run(runner(urls, bench_args.concurrency, Path(tmp)))
+			report(label, latencies, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,133 @@
+"""Benchmark: unmanaged fan-out vs GeminiGateway against a fake server that throttles.
+
+The fake model server accepts ``--capacity`` concurrent requests and at most
+``--server-rps`` per second; anything beyond that is answered with a 429, and
+``--error-rate`` of requests fail with a 503 regardless. "before" fires every
+request directly with no retries, like the old code did. "after" goes through
+GeminiGateway, which rate limits, retries with jittered backoff and adapts its
+concurrency. Reported: completed requests, 429s seen, retries and wall time.
+
+It then checks that a submission (``retryable=is_retryable_submission``) is
+sent again after a 429 or a refused connection, but never after a 503 or a
+timeout, which may follow a job the server already accepted.
+
+Usage:
+	python benchmarks/bench_gemini_gateway.py --requests 60 --capacity 6 --server-rps 10
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from gemini_client import GeminiGateway, is_retryable_submission
+
+
+class ServerError(Exception):
+	def __init__(self, code: int):
+		super().__init__(f'{code} from fake server')
+		self.code = code
+
+
+class ThrottlingServer:
+	"""Fake model endpoint with a concurrency cap, a rate cap and random 503s"""
+
+	def __init__(self, capacity: int, rps: float, latency: float, error_rate: float):
+		self.capacity = capacity
+		self.rps = rps
+		self.latency = latency
+		self.error_rate = error_rate
+		self.in_flight = 0
+		self.recent: list[float] = []
+		self.throttled = 0
+		self.errors = 0
+
+	async def generate(self) -> str:
+		now = time.monotonic()
+		self.recent = [t for t in self.recent if now - t < 1.0]
+		if self.in_flight >= self.capacity or len(self.recent) >= self.rps:
+			self.throttled += 1
+			await asyncio.sleep(0.01)
+			raise ServerError(429)
+		self.recent.append(now)
+		self.in_flight += 1
+		try:
+			await asyncio.sleep(random.uniform(0.5, 1.5) * self.latency)
+			if random.random() < self.error_rate:
+				self.errors += 1
+				raise ServerError(503)
+			return 'ok'
+		finally:
+			self.in_flight -= 1
+
+
+async def run(strategy: str, args: argparse.Namespace) -> dict:
+	server = ThrottlingServer(args.capacity, args.server_rps, args.latency, args.error_rate)
+	gateway = GeminiGateway(rate_limits={'model': args.gateway_rps}, base_delay=0.2, max_delay=5.0, max_retries=8)
+
+	async def one():
+		if strategy == 'before':
+			return await server.generate()
+		return await gateway.call('model', server.generate)
+
+	start = time.perf_counter()
+	results = await asyncio.gather(*(one() for _ in range(args.requests)), return_exceptions=True)
+	counters = gateway.snapshot().get('model', {})
+	return {
+		'strategy': strategy,
+		'ok': sum(1 for r in results if not isinstance(r, Exception)),
+		'throttled': server.throttled,
+		'retries': counters.get('retries', 0),
+		'limit': counters.get('concurrency_limit', 0.0),
+		'wall': time.perf_counter() - start,
+	}
+
+
+async def check_submissions() -> None:
+	"""Each failure once, then success: only the failures that cannot follow an accepted job are retried"""
+	for error, retried in ((ServerError(429), True), (ConnectionRefusedError(), True), (ServerError(503), False), (asyncio.TimeoutError(), False)):
+		gateway = GeminiGateway(base_delay=0.01)
+		sent = 0
+
+		async def submit():
+			nonlocal sent
+			sent += 1
+			if sent == 1:
+				raise error
+			return 'operation'
+
+		try:
+			await gateway.call('model', submit, retryable=is_retryable_submission)
+		except Exception as e:
+			assert e is error
+		assert sent == (2 if retried else 1), (error, sent)
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Compare unmanaged requests with GeminiGateway under throttling')
+	parser.add_argument('--requests', type=int, default=60)
+	parser.add_argument('--capacity', type=int, default=6, help='Concurrent requests the fake server accepts')
+	parser.add_argument('--server-rps', type=float, default=10.0, help='Requests per second the fake server accepts')
+	parser.add_argument('--gateway-rps', type=float, default=8.0, help='Rate limit configured in the gateway')
+	parser.add_argument('--latency', type=float, default=0.3)
+	parser.add_argument('--error-rate', type=float, default=0.05)
+	parser.add_argument('--seed', type=int, default=7)
+	bench_args = parser.parse_args()
+
+	for strategy in ('before', 'after'):
+		random.seed(bench_args.seed)
+		stats = asyncio.run(run(strategy, bench_args))
+		print(
+			f'{stats["strategy"]:>6}: {stats["ok"]:3d}/{bench_args.requests} ok, {stats["throttled"]:3d} throttled, '
+			f'{stats["retries"]:3d} retries, final limit {stats["limit"]:.1f}, wall {stats["wall"]:.2f}s'
+		)
+	asyncio.run(check_submissions())
+	print('✅ Submissions are retried after a 429 or a refused connection, never after a 503 or a timeout')
+
+
+if __name__ == '__main__':
+	main()
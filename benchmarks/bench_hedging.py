@@ -0,0 +1,156 @@
+"""Benchmark: image request tail latency with and without hedging.
+
+Runs ``--count`` ``AdGenerator.generate_ad_image`` calls in batches of
+``--batch`` against a fake image model with a long tail. Every request takes a
+lognormal time around the fake mean, and ``--straggler-rate`` of them stall
+for ``--straggler-factor`` times longer, as a request stuck on a slow backend
+does. Each stall is independent, so a duplicate of a stalled request usually
+comes back at normal speed. Two runs with the same seed are compared:
+
+* ``off``: every image request goes straight through the gateway
+* ``hedged``: a ``Hedger`` at ``--percentile`` with a ``--budget`` hedge budget
+
+For each run the report shows the p50/p90/p99/max latency of an image as the
+ad sees it, the wall time of the whole run, and how many extra requests the
+hedges cost. The hedged run checks that the hedges stayed within the budget,
+and that a short ``create_multiple_ads`` run with hedging enabled prints its
+hedge metrics.
+
+Usage:
+	python benchmarks/bench_hedging.py --count 200 --batch 16 --percentile 95 --budget 10
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakes import BackendProfile, FakeAgent, FakeBrowserSession, FakeGenaiClient
+from harness import patched, unthrottled_gateway
+from hedging import Hedger
+from output_store import OutputStore
+
+URL = 'https://example.test/'
+
+
+def with_stragglers(client: FakeGenaiClient, rate: float, stall: float, seed: int):
+	"""Make rate of the image requests stall for an extra stall seconds"""
+	generate_content = client.aio.models.generate_content
+	rng = random.Random(seed)
+
+	async def straggling(model, contents, config=None, **kwargs):
+		if 'image' in model and rng.random() < rate:
+			await asyncio.sleep(stall)
+		return await generate_content(model, contents, config=config, **kwargs)
+
+	client.aio.models.generate_content = straggling
+
+
+def percentile(values: list[float], q: float) -> float:
+	values = sorted(values)
+	return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def run(ad_generator, scenario: str, bench_args) -> dict:
+	profile = BackendProfile.build(scale=bench_args.scale, jitter=0.3)
+	client = FakeGenaiClient(profile)
+	with_stragglers(client, bench_args.straggler_rate, profile.image.mean * bench_args.straggler_factor, seed=bench_args.seed)
+	gateway = unthrottled_gateway(profile)
+	hedger = Hedger(gateway, percentile=bench_args.percentile / 100, budget=bench_args.budget / 100) if scenario == 'hedged' else None
+	generator = ad_generator.AdGenerator(mode='instagram', client=client, gateway=gateway, store=OutputStore(Path(scenario)), hedger=hedger)
+
+	latencies = []
+
+	async def image():
+		started = time.perf_counter()
+		assert await generator.generate_ad_image('A fake ad prompt') is not None
+		latencies.append(time.perf_counter() - started)
+
+	started = time.perf_counter()
+	for first in range(0, bench_args.count, bench_args.batch):
+		await asyncio.gather(*(image() for _ in range(min(bench_args.batch, bench_args.count - first))))
+	return {
+		'wall': time.perf_counter() - started,
+		'latencies': latencies,
+		'requests': client.calls['gemini-2.5-flash-image'],
+		'hedger': hedger,
+	}
+
+
+async def run_end_to_end(ad_generator, bench_args) -> str:
+	"""Output of a small create_multiple_ads run with hedging enabled the way --hedge does"""
+	profile = BackendProfile.build(scale=bench_args.scale, jitter=0.3)
+	client = FakeGenaiClient(profile)
+	output = io.StringIO()
+	with patched(
+		ad_generator,
+		Agent=functools.partial(FakeAgent, profile=profile),
+		BrowserSession=functools.partial(FakeBrowserSession, profile),
+		get_client=lambda api_key=None: client,
+		open_file=lambda path: None,
+		_gateway=unthrottled_gateway(profile),
+		_hedger=None,
+	):
+		ad_generator.enable_hedging(bench_args.percentile / 100, bench_args.budget / 100)
+		analyzer = ad_generator.LandingPageAnalyzer(fast_path_threshold=None)
+		with contextlib.redirect_stdout(output):
+			await ad_generator.create_multiple_ads(URL, count=8, analyzer=analyzer)
+	return output.getvalue()
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Compare image request tail latency with and without hedging')
+	parser.add_argument('--count', type=int, default=200, help='Image requests in each run')
+	parser.add_argument('--batch', type=int, default=16, help='Image requests started together, like one --count run')
+	parser.add_argument('--percentile', type=float, default=95.0, help='Hedge after this latency percentile')
+	parser.add_argument('--budget', type=float, default=10.0, help='Most extra requests, as a percentage of all requests')
+	parser.add_argument('--straggler-rate', type=float, default=0.02, help='Share of image requests that stall')
+	parser.add_argument('--straggler-factor', type=float, default=8.0, help='How many mean latencies a stall adds')
+	parser.add_argument('--scale', type=float, default=2.0, help='Multiplier on every fake latency')
+	parser.add_argument('--seed', type=int, default=7)
+	bench_args = parser.parse_args()
+
+	import ad_generator
+
+	ad_generator.preload('instagram', browser=True)
+
+	with tempfile.TemporaryDirectory() as workdir:
+		os.chdir(workdir)
+		results = {scenario: asyncio.run(run(ad_generator, scenario, bench_args)) for scenario in ('off', 'hedged')}
+		end_to_end = asyncio.run(run_end_to_end(ad_generator, bench_args))
+		os.chdir(ROOT)
+
+	print(
+		f'{bench_args.count} image requests in batches of {bench_args.batch}, {bench_args.straggler_rate:.0%} stalling for '
+		f'{bench_args.straggler_factor:g}x the mean; hedging at p{bench_args.percentile:g} within {bench_args.budget:g}%'
+	)
+	for scenario, result in results.items():
+		latencies = result['latencies']
+		extra = result['requests'] - bench_args.count
+		print(
+			f'{scenario:>7}: p50 {percentile(latencies, 0.5):5.2f}s  p90 {percentile(latencies, 0.9):5.2f}s  p99 {percentile(latencies, 0.99):5.2f}s  '
+			f'max {max(latencies):5.2f}s  wall {result["wall"]:6.2f}s  extra requests {extra:3d} ({extra / bench_args.count:.1%})'
+		)
+	hedger = results['hedged']['hedger']
+	print(hedger.summary())
+
+	stats = hedger.stats
+	assert stats.issued <= bench_args.budget / 100 * stats.calls, stats
+	assert stats.won <= stats.issued, stats
+	assert '🪁 Hedging' in end_to_end, end_to_end
+	print('✅ Hedges stayed within the budget and show up in the run summary')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,128 @@
+"""Benchmark: blocking input() vs the async human-input broker with concurrent agents.
+
+Runs ``--agents`` fake agents taking ``--steps`` steps each. Every
+``--ask-every``-th agent asks a human one question halfway through, and the
+"human" takes ``--think`` seconds to answer. With ``input()`` the wait blocks
+the event loop, so every agent stalls for every question. With the broker only
+the asking agent waits. The answering human is simulated through the chosen
+front end: a stub, answer files, or HTTP requests to the local endpoint, so
+each front end is exercised end to end.
+
+Usage:
+	python benchmarks/bench_human_input.py --agents 8 --think 0.5 --frontend http
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from human_input import FileQueueFrontend, HTTPFrontend, HumanInputBroker, StubFrontend
+
+
+async def fake_agent(name: str, steps: int, step_time: float, ask) -> float:
+	start = time.perf_counter()
+	for step in range(steps):
+		await asyncio.sleep(step_time)
+		if ask is not None and step == steps // 2:
+			answer = await ask(f'What should {name} do next?', name)
+			assert answer == 'carry on', answer
+	return time.perf_counter() - start
+
+
+async def run_blocking(args) -> list[float]:
+	async def blocking_ask(question: str, agent: str) -> str:
+		# What input() does to the loop: nothing else runs until the human replies
+		time.sleep(args.think)
+		return 'carry on'
+
+	return await asyncio.gather(*(fake_agent(f'a{i}', args.steps, args.step_time, blocking_ask if i % args.ask_every == 0 else None) for i in range(args.agents)))
+
+
+async def file_human(frontend: FileQueueFrontend, think: float):
+	answered = set()
+	while True:
+		for path in frontend.questions.glob('*.json'):
+			question = json.loads(path.read_text(encoding='utf-8'))
+			if question['id'] not in answered:
+				answered.add(question['id'])
+				asyncio.get_running_loop().call_later(think, (frontend.answers / f'{question["id"]}.txt').write_text, 'carry on')
+		await asyncio.sleep(0.05)
+
+
+async def http_human(frontend: HTTPFrontend, think: float):
+	async def request(method: str, path: str, body: str = '') -> tuple[int, object]:
+		reader, writer = await asyncio.open_connection(frontend.host, frontend.port)
+		writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body.encode())}\r\n\r\n{body}'.encode())
+		await writer.drain()
+		response = await reader.read()
+		writer.close()
+		head, _, payload = response.partition(b'\r\n\r\n')
+		return int(head.split()[1]), json.loads(payload)
+
+	async def answer(question_id: str):
+		await asyncio.sleep(think)
+		status, _ = await request('POST', f'/questions/{question_id}', 'carry on')
+		assert status == 200, status
+
+	answered, tasks = set(), set()
+	while True:
+		_, pending = await request('GET', '/questions')
+		for question in pending:
+			if question['id'] not in answered:
+				answered.add(question['id'])
+				tasks.add(asyncio.create_task(answer(question['id'])))
+		await asyncio.sleep(0.05)
+
+
+async def run_broker(args, workdir: Path) -> list[float]:
+	if args.frontend == 'stub':
+		frontend, human = StubFrontend(default='carry on', delay=args.think), None
+	elif args.frontend == 'file':
+		frontend = FileQueueFrontend(workdir, poll_interval=0.05)
+		human = file_human
+	else:
+		frontend = HTTPFrontend(port=0)
+		human = http_human
+
+	async with HumanInputBroker([frontend], timeout=args.think * 10 + 5) as broker:
+		helper = asyncio.create_task(human(frontend, args.think)) if human else None
+		try:
+			return await asyncio.gather(*(fake_agent(f'a{i}', args.steps, args.step_time, broker.ask if i % args.ask_every == 0 else None) for i in range(args.agents)))
+		finally:
+			if helper is not None:
+				helper.cancel()
+				await asyncio.gather(helper, return_exceptions=True)
+
+
+def report(label: str, durations: list[float], wall: float, idle: float):
+	print(f'{label:>14}: wall {wall:6.2f}s  idle agents finish p50 {statistics.median(durations) if durations else 0:5.2f}s (ideal {idle:5.2f}s)')
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Compare blocking input() with the async human-input broker')
+	parser.add_argument('--agents', type=int, default=8)
+	parser.add_argument('--steps', type=int, default=10)
+	parser.add_argument('--step-time', type=float, default=0.05, help='Seconds per fake agent step')
+	parser.add_argument('--ask-every', type=int, default=4, help='Every n-th agent asks a question')
+	parser.add_argument('--think', type=float, default=0.5, help='Seconds the human takes to answer')
+	parser.add_argument('--frontend', choices=['stub', 'file', 'http'], default='stub')
+	bench_args = parser.parse_args()
+
+	idle = bench_args.steps * bench_args.step_time
+	with tempfile.TemporaryDirectory() as tmp:
+		for label, runner in (('input()', lambda: run_blocking(bench_args)), (f'broker/{bench_args.frontend}', lambda: run_broker(bench_args, Path(tmp)))):
+			start = time.perf_counter()
+			durations = asyncio.run(runner())
+			# Agents that never ask should be unaffected by the others' questions
+			report(label, [d for i, d in enumerate(durations) if i % bench_args.ask_every], time.perf_counter() - start, idle)
+
+
+if __name__ == '__main__':
+	main()
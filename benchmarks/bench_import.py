@@ -0,0 +1,135 @@
+"""Startup cost of ad_generator: import time, --help, and what each kind of run loads.
+
+Every scenario runs in a fresh interpreter under ``python -X importtime``. The
+benchmark reports wall time, total import time, and which of the heavy
+dependencies (google.genai, browser_use, PIL, aiofiles, the Veo poller) ended
+up loaded:
+
+* ``import``: a plain ``import ad_generator``, as a worker process does
+* ``--help``: the CLI printing its usage
+* ``instagram``: an image AdGenerator with its client, no Veo poller
+* ``tiktok``: a video AdGenerator once its Veo poller is in use
+* ``analyzer``: a LandingPageAnalyzer as used for cached and HTML fast-path
+  analyses, no browser stack
+* ``agent``: the analyzer once the browser agent's LLM is needed
+
+It also checks that the import has no side effects. The import must not parse
+a hostile ``sys.argv``, change the environment or the root logger level, or
+load any heavy dependency. ``--budget`` fails the run when the plain import
+takes longer than that, so import cost can be tracked like the other
+benchmarks.
+
+Usage:
+	python benchmarks/bench_import.py --repeat 5 --top 15
+	python benchmarks/bench_import.py --budget 0.5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY = ('google.genai', 'browser_use', 'PIL', 'aiofiles', 'veo_poller')
+
+SCENARIOS = {
+	'import': ('import ad_generator', (), HEAVY),
+	'instagram': ("import ad_generator\nad_generator.AdGenerator(mode='instagram', api_key='bench')", ('google.genai',), ('browser_use', 'veo_poller')),
+	'tiktok': ("import ad_generator\nad_generator.AdGenerator(mode='tiktok', api_key='bench').poller", ('google.genai', 'veo_poller'), ('browser_use',)),
+	'analyzer': ('import ad_generator\nad_generator.LandingPageAnalyzer()', (), ('google.genai', 'browser_use', 'veo_poller')),
+	'agent': ("import ad_generator\nad_generator.LandingPageAnalyzer().llm", ('browser_use',), ()),
+}
+
+SIDE_EFFECTS = """
+import json, logging, os, sys
+sys.argv = ['worker.py', '--not-an-ad-generator-flag']
+environ, level = dict(os.environ), logging.getLogger().level
+import ad_generator
+print(json.dumps({
+	'environ': sorted(set(os.environ.items()) ^ set(environ.items())),
+	'level': [level, logging.getLogger().level],
+	'heavy': [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def python(code: str, workdir: str, *options: str) -> subprocess.CompletedProcess:
+	env = {**os.environ, 'PYTHONPATH': str(ROOT), 'GEMINI_API_KEY': 'bench'}
+	return subprocess.run([sys.executable, *options, '-c', code], cwd=workdir, env=env, capture_output=True, text=True, check=True)
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, int, str]]:
+	"""(self us, cumulative us, indented module name) for every line -X importtime wrote"""
+	rows = []
+	for line in stderr.splitlines():
+		if not line.startswith('import time:') or 'imported package' in line:
+			continue
+		own, cumulative, name = line[len('import time:') :].split('|')
+		rows.append((int(own), int(cumulative), name.rstrip()[1:]))
+	return rows
+
+
+def run_scenario(code: str, workdir: str) -> tuple[float, float, dict, list]:
+	probe = f'{code}\nimport json, sys\nprint(json.dumps({{name: name in sys.modules for name in {HEAVY!r}}}))'
+	started = time.perf_counter()
+	result = python(probe, workdir, '-X', 'importtime')
+	wall = time.perf_counter() - started
+	rows = parse_importtime(result.stderr)
+	# Top-level entries (no indentation) add up to everything this run imported
+	imported = sum(cumulative for _, cumulative, name in rows if not name.startswith(' ')) / 1e6
+	return wall, imported, json.loads(result.stdout.splitlines()[-1]), rows
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Measure ad_generator import and startup cost')
+	parser.add_argument('--repeat', type=int, default=3, help='Runs per scenario, the median is reported')
+	parser.add_argument('--top', type=int, default=10, help='Slowest modules of the plain import to list')
+	parser.add_argument('--budget', type=float, default=None, help='Exit non-zero when the plain import takes longer than this many seconds')
+	bench_args = parser.parse_args()
+
+	failures = []
+	with tempfile.TemporaryDirectory() as workdir:
+		effects = json.loads(python(SIDE_EFFECTS % (HEAVY,), workdir).stdout)
+		if effects['environ'] or effects['level'][0] != effects['level'][1] or effects['heavy']:
+			failures.append(f'import side effects: {effects}')
+
+		help_runs = []
+		for _ in range(bench_args.repeat):
+			started = time.perf_counter()
+			subprocess.run([sys.executable, str(ROOT / 'ad_generator.py'), '--help'], cwd=workdir, capture_output=True, check=True)
+			help_runs.append(time.perf_counter() - started)
+		print(f'{"--help":>10}: wall {statistics.median(help_runs):5.2f}s')
+
+		plain_rows: list = []
+		plain_import = 0.0
+		for name, (code, loads, avoids) in SCENARIOS.items():
+			runs = [run_scenario(code, workdir) for _ in range(bench_args.repeat)]
+			wall = statistics.median(run[0] for run in runs)
+			imported = statistics.median(run[1] for run in runs)
+			loaded = runs[-1][2]
+			print(f'{name:>10}: wall {wall:5.2f}s  imports {imported:5.2f}s  loaded: {", ".join(m for m in HEAVY if loaded[m]) or "nothing heavy"}')
+			failures += [f'{name} did not load {module}' for module in loads if not loaded[module]]
+			failures += [f'{name} loaded {module}' for module in avoids if loaded[module]]
+			if name == 'import':
+				plain_rows, plain_import = runs[-1][3], imported
+
+	print('\nSlowest modules under a plain import (self time):')
+	for own, cumulative, name in sorted(plain_rows, reverse=True)[: bench_args.top]:
+		print(f'   {own / 1000:7.1f}ms self  {cumulative / 1000:7.1f}ms cumulative  {name.strip()}')
+
+	if bench_args.budget is not None and plain_import > bench_args.budget:
+		failures.append(f'import ad_generator took {plain_import:.2f}s, over the {bench_args.budget:.2f}s budget')
+	if failures:
+		print('\n❌ ' + '\n❌ '.join(failures))
+		sys.exit(1)
+	print('\n✅ No import side effects, every scenario loaded only what it needs')
+
+
+if __name__ == '__main__':
+	main()
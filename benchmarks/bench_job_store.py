@@ -0,0 +1,111 @@
+"""Benchmark: resuming an interrupted TikTok run from the job store vs starting over.
+
+Runs ``create_multiple_ads`` in TikTok mode against fake backends with a job
+store, and kills it as soon as the store shows ``--interrupt-at`` ads done, while
+the rest have Veo jobs rendering. It then finishes the run twice,
+each time in a fresh process state (new fake client, as after a crash): once
+with ``resume=True``, once from scratch. The report shows the Gemini calls and
+wall time each needed, and checks that resuming re-submitted no Veo job that
+was already paid for.
+
+Usage:
+	python benchmarks/bench_job_store.py --count 8 --interrupt-at 3
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakes import BackendProfile, FakeAgent, FakeBrowserSession, FakeGenaiClient
+from harness import patched, unthrottled_gateway
+
+URL = 'https://example.test/'
+
+
+async def attempt(ad_generator, profile: BackendProfile, count: int, store, resume: bool, interrupt_at: int | None = None) -> tuple[float, FakeGenaiClient]:
+	from veo_poller import OperationPoller
+
+	client = FakeGenaiClient(profile)
+	poller = functools.partial(OperationPoller, min_interval=0.01, max_interval=0.1, expected_duration=profile.render.mean, max_requests_per_second=0)
+	with patched(
+		ad_generator,
+		Agent=functools.partial(FakeAgent, profile=profile),
+		BrowserSession=functools.partial(FakeBrowserSession, profile),
+		get_client=lambda api_key=None: client,
+		OperationPoller=poller,
+		open_file=lambda path: None,
+		_gateway=unthrottled_gateway(profile),
+	):
+		analyzer = ad_generator.LandingPageAnalyzer(fast_path_threshold=None)
+		started = time.perf_counter()
+		run = asyncio.create_task(ad_generator.create_multiple_ads(URL, mode='tiktok', count=count, analyzer=analyzer, store=store, resume=resume))
+		if interrupt_at is not None:
+			# Kill the run like a crash would, between two steps, once enough ads are recorded as done
+			while not run.done() and done_ads(store) < interrupt_at:
+				await asyncio.sleep(0.005)
+			run.cancel()
+		with contextlib.suppress(asyncio.CancelledError):
+			await run
+		return time.perf_counter() - started, client
+
+
+def done_ads(store) -> int:
+	job = store.latest_unfinished(URL, 'tiktok')
+	return 0 if job is None else sum(record.status == 'done' for record in job.ads().values())
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Compare resuming an interrupted run with starting over')
+	parser.add_argument('--count', type=int, default=8, help='TikTok ads in the run')
+	parser.add_argument('--interrupt-at', type=int, default=3, help='Ads done when the first attempt is killed')
+	parser.add_argument('--scale', type=float, default=1.0, help='Multiplier on every fake latency')
+	bench_args = parser.parse_args()
+
+	import ad_generator
+	from job_store import JobStore
+
+	ad_generator.preload('tiktok', browser=True)
+
+	# Renders take most of the time, the same as with the real Veo
+	profile = BackendProfile.build(scale=bench_args.scale, jitter=0.5)
+
+	with tempfile.TemporaryDirectory() as workdir:
+		os.chdir(workdir)
+		with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+			store = JobStore('resume.sqlite3')
+			killed_after, _ = asyncio.run(attempt(ad_generator, profile, bench_args.count, store, resume=False, interrupt_at=bench_args.interrupt_at))
+			before = {record.ad_id: record for record in store.latest_unfinished(URL, 'tiktok').ads().values()}
+			resumed, resumed_client = asyncio.run(attempt(ad_generator, profile, bench_args.count, store, resume=True))
+			job_status = store._db.execute('SELECT status FROM runs ORDER BY id DESC LIMIT 1').fetchone()[0]
+			store.close()
+
+			fresh_store = JobStore('fresh.sqlite3')
+			restarted, restarted_client = asyncio.run(attempt(ad_generator, profile, bench_args.count, fresh_store, resume=False))
+			fresh_store.close()
+		os.chdir(ROOT)
+
+	finished = len([r for r in before.values() if r.status == 'done'])
+	rendering = len([r for r in before.values() if r.status == 'submitted'])
+	assert finished >= bench_args.interrupt_at and rendering > 0, (finished, rendering)
+	assert job_status == 'done', job_status
+	assert resumed_client.calls['veo-3.1-generate-preview'] == bench_args.count - finished - rendering, resumed_client.calls
+	print(f'Interrupted after {killed_after:.2f}s with {finished} ads done and {rendering} Veo jobs rendering (of {bench_args.count})')
+	for label, wall, client in (('resume', resumed, resumed_client), ('start over', restarted, restarted_client)):
+		print(
+			f'{label:>10}: wall {wall:5.2f}s  veo submissions {client.calls["veo-3.1-generate-preview"]:3d}  '
+			f'text calls {client.calls["gemini-2.5-pro"]:3d}  status polls {client.calls["operations"]:4d}'
+		)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,129 @@
+"""Benchmark: per-ad inline screenshots vs one prepared, uploaded reference image per URL.
+
+"before" reproduces the old path: every ad opens the full-resolution screenshot,
+centre-crops it and sends it inline as PNG. "after" uses ReferenceImages, which
+prepares the screenshot once (crop, downsize, JPEG) and uploads it once. The fake
+client charges each request ``--base-latency`` plus its payload over ``--bandwidth``,
+and bytes uploaded plus per-ad latency are reported for both.
+
+Usage:
+	python benchmarks/bench_reference_image.py --count 20 --width 2560 --height 1600
+"""
+
+import argparse
+import asyncio
+import io
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from reference_image import ReferenceImages
+
+
+def _payload_bytes(contents) -> int:
+	total = 0
+	for item in contents:
+		if isinstance(item, str):
+			total += len(item.encode())
+		elif isinstance(item, bytes):
+			total += len(item)
+		elif getattr(item, 'inline_data', None) is not None:
+			total += len(item.inline_data.data)
+		elif getattr(item, 'file_data', None) is not None:
+			total += len(item.file_data.file_uri or '')
+	return total
+
+
+class BandwidthClient:
+	"""Fake genai client whose request latency grows with the bytes sent"""
+
+	def __init__(self, base_latency: float, bandwidth: float):
+		self.base_latency = base_latency
+		self.bandwidth = bandwidth
+		self.bytes_sent = 0
+		self.aio = SimpleNamespace(
+			models=SimpleNamespace(generate_content=self._generate_content),
+			files=SimpleNamespace(upload=self._upload),
+		)
+
+	async def _transfer(self, size: int):
+		self.bytes_sent += size
+		await asyncio.sleep(self.base_latency + size / self.bandwidth)
+
+	async def _generate_content(self, model: str, contents):
+		await self._transfer(_payload_bytes(contents))
+		return SimpleNamespace(candidates=[])
+
+	async def _upload(self, file, config):
+		await self._transfer(len(file.getvalue()))
+		return SimpleNamespace(uri='https://example.invalid/files/reference', mime_type=config['mime_type'])
+
+
+def _legacy_inline(path: Path) -> bytes:
+	from PIL import Image
+
+	img = Image.open(path)
+	w, h = img.size
+	side = min(w, h)
+	img = img.crop(((w - side) // 2, (h - side) // 2, (w + side) // 2, (h + side) // 2))
+	buffer = io.BytesIO()
+	img.save(buffer, format='PNG')
+	return buffer.getvalue()
+
+
+async def run(strategy: str, screenshot: Path, count: int, base_latency: float, bandwidth: float) -> dict:
+	client = BandwidthClient(base_latency, bandwidth)
+	references = ReferenceImages(client)
+	latencies: list[float] = []
+
+	async def one_ad():
+		start = time.perf_counter()
+		if strategy == 'before':
+			reference = await asyncio.to_thread(_legacy_inline, screenshot)
+		else:
+			reference = await references.get(screenshot)
+		await client.aio.models.generate_content(model='gemini-2.5-flash-image', contents=['prompt', reference])
+		latencies.append(time.perf_counter() - start)
+
+	start = time.perf_counter()
+	await asyncio.gather(*(one_ad() for _ in range(count)))
+	return {
+		'strategy': strategy,
+		'wall': time.perf_counter() - start,
+		'bytes': client.bytes_sent,
+		'p50': statistics.median(latencies),
+		'max': max(latencies),
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Compare inline per-ad screenshots with one uploaded reference')
+	parser.add_argument('--count', type=int, default=20)
+	parser.add_argument('--width', type=int, default=2560)
+	parser.add_argument('--height', type=int, default=1600)
+	parser.add_argument('--base-latency', type=float, default=0.2)
+	parser.add_argument('--bandwidth', type=float, default=5e6, help='Simulated upload bytes/second')
+	bench_args = parser.parse_args()
+
+	from PIL import Image
+
+	with tempfile.TemporaryDirectory() as tmp:
+		screenshot = Path(tmp) / 'landing_page.png'
+		# Noise compresses badly, like a busy real page
+		Image.effect_noise((bench_args.width, bench_args.height), 64).convert('RGB').save(screenshot)
+		print(f'screenshot: {bench_args.width}x{bench_args.height}, {screenshot.stat().st_size / 1024:.0f} KB')
+		for strategy in ('before', 'after'):
+			stats = asyncio.run(run(strategy, screenshot, bench_args.count, bench_args.base_latency, bench_args.bandwidth))
+			print(
+				f'{stats["strategy"]:>6}: {stats["bytes"] / 1024:8.0f} KB sent, per-ad p50 {stats["p50"]:.2f}s '
+				f'max {stats["max"]:.2f}s, wall {stats["wall"]:.2f}s'
+			)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,136 @@
+"""Benchmark: gather-then-report vs streaming completions in create_multiple_ads.
+
+Runs ``create_multiple_ads`` for ``--count`` Instagram ads against fake
+backends, whose image model returns ``--image-mb`` payloads (distinct, fully
+written bytes, so they really occupy memory). It compares the two modes:
+
+* ``gather``: every ad task starts at once, and ads are opened and reported
+  after the slowest one
+* ``stream``: at most ``--max-in-flight`` generations at a time, each ad saved,
+  reported and opened as it lands
+
+Each mode runs in a fresh subprocess, so peak RSS is its own. The report shows
+time to the first ad (the first ``open_file``), wall time, peak RSS, and the
+most image requests in flight at once. It checks that both modes produce the
+same number of ads.
+
+Usage:
+	python benchmarks/bench_streaming.py --count 64 --image-mb 4 --max-in-flight 8
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakes import BackendProfile, FakeAgent, FakeBrowserSession, FakeGenaiClient
+from harness import RESULT_PREFIX, patched, peak_rss_mb, unthrottled_gateway
+
+URL = 'https://example.test/'
+
+
+def instrument(client: FakeGenaiClient, payload_bytes: int, stats: dict):
+	"""Count image requests in flight and give every image a distinct payload of payload_bytes"""
+	generate_content = client.aio.models.generate_content
+
+	async def counted(model, contents, config=None, **kwargs):
+		if 'image' not in model:
+			return await generate_content(model, contents, config=config, **kwargs)
+		stats['in_flight'] += 1
+		stats['peak_in_flight'] = max(stats['peak_in_flight'], stats['in_flight'])
+		try:
+			response = await generate_content(model, contents, config=config, **kwargs)
+		finally:
+			stats['in_flight'] -= 1
+		stats['images'] += 1
+		response.candidates[0].content.parts[0].inline_data.data = bytes([stats['images'] % 256]) * payload_bytes
+		return response
+
+	client.aio.models.generate_content = counted
+
+
+async def run_cell(bench_args) -> dict:
+	import ad_generator
+
+	ad_generator.preload('instagram', browser=True)
+	profile = BackendProfile.build(scale=bench_args.scale, jitter=1.0)
+	client = FakeGenaiClient(profile)
+	stats = {'in_flight': 0, 'peak_in_flight': 0, 'images': 0}
+	instrument(client, int(bench_args.image_mb * 1024 * 1024), stats)
+	opened = []
+
+	with patched(
+		ad_generator,
+		Agent=functools.partial(FakeAgent, profile=profile),
+		BrowserSession=functools.partial(FakeBrowserSession, profile),
+		get_client=lambda api_key=None: client,
+		open_file=lambda path: opened.append(time.perf_counter()),
+		_gateway=unthrottled_gateway(profile),
+	):
+		analyzer = ad_generator.LandingPageAnalyzer(fast_path_threshold=None)
+		started = time.perf_counter()
+		results = await ad_generator.create_multiple_ads(
+			URL,
+			count=bench_args.count,
+			analyzer=analyzer,
+			stream=bench_args.cell == 'stream',
+			max_in_flight=bench_args.max_in_flight,
+			max_buffered=bench_args.max_buffered,
+		)
+		wall = time.perf_counter() - started
+	return {
+		'ads': len(results),
+		'wall': wall,
+		'first_ad': min(opened) - started if opened else None,
+		'peak_rss_mb': peak_rss_mb(),
+		'peak_in_flight': stats['peak_in_flight'],
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Compare gathering every ad with streaming completions')
+	parser.add_argument('--count', type=int, default=64, help='Instagram ads in the run')
+	parser.add_argument('--image-mb', type=float, default=4.0, help='Size of every fake image payload')
+	parser.add_argument('--max-in-flight', type=int, default=8)
+	parser.add_argument('--max-buffered', type=int, default=2)
+	parser.add_argument('--scale', type=float, default=2.0, help='Multiplier on every fake latency')
+	parser.add_argument('--cell', choices=['gather', 'stream'], help=argparse.SUPPRESS)
+	bench_args = parser.parse_args()
+
+	if bench_args.cell:
+		with tempfile.TemporaryDirectory() as workdir:
+			os.chdir(workdir)
+			# The code under test prints progress for every ad, keep the output readable
+			with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+				result = asyncio.run(run_cell(bench_args))
+			os.chdir(ROOT)
+		print(RESULT_PREFIX + json.dumps(result))
+		return
+
+	results = {}
+	for cell in ('gather', 'stream'):
+		output = subprocess.run([sys.executable, __file__, *sys.argv[1:], '--cell', cell], capture_output=True, text=True, check=True).stdout
+		results[cell] = json.loads(next(line for line in output.splitlines() if line.startswith(RESULT_PREFIX))[len(RESULT_PREFIX) :])
+	assert results['gather']['ads'] == results['stream']['ads'] == bench_args.count, results
+
+	print(f'{bench_args.count} Instagram ads of {bench_args.image_mb:g} MB, streaming with {bench_args.max_in_flight} in flight and {bench_args.max_buffered} buffered')
+	for cell, result in results.items():
+		print(
+			f'{cell:>7}: first ad {result["first_ad"]:6.2f}s  wall {result["wall"]:6.2f}s  '
+			f'peak RSS {result["peak_rss_mb"]:7.0f} MB  image requests in flight {result["peak_in_flight"]:3d}'
+		)
+
+
+if __name__ == '__main__':
+	main()
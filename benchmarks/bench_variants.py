@@ -0,0 +1,141 @@
+"""Benchmark: placement variants made on the event loop vs in the process pool.
+
+Runs ``create_multiple_ads`` in Instagram mode against fake backends. The fake
+image model returns real PNGs of ``--image-size``, and ad arrivals are spread
+out by latency jitter. Three runs are compared:
+
+* ``none``: no variants, the baseline
+* ``inline``: every ad's variants rendered with PIL right on the event loop
+* ``pool``: ``VariantPipeline``, rendered in worker processes as ads arrive
+
+Each run reports wall time, how long the event loop was blocked (late wake-ups
+of a 10 ms ticker, summed and the worst), and the longest any ad waited for
+room in the bounded variant queue. The pool run then checks the manifest:
+every ad has a ``variants`` line with each placement in each format plus a
+thumbnail, at the expected sizes, and the files decode.
+
+Usage:
+	python benchmarks/bench_variants.py --count 8 --workers 4 --image-size 1024
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakes import BackendProfile, FakeAgent, FakeBrowserSession, FakeGenaiClient
+from harness import LoopMonitor, patched, unthrottled_gateway
+from image_variants import DEFAULT_FORMATS, DEFAULT_PLACEMENTS, VariantPipeline, render_variants
+from output_store import OutputStore
+
+URL = 'https://example.test/'
+
+
+class InlineVariants(VariantPipeline):
+	"""Variants rendered right on the event loop as each ad is saved, what the pipeline avoids"""
+
+	async def submit(self, ad_path, url, ad_id=None):
+		await self.make(Path(ad_path), url, ad_id)
+
+	async def _render(self, ad_path):
+		return render_variants(str(ad_path), self.placements, self.formats, self.thumbnail_width)
+
+
+async def run(ad_generator, scenario: str, bench_args) -> dict:
+	profile = BackendProfile.build(scale=bench_args.scale, jitter=1.0, image_size=(bench_args.image_size, bench_args.image_size))
+	client = FakeGenaiClient(profile)
+	store = OutputStore(Path(scenario))
+	variants = None
+	if scenario == 'inline':
+		variants = InlineVariants(store, workers=1)
+	elif scenario == 'pool':
+		variants = VariantPipeline(store, workers=bench_args.workers)
+
+	with patched(
+		ad_generator,
+		Agent=functools.partial(FakeAgent, profile=profile),
+		BrowserSession=functools.partial(FakeBrowserSession, profile),
+		get_client=lambda api_key=None: client,
+		open_file=lambda path: None,
+		_gateway=unthrottled_gateway(profile),
+		_output_store=store,
+	):
+		analyzer = ad_generator.LandingPageAnalyzer(fast_path_threshold=None)
+		monitor = LoopMonitor()
+		monitor.start()
+		started = time.perf_counter()
+		results = await ad_generator.create_multiple_ads(URL, count=bench_args.count, analyzer=analyzer, variants=variants)
+		wall = time.perf_counter() - started
+		await monitor.stop()
+	if variants is not None:
+		await variants.close()
+	return {
+		'ads': len(results),
+		'wall': wall,
+		'blocked': monitor.blocked,
+		'max_lag': monitor.max_lag,
+		'stats': variants.stats if variants else None,
+		'store': store,
+	}
+
+
+def check_manifest(store: OutputStore, count: int):
+	from PIL import Image
+
+	records = list(store.records('variants'))
+	assert len(records) == count, f'{len(records)} variants lines for {count} ads'
+	ads = {record['ad'] for record in store.records('ad')}
+	expected = {(p.name, p.width, p.height, fmt) for p in DEFAULT_PLACEMENTS for fmt in DEFAULT_FORMATS}
+	for record in records:
+		assert record['ad'] in ads, record['ad']
+		full = {(v['placement'], v['width'], v['height'], v['format']) for v in record['variants'] if not v['thumbnail']}
+		assert full == expected, full
+		assert len([v for v in record['variants'] if v['thumbnail']]) == len(DEFAULT_PLACEMENTS)
+		for variant in record['variants']:
+			with Image.open(variant['path']) as image:
+				assert image.size == (variant['width'], variant['height']), (variant, image.size)
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Compare making ad variants on the event loop with the process pool')
+	parser.add_argument('--count', type=int, default=8, help='Instagram ads in the run')
+	parser.add_argument('--workers', type=int, default=4, help='Variant worker processes')
+	parser.add_argument('--image-size', type=int, default=1024, help='Side of the square PNG the fake image model returns')
+	parser.add_argument('--scale', type=float, default=4.0, help='Multiplier on every fake latency')
+	bench_args = parser.parse_args()
+
+	import ad_generator
+
+	ad_generator.preload('instagram', browser=True)
+
+	with tempfile.TemporaryDirectory() as workdir:
+		os.chdir(workdir)
+		results = {}
+		for scenario in ('none', 'inline', 'pool'):
+			# The code under test prints progress for every ad, keep the output readable
+			with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+				results[scenario] = asyncio.run(run(ad_generator, scenario, bench_args))
+			assert results[scenario]['ads'] == bench_args.count, results[scenario]
+		check_manifest(results['pool']['store'], bench_args.count)
+		os.chdir(ROOT)
+
+	print(f'{bench_args.count} Instagram ads of {bench_args.image_size}x{bench_args.image_size}, {bench_args.workers} variant workers')
+	for scenario, result in results.items():
+		stats = result['stats']
+		made = f'  {stats.variants:4d} variants' if stats else ''
+		waited = f'  max queue wait {max(stats.queue_waits):.2f}s' if stats and stats.queue_waits and scenario == 'pool' else ''
+		print(f'{scenario:>7}: wall {result["wall"]:6.2f}s  loop blocked {result["blocked"] * 1000:7.0f}ms  max lag {result["max_lag"] * 1000:6.0f}ms{made}{waited}')
+	print('✅ Every ad has its placement variants and thumbnails in the manifest')
+
+
+if __name__ == '__main__':
+	main()
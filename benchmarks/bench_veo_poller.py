@@ -0,0 +1,108 @@
+"""Benchmark: shared OperationPoller vs per-job fixed-interval polling on a simulated operation service.
+
+Each simulated Veo job finishes after a random render time. The old approach polls
+every job on its own every ``--fixed-interval`` seconds; the poller batches refreshes
+and adapts its interval. Reported: status requests issued, peak request burst per
+second, and the mean delay between a job finishing and its waiter resuming.
+
+Usage:
+	python benchmarks/bench_veo_poller.py --jobs 40 --min-duration 2 --max-duration 8
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from veo_poller import OperationPoller
+
+
+class SimulatedOperationService:
+	"""Fake ``client.aio.operations`` whose jobs complete after a fixed render time"""
+
+	def __init__(self, latency: float = 0.05):
+		self.latency = latency
+		self.finish_at: dict[str, float] = {}
+		self.requests = 0
+		self.request_seconds: Counter = Counter()
+
+	def submit(self, name: str, duration: float):
+		self.finish_at[name] = time.monotonic() + duration
+		return SimpleNamespace(name=name, done=False, error=None)
+
+	async def get(self, operation):
+		self.requests += 1
+		self.request_seconds[int(time.monotonic())] += 1
+		await asyncio.sleep(self.latency)
+		done = time.monotonic() >= self.finish_at[operation.name]
+		return SimpleNamespace(name=operation.name, done=done, error=None)
+
+
+async def _wait_fixed(service: SimulatedOperationService, operation, interval: float):
+	while not operation.done:
+		await asyncio.sleep(interval)
+		operation = await service.get(operation)
+	return operation
+
+
+async def run(strategy: str, durations: list[float], fixed_interval: float, rps: float) -> dict:
+	service = SimulatedOperationService()
+	client = SimpleNamespace(aio=SimpleNamespace(operations=service))
+	poller = OperationPoller(
+		client,
+		min_interval=0.25,
+		max_interval=fixed_interval,
+		expected_duration=sum(durations) / len(durations),
+		max_requests_per_second=rps,
+	)
+	lags: list[float] = []
+
+	async def job(i: int, duration: float):
+		name = f'operations/{i}'
+		operation = service.submit(name, duration)
+		if strategy == 'poller':
+			await poller.wait(operation, label=name)
+		else:
+			await _wait_fixed(service, operation, fixed_interval)
+		lags.append(time.monotonic() - service.finish_at[name])
+
+	start = time.monotonic()
+	await asyncio.gather(*(job(i, d) for i, d in enumerate(durations)))
+	return {
+		'strategy': strategy,
+		'wall': time.monotonic() - start,
+		'requests': service.requests,
+		'peak_rps': max(service.request_seconds.values()),
+		'mean_lag': sum(lags) / len(lags),
+		'max_lag': max(lags),
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Compare the shared Veo poller with fixed-interval polling')
+	parser.add_argument('--jobs', type=int, default=40)
+	parser.add_argument('--min-duration', type=float, default=2.0)
+	parser.add_argument('--max-duration', type=float, default=8.0)
+	parser.add_argument('--fixed-interval', type=float, default=2.0, help='Interval of the per-job loop (10s in production)')
+	parser.add_argument('--rps', type=float, default=20.0, help='Request rate cap for the poller')
+	parser.add_argument('--seed', type=int, default=7)
+	bench_args = parser.parse_args()
+
+	random.seed(bench_args.seed)
+	durations = [random.uniform(bench_args.min_duration, bench_args.max_duration) for _ in range(bench_args.jobs)]
+	for strategy in ('fixed', 'poller'):
+		stats = asyncio.run(run(strategy, durations, bench_args.fixed_interval, bench_args.rps))
+		print(
+			f'{stats["strategy"]:>7}: {stats["requests"]:4d} requests, peak {stats["peak_rps"]:3d}/s, '
+			f'lag mean {stats["mean_lag"]:.2f}s max {stats["max_lag"]:.2f}s, wall {stats["wall"]:.2f}s'
+		)
+
+
+if __name__ == '__main__':
+	main()
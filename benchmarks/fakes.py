@@ -0,0 +1,383 @@
+"""Offline stand-ins for the browser and Gemini backends used by the benchmarks.
+
+``FakeGenaiClient``, ``FakeBrowserSession`` and ``FakeAgent`` are duck-typed to
+the parts of ``genai.Client``, browser-use's ``BrowserSession`` and ``Agent`` that
+ad_generator.py and agent.py touch. Every call sleeps for a sample from a
+configurable latency distribution, can fail at a configurable rate with a
+retryable 503, and returns payloads of configurable size, so throughput can be
+measured without API quota or a real browser.
+"""
+
+import asyncio
+import io
+import itertools
+import json
+import math
+import random
+import re
+import shutil
+import tempfile
+import time
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+
+class FakeAPIError(Exception):
+	"""Stand-in for genai's APIError, carrying the HTTP status in ``code``"""
+
+	def __init__(self, code: int = 503, message: str = 'injected failure'):
+		super().__init__(f'{code} {message}')
+		self.code = code
+
+
+@dataclass
+class Latency:
+	"""Latency distribution of one fake endpoint: 'fixed', 'uniform' (±jitter) or 'lognormal' (sigma=jitter)"""
+
+	mean: float
+	jitter: float = 0.3
+	distribution: str = 'lognormal'
+	failure_rate: float = 0.0
+	rng: random.Random = field(default_factory=random.Random, repr=False)
+
+	def sample(self) -> float:
+		if self.mean <= 0 or self.distribution == 'fixed':
+			return max(self.mean, 0.0)
+		if self.distribution == 'uniform':
+			return self.mean * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+		# Lognormal with the requested mean: a long right tail like real API latency
+		sigma = self.jitter
+		return self.rng.lognormvariate(math.log(self.mean) - sigma**2 / 2, sigma)
+
+	async def wait(self):
+		await asyncio.sleep(self.sample())
+		if self.failure_rate and self.rng.random() < self.failure_rate:
+			raise FakeAPIError(503)
+
+
+@dataclass
+class BackendProfile:
+	"""Latencies (seconds) and payload sizes of every fake backend"""
+
+	text: Latency
+	image: Latency
+	video_submit: Latency
+	render: Latency
+	poll: Latency
+	upload: Latency
+	browser_start: Latency
+	browser_step: Latency
+	image_bytes: int = 1_500_000
+	# Set to a size to get a real, distinct PNG per image ad instead of image_bytes of zeros
+	image_size: tuple[int, int] | None = None
+	video_bytes: int = 6_000_000
+	screenshot_size: tuple[int, int] = (1280, 800)
+	agent_steps: int = 4
+	agent_urls: int = 1
+
+	@classmethod
+	def build(
+		cls,
+		scale: float = 1.0,
+		jitter: float = 0.3,
+		distribution: str = 'lognormal',
+		failure_rate: float = 0.0,
+		seed: int = 7,
+		**overrides,
+	) -> 'BackendProfile':
+		"""Default profile with every mean multiplied by scale (1.0 is roughly 1/100 of real API latency)"""
+		rng = random.Random(seed)
+		means = {
+			'text': 0.05,
+			'image': 0.08,
+			'video_submit': 0.03,
+			'render': 0.3,
+			'poll': 0.01,
+			'upload': 0.02,
+			'browser_start': 0.05,
+			'browser_step': 0.03,
+		}
+		# Browser and render times are not API calls that can be throttled, so they never fail
+		reliable = {'render', 'browser_start', 'browser_step'}
+		latencies = {
+			name: Latency(mean * scale, jitter, distribution, 0.0 if name in reliable else failure_rate, rng) for name, mean in means.items()
+		}
+		return cls(**latencies, **overrides)
+
+
+def _response(parts: list[Any] | None = None, text: str | None = None, contents: Any = None) -> SimpleNamespace:
+	candidates = [SimpleNamespace(content=SimpleNamespace(parts=parts))] if parts else []
+	# Token counts as Gemini reports them: about 4 characters a token, 258 per input image and 1290 per generated image
+	items = contents if isinstance(contents, list) else [contents]
+	prompt_tokens = sum(len(item) // 4 if isinstance(item, str) else 258 for item in items if item is not None)
+	output_tokens = 1290 * len(parts or []) + len(text or '') // 4
+	usage = SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens, thoughts_token_count=None)
+	return SimpleNamespace(candidates=candidates, text=text, parsed=None, usage_metadata=usage)
+
+
+class _FakeModels:
+	def __init__(self, client: 'FakeGenaiClient'):
+		self.client = client
+
+	async def generate_content(self, model: str, contents: Any, config: Any = None, **kwargs):
+		profile = self.client.profile
+		self.client.calls[model] += 1
+		if 'image' in model:
+			await profile.image.wait()
+			if profile.image_size:
+				# Bytes after IEND are ignored by decoders, the call number makes every ad's hash distinct
+				data = await asyncio.to_thread(_screenshot_png, profile.image_size) + str(sum(self.client.calls.values())).encode()
+			else:
+				data = bytes(profile.image_bytes)
+			part = SimpleNamespace(inline_data=SimpleNamespace(data=data, mime_type='image/png'))
+			return _response(parts=[part], contents=contents)
+		await profile.text.wait()
+		if config is not None:
+			# Structured concept batch
+			concepts = [f'Fake video concept {next(self.client.ids)}' for _ in range(16)]
+			return _response(text=json.dumps({'concepts': concepts}), contents=contents)
+		return _response(text='A fake video concept with a bold opening shot and a product close-up.', contents=contents)
+
+	async def generate_videos(self, model: str, prompt: str, **kwargs):
+		profile = self.client.profile
+		self.client.calls[model] += 1
+		await profile.video_submit.wait()
+		name = f'operations/fake-{next(self.client.ids)}'
+		self.client.finish_at[name] = time.monotonic() + profile.render.sample()
+		return SimpleNamespace(name=name, done=False, error=None, response=None)
+
+
+class _FakeOperations:
+	def __init__(self, client: 'FakeGenaiClient'):
+		self.client = client
+
+	async def get(self, operation):
+		profile = self.client.profile
+		self.client.calls['operations'] += 1
+		await profile.poll.wait()
+		# An operation submitted by an earlier process (a resumed run) rendered while nobody was polling
+		if time.monotonic() < self.client.finish_at.get(operation.name, 0.0):
+			return SimpleNamespace(name=operation.name, done=False, error=None, response=None)
+		video = SimpleNamespace(uri=f'https://example.invalid/{operation.name}:download', video_bytes=bytes(profile.video_bytes))
+		return SimpleNamespace(
+			name=operation.name,
+			done=True,
+			error=None,
+			response=SimpleNamespace(generated_videos=[SimpleNamespace(video=video)]),
+		)
+
+
+class _FakeFiles:
+	def __init__(self, client: 'FakeGenaiClient'):
+		self.client = client
+
+	async def upload(self, file, config=None, **kwargs):
+		self.client.calls['files'] += 1
+		await self.client.profile.upload.wait()
+		mime_type = (config or {}).get('mime_type', 'application/octet-stream')
+		return SimpleNamespace(uri=f'https://example.invalid/files/{next(self.client.ids)}', mime_type=mime_type)
+
+
+class FakeGenaiClient:
+	"""Stand-in for genai.Client: only the ``aio`` surface ad_generator uses"""
+
+	def __init__(self, profile: BackendProfile):
+		from collections import Counter
+
+		self.profile = profile
+		self.calls: Counter = Counter()
+		self.ids = itertools.count(1)
+		self.finish_at: dict[str, float] = {}
+		self.aio = SimpleNamespace(models=_FakeModels(self), operations=_FakeOperations(self), files=_FakeFiles(self))
+
+
+_screenshots: dict[tuple[int, int], bytes] = {}
+
+
+def _screenshot_png(size: tuple[int, int]) -> bytes:
+	"""A noisy PNG of the given size, encoded once per size"""
+	if size not in _screenshots:
+		from PIL import Image
+
+		buffer = io.BytesIO()
+		Image.effect_noise(size, 48).convert('RGB').save(buffer, format='PNG')
+		_screenshots[size] = buffer.getvalue()
+	return _screenshots[size]
+
+
+class FakeBrowserSession:
+	"""Stand-in for BrowserSession: tracks the current URL and writes a canned screenshot"""
+
+	def __init__(self, profile: BackendProfile, **kwargs):
+		self.profile = profile
+		self.options = kwargs
+		self.url = 'about:blank'
+		self.started = False
+		cdp_send = SimpleNamespace(Runtime=SimpleNamespace(evaluate=self._evaluate))
+		self._cdp_session = SimpleNamespace(cdp_client=SimpleNamespace(send=cdp_send), session_id='fake')
+
+	async def start(self):
+		if not self.started:
+			await self.profile.browser_start.wait()
+			self.started = True
+
+	async def kill(self):
+		self.started = False
+
+	async def get_current_page_url(self) -> str:
+		return self.url
+
+	async def get_or_create_cdp_session(self):
+		return self._cdp_session
+
+	async def _evaluate(self, params: dict, session_id: str | None = None) -> dict:
+		state = {'ready': 'complete', 'nodes': 1200, 'resources': 40}
+		return {'result': {'value': json.dumps(state)}}
+
+	async def take_screenshot(self, path: str | None = None, full_page: bool = False) -> bytes:
+		data = await asyncio.to_thread(_screenshot_png, self.profile.screenshot_size)
+		if path:
+			await asyncio.to_thread(Path(path).write_bytes, data)
+		return data
+
+	async def clear_cookies(self):
+		pass
+
+	async def new_page(self, url: str = 'about:blank'):
+		self.url = url
+		return SimpleNamespace(url=url)
+
+	async def get_pages(self) -> list:
+		return []
+
+	async def close_page(self, page):
+		pass
+
+
+class _FakeAction:
+	def __init__(self, name: str, params: dict):
+		self.name = name
+		self.params = params
+
+	def model_dump(self, exclude_unset: bool = False, exclude_none: bool = False, mode: str = 'python') -> dict:
+		return {self.name: self.params}
+
+
+class _FakeBrain:
+	def __init__(self, next_goal: str):
+		self.next_goal = next_goal
+
+	def __str__(self) -> str:
+		return f'thinking=None evaluation_previous_goal=\'Success\' memory=\'\' next_goal={self.next_goal!r}'
+
+
+class _FakeHistoryItem:
+	"""One step shaped like browser-use's AgentHistory (state, model_output, result, metadata)"""
+
+	def __init__(self, url: str, action: _FakeAction, step: int, started: float, ended: float, done: bool, result: str | None, screenshot_path: str | None):
+		extracted = result if done else f'Extracted text from {url} at step {step}. ' * 8
+		self.state = SimpleNamespace(url=url, title=f'Page {step}', screenshot_path=screenshot_path)
+		self.model_output = SimpleNamespace(action=[action], current_state=_FakeBrain(f'Step {step}: look for the next piece of information on {url}.'))
+		self.result = [SimpleNamespace(extracted_content=extracted, error=None, is_done=done, success=True if done else None)]
+		self.metadata = SimpleNamespace(step_number=step, step_start_time=started, step_end_time=ended, duration_seconds=ended - started)
+
+	def model_dump(self) -> dict:
+		brain = self.model_output.current_state
+		return {
+			'model_output': {'evaluation_previous_goal': 'Success', 'memory': '', 'next_goal': brain.next_goal, 'action': [a.model_dump() for a in self.model_output.action]},
+			'result': [{k: v for k, v in vars(r).items() if v is not None} for r in self.result],
+			'state': {'tabs': [], 'screenshot_path': self.state.screenshot_path, 'interacted_element': [None], 'url': self.state.url, 'title': self.state.title},
+			'metadata': {k: v for k, v in vars(self.metadata).items() if k != 'duration_seconds'},
+			'state_message': f'<browser_state>{self.state.url}</browser_state>',
+		}
+
+
+class FakeHistory:
+	"""The AgentHistoryList methods agent.py and ad_generator.py read"""
+
+	def __init__(self):
+		self.history: list[_FakeHistoryItem] = []
+
+	def _last_result(self):
+		return self.history[-1].result[-1] if self.history and self.history[-1].result else None
+
+	def is_done(self) -> bool:
+		last = self._last_result()
+		return bool(last and last.is_done)
+
+	def is_successful(self) -> bool | None:
+		last = self._last_result()
+		return last.success if last and last.is_done else None
+
+	def total_duration_seconds(self) -> float:
+		return sum(step.metadata.duration_seconds for step in self.history)
+
+	def number_of_steps(self) -> int:
+		return len(self.history)
+
+	def urls(self) -> list[str]:
+		return [step.state.url for step in self.history]
+
+	def action_names(self) -> list[str]:
+		return [next(iter(action.model_dump())) for step in self.history for action in step.model_output.action]
+
+	def extracted_content(self) -> list[str]:
+		return [r.extracted_content for step in self.history for r in step.result if r.extracted_content]
+
+	def model_thoughts(self) -> list[_FakeBrain]:
+		return [step.model_output.current_state for step in self.history]
+
+	def errors(self) -> list[str | None]:
+		return [next((r.error for r in step.result if r.error), None) for step in self.history]
+
+	def final_result(self) -> str | None:
+		last = self._last_result()
+		return last.extracted_content if last else None
+
+
+class FakeAgent:
+	"""Stand-in for browser-use's Agent: takes profile.agent_steps steps across profile.agent_urls pages"""
+
+	RESULT = 'Brand: Example\nTagline: Fake tagline for benchmarks\nCTA: Try it free\nPricing: $9/month'
+
+	def __init__(self, task: str, profile: BackendProfile, llm: Any = None, browser_session: FakeBrowserSession | None = None, **kwargs):
+		self.task = task
+		self.profile = profile
+		self.browser_session = browser_session or FakeBrowserSession(profile)
+		self.history = FakeHistory()
+		match = re.search(r'https?://\S+', task)
+		self.start_url = match.group(0) if match else 'https://news.ycombinator.com/'
+		# Like browser-use, every step leaves a screenshot file in a per-agent temp directory
+		self.screenshot_dir = Path(tempfile.mkdtemp(prefix='fake_agent_'))
+		weakref.finalize(self, shutil.rmtree, self.screenshot_dir, True)
+
+	def _step_url(self, step: int) -> str:
+		page = step * self.profile.agent_urls // max(self.profile.agent_steps, 1)
+		return self.start_url if page == 0 else f'{self.start_url.rstrip("/")}/page-{page}'
+
+	async def run(self, max_steps: int = 100, on_step_start=None, on_step_end=None) -> FakeHistory:
+		await self.browser_session.start()
+		steps = min(self.profile.agent_steps, max_steps)
+		for step in range(steps):
+			if on_step_start is not None:
+				await on_step_start(self)
+			started = time.time()
+			await self.profile.browser_step.wait()
+			url = self._step_url(step)
+			done = step == steps - 1
+			if step == 0 or url != self.browser_session.url:
+				action = _FakeAction('go_to_url', {'url': url})
+			elif done:
+				action = _FakeAction('done', {'text': self.RESULT})
+			else:
+				action = _FakeAction('scroll', {'down': True, 'num_pages': 0.5})
+			self.browser_session.url = url
+			screenshot = str(self.screenshot_dir / f'step_{step + 1}.png')
+			await self.browser_session.take_screenshot(screenshot)
+			self.history.history.append(_FakeHistoryItem(url, action, step + 1, started, time.time(), done, self.RESULT, screenshot))
+			if on_step_end is not None:
+				await on_step_end(self)
+		return self.history
@@ -0,0 +1,325 @@
+"""Offline throughput harness for ad_generator.py and agent.py.
+
+The real ``Agent``, ``BrowserSession``, ``genai.Client`` and ``ChatGoogle`` are
+swapped for the stand-ins in fakes.py. The harness then runs a grid:
+
+* ``ads``: ``create_multiple_ads`` for each of ``urls`` landing pages at once,
+  ``count`` ads per page
+* ``batch``: ``create_ads_for_urls`` over ``urls`` pages, ``count`` ads per page
+* ``agent``: ``agent.main`` with a fake agent taking ``count`` steps across
+  ``urls`` pages (throughput is in steps/s)
+* ``tasks``: ``agent.run_tasks`` over ``urls`` research tasks of ``count``
+  steps each, all concurrent on pooled fake browsers (throughput is in steps/s)
+
+Each cell runs in a fresh subprocess, so peak RSS is per cell. Every cell
+reports wall time, throughput, peak RSS and event-loop blocking time (how late
+a 10 ms ticker woke up, summed). ``--save-baseline`` stores the results, and
+``--baseline`` compares against them, exiting non-zero when wall time or peak
+RSS regress by more than ``--tolerance``.
+
+Usage:
+	python benchmarks/harness.py --counts 1,4,16 --url-counts 1,4 --modes instagram,tiktok
+	python benchmarks/harness.py --save-baseline benchmarks/baseline.json
+	python benchmarks/harness.py --baseline benchmarks/baseline.json --tolerance 0.25
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakes import BackendProfile, FakeAgent, FakeBrowserSession, FakeGenaiClient
+
+RESULT_PREFIX = 'HARNESS_RESULT '
+
+
+class LoopMonitor:
+	"""Measure how late a periodic ticker wakes up, i.e. how long the event loop was blocked"""
+
+	def __init__(self, interval: float = 0.01):
+		self.interval = interval
+		self.blocked = 0.0
+		self.max_lag = 0.0
+		self._task: asyncio.Task | None = None
+
+	async def _tick(self):
+		while True:
+			expected = time.perf_counter() + self.interval
+			await asyncio.sleep(self.interval)
+			lag = time.perf_counter() - expected
+			if lag > 0:
+				self.blocked += lag
+				self.max_lag = max(self.max_lag, lag)
+
+	def start(self):
+		self._task = asyncio.create_task(self._tick())
+
+	async def stop(self):
+		if self._task is not None:
+			self._task.cancel()
+			with contextlib.suppress(asyncio.CancelledError):
+				await self._task
+
+
+def peak_rss_mb() -> float:
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# kilobytes on Linux, bytes on macOS
+	return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+@contextlib.contextmanager
+def patched(module, **attributes):
+	original = {name: getattr(module, name) for name in attributes}
+	for name, value in attributes.items():
+		setattr(module, name, value)
+	try:
+		yield
+	finally:
+		for name, value in original.items():
+			setattr(module, name, value)
+
+
+def unthrottled_gateway(profile: BackendProfile):
+	from gemini_client import DEFAULT_RATE_LIMITS, GeminiGateway
+
+	return GeminiGateway(
+		rate_limits=dict.fromkeys(DEFAULT_RATE_LIMITS, 1e6),
+		default_rate=1e6,
+		base_delay=profile.text.mean,
+		initial_concurrency=64,
+		max_concurrency=256,
+	)
+
+
+def _import_target(scenario: str, mode: str):
+	"""Import the module under test, outside the timed region (browser-use alone takes seconds to import)"""
+	if scenario in ('agent', 'tasks'):
+		import agent
+
+		return agent
+	import ad_generator
+
+	# What the CLI preloads before its event loop, the cells analyze with the (fake) browser agent
+	ad_generator.preload(mode, browser=True)
+	return ad_generator
+
+
+async def _run_ads(ad_generator, scenario: str, mode: str, count: int, urls: int, profile: BackendProfile, real_limits: bool) -> int:
+	from veo_poller import OperationPoller
+
+	client = FakeGenaiClient(profile)
+	gateway = ad_generator.GeminiGateway() if real_limits else unthrottled_gateway(profile)
+	# Poll on the fake render timescale instead of the production one (tens of seconds)
+	poller = functools.partial(
+		OperationPoller,
+		min_interval=max(profile.render.mean / 10, 0.005),
+		max_interval=max(profile.render.mean, 0.01),
+		expected_duration=profile.render.mean,
+		max_requests_per_second=0,
+	)
+	with patched(
+		ad_generator,
+		Agent=functools.partial(FakeAgent, profile=profile),
+		BrowserSession=functools.partial(FakeBrowserSession, profile),
+		get_client=lambda api_key=None: client,
+		OperationPoller=poller,
+		open_file=lambda path: None,
+		_gateway=gateway,
+	):
+		analyzer = ad_generator.LandingPageAnalyzer(fast_path_threshold=None)
+		page_urls = [f'https://example{i}.test/' for i in range(urls)]
+		if scenario == 'batch':
+			urls_file = Path('urls.txt')
+			urls_file.write_text('\n'.join(page_urls) + '\n')
+			stats = await ad_generator.create_ads_for_urls(str(urls_file), mode=mode, count=count, analyzer=analyzer)
+			return stats.ads_ok
+
+		results = await asyncio.gather(
+			*(ad_generator.create_multiple_ads(url, mode=mode, count=count, analyzer=analyzer) for url in page_urls),
+			return_exceptions=True,
+		)
+		ok = 0
+		for result in results:
+			if isinstance(result, list):
+				ok += len(result)
+			elif isinstance(result, str):
+				ok += 1
+		return ok
+
+
+async def _run_agent(agent, count: int, urls: int, profile: BackendProfile) -> int:
+	profile.agent_steps = count
+	profile.agent_urls = urls
+	with patched(agent, Agent=functools.partial(FakeAgent, profile=profile), ChatGoogle=lambda **kwargs: None):
+		await agent.main()
+	return count
+
+
+async def _run_tasks(agent, count: int, tasks: int, profile: BackendProfile) -> int:
+	profile.agent_steps = count
+	with patched(
+		agent,
+		Agent=functools.partial(FakeAgent, profile=profile),
+		BrowserSession=functools.partial(FakeBrowserSession, profile),
+		ChatGoogle=lambda **kwargs: None,
+	):
+		rows = await agent.run_tasks([f'research task {i}' for i in range(tasks)], concurrency=tasks)
+	return sum(row['steps'] for row in rows)
+
+
+async def run_cell(cell: dict) -> dict:
+	"""Run one grid cell in this process and return its measurements"""
+	profile = BackendProfile.build(
+		scale=cell['scale'],
+		jitter=cell['jitter'],
+		distribution=cell['distribution'],
+		failure_rate=cell['failure_rate'],
+		seed=cell['seed'],
+		image_bytes=cell['image_kb'] * 1024,
+		video_bytes=cell['video_kb'] * 1024,
+	)
+	module = _import_target(cell['scenario'], cell['mode'])
+	monitor = LoopMonitor()
+	monitor.start()
+	started = time.perf_counter()
+	if cell['scenario'] == 'agent':
+		done = await _run_agent(module, cell['count'], cell['urls'], profile)
+	elif cell['scenario'] == 'tasks':
+		done = await _run_tasks(module, cell['count'], cell['urls'], profile)
+	else:
+		done = await _run_ads(module, cell['scenario'], cell['mode'], cell['count'], cell['urls'], profile, cell['real_limits'])
+	wall = time.perf_counter() - started
+	await monitor.stop()
+	return {
+		**cell,
+		'done': done,
+		'wall': wall,
+		'throughput': done / wall if wall else 0.0,
+		'peak_rss_mb': peak_rss_mb(),
+		'loop_blocked': monitor.blocked,
+		'loop_max_lag': monitor.max_lag,
+	}
+
+
+def _cell_main(cell: dict):
+	with tempfile.TemporaryDirectory() as workdir:
+		os.chdir(workdir)
+		# The code under test prints progress for every ad, keep the harness output readable
+		with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+			result = asyncio.run(run_cell(cell))
+	print(RESULT_PREFIX + json.dumps(result))
+
+
+def _spawn(cell: dict) -> dict:
+	proc = subprocess.run(
+		[sys.executable, __file__, '--cell', json.dumps(cell)],
+		capture_output=True,
+		text=True,
+	)
+	for line in proc.stdout.splitlines():
+		if line.startswith(RESULT_PREFIX):
+			return json.loads(line[len(RESULT_PREFIX) :])
+	raise RuntimeError(f'cell {cell["scenario"]}/{cell["mode"]} count={cell["count"]} urls={cell["urls"]} failed:\n{proc.stderr[-2000:]}')
+
+
+def _key(result: dict) -> str:
+	return f'{result["scenario"]}/{result["mode"]}/count={result["count"]}/urls={result["urls"]}'
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+	"""Regressions of wall time or peak RSS beyond tolerance against matching baseline cells"""
+	previous = {_key(r): r for r in baseline}
+	regressions = []
+	for result in results:
+		base = previous.get(_key(result))
+		if base is None:
+			continue
+		for metric in ('wall', 'peak_rss_mb'):
+			if base[metric] and result[metric] > base[metric] * (1 + tolerance):
+				regressions.append(f'{_key(result)}: {metric} {base[metric]:.2f} -> {result[metric]:.2f} (+{result[metric] / base[metric] - 1:.0%})')
+	return regressions
+
+
+def _ints(value: str) -> list[int]:
+	return [int(v) for v in value.split(',') if v]
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Offline throughput benchmarks with fake browser and Gemini backends')
+	parser.add_argument('--scenarios', default='ads,batch,agent,tasks', help='Comma-separated: ads, batch, agent, tasks')
+	parser.add_argument('--modes', default='instagram', help='Comma-separated ad modes: instagram, tiktok')
+	parser.add_argument('--counts', type=_ints, default=[1, 4, 16], help='Ads per URL (agent: steps)')
+	parser.add_argument('--url-counts', type=_ints, default=[1, 4], help='Landing pages per run (agent: pages visited, tasks: tasks)')
+	parser.add_argument('--scale', type=float, default=1.0, help='Multiplier on every fake latency')
+	parser.add_argument('--jitter', type=float, default=0.3)
+	parser.add_argument('--distribution', choices=['lognormal', 'uniform', 'fixed'], default='lognormal')
+	parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of fake API calls failing with a 503')
+	parser.add_argument('--image-kb', type=int, default=1500)
+	parser.add_argument('--video-kb', type=int, default=6000)
+	parser.add_argument('--real-rate-limits', action='store_true', default=False, help='Keep the production gateway rate limits')
+	parser.add_argument('--seed', type=int, default=7)
+	parser.add_argument('--save-baseline', type=Path)
+	parser.add_argument('--baseline', type=Path)
+	parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed regression against --baseline (0.25 = 25%%)')
+	parser.add_argument('--cell', help=argparse.SUPPRESS)
+	bench_args = parser.parse_args()
+
+	if bench_args.cell:
+		_cell_main(json.loads(bench_args.cell))
+		return
+
+	common = {
+		'scale': bench_args.scale,
+		'jitter': bench_args.jitter,
+		'distribution': bench_args.distribution,
+		'failure_rate': bench_args.failure_rate,
+		'image_kb': bench_args.image_kb,
+		'video_kb': bench_args.video_kb,
+		'real_limits': bench_args.real_rate_limits,
+		'seed': bench_args.seed,
+	}
+	cells = []
+	for scenario in bench_args.scenarios.split(','):
+		for mode in bench_args.modes.split(',') if scenario in ('ads', 'batch') else ['-']:
+			for urls in bench_args.url_counts:
+				for count in bench_args.counts:
+					cells.append({**common, 'scenario': scenario, 'mode': mode, 'count': count, 'urls': urls})
+
+	print(f'{"cell":<40} {"done":>5} {"wall":>8} {"thru/s":>8} {"rss MB":>8} {"blocked":>8} {"max lag":>8}')
+	results = []
+	for cell in cells:
+		result = _spawn(cell)
+		results.append(result)
+		print(
+			f'{_key(result):<40} {result["done"]:>5} {result["wall"]:>7.2f}s {result["throughput"]:>8.1f} '
+			f'{result["peak_rss_mb"]:>8.0f} {result["loop_blocked"] * 1000:>6.0f}ms {result["loop_max_lag"] * 1000:>6.0f}ms'
+		)
+
+	if bench_args.save_baseline:
+		bench_args.save_baseline.write_text(json.dumps(results, indent=2))
+		print(f'Baseline saved to {bench_args.save_baseline}')
+
+	if bench_args.baseline:
+		regressions = compare(results, json.loads(bench_args.baseline.read_text()), bench_args.tolerance)
+		if regressions:
+			print(f'\n{len(regressions)} regression(s) beyond {bench_args.tolerance:.0%}:')
+			for line in regressions:
+				print(f'  {line}')
+			sys.exit(1)
+		print(f'\nNo regressions beyond {bench_args.tolerance:.0%} against {bench_args.baseline}')
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,202 @@
+"""Pool of warm, reusable browser sessions for landing-page analysis.
+
+Launching Chromium for every URL adds seconds of cold start to each analysis.
+``BrowserSessionPool`` keeps up to ``size`` ``keep_alive`` sessions that callers
+borrow with ``async with pool.session() as browser_session``. ``start()``
+launches them up front; without it each one is launched by the first borrow
+that finds no idle session, so a run that never needs a browser never starts one.
+Between uses a session is scrubbed (cookies cleared, a single fresh blank tab);
+it is recycled after ``max_uses`` borrows, when it fails a health check or its
+cleanup, and when the browsers' combined memory goes over ``max_memory_mb``.
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PooledSession:
+	session: Any
+	uses: int = 0
+
+
+@dataclass
+class PoolStats:
+	launched: int = 0
+	recycled: int = 0
+	borrows: int = 0
+	waits: int = 0
+
+
+def browser_memory_mb() -> float:
+	"""Resident memory of every child process of this one (the launched browsers), in MiB"""
+	import psutil
+
+	total = 0
+	for child in psutil.Process().children(recursive=True):
+		try:
+			total += child.memory_info().rss
+		except (psutil.NoSuchProcess, psutil.AccessDenied):
+			continue
+	return total / (1024 * 1024)
+
+
+class BrowserSessionPool:
+	"""Borrow/return pool of started browser sessions built by ``factory``"""
+
+	def __init__(
+		self,
+		factory: Callable[[], Any],
+		size: int = 2,
+		max_uses: int = 20,
+		max_memory_mb: float | None = None,
+		health_timeout: float = 5.0,
+	):
+		self.factory = factory
+		self.size = max(size, 1)
+		self.max_uses = max_uses
+		self.max_memory_mb = max_memory_mb
+		self.health_timeout = health_timeout
+		self.stats = PoolStats()
+		# None is close()'s wake-up call to borrowers waiting for a session
+		self._idle: asyncio.Queue[_PooledSession | None] = asyncio.Queue()
+		self._live = 0
+		self._lock = asyncio.Lock()
+		self._closed = False
+		self._background: set[asyncio.Task] = set()
+
+	async def start(self):
+		"""Pre-launch every session so the first borrows do not pay browser startup"""
+		async with self._lock:
+			missing = self.size - self._live
+			self._live += missing
+		launched = await asyncio.gather(*(self._launch() for _ in range(missing)), return_exceptions=True)
+		for entry in launched:
+			if isinstance(entry, BaseException):
+				self._live -= 1
+				logger.warning('Could not pre-launch browser session: %s', entry)
+			else:
+				self._idle.put_nowait(entry)
+
+	async def _launch(self) -> _PooledSession:
+		session = self.factory()
+		await session.start()
+		self.stats.launched += 1
+		return _PooledSession(session)
+
+	async def _acquire(self) -> _PooledSession:
+		if self._closed:
+			raise RuntimeError('BrowserSessionPool is closed')
+		try:
+			return self._idle.get_nowait()
+		except asyncio.QueueEmpty:
+			pass
+
+		async with self._lock:
+			grow = self._live < self.size
+			if grow:
+				self._live += 1
+		if grow:
+			try:
+				return await self._launch()
+			except BaseException:
+				self._live -= 1
+				raise
+
+		self.stats.waits += 1
+		entry = await self._idle.get()
+		if entry is None:
+			# Pass the wake-up call on to the next waiter
+			self._idle.put_nowait(None)
+			raise RuntimeError('BrowserSessionPool is closed')
+		return entry
+
+	@asynccontextmanager
+	async def session(self) -> AsyncIterator[Any]:
+		"""Borrow a clean started session for the duration of the ``async with`` block"""
+		entry = await self._acquire()
+		self.stats.borrows += 1
+		entry.uses += 1
+		try:
+			yield entry.session
+		finally:
+			await self._release(entry)
+
+	async def _release(self, entry: _PooledSession):
+		if self._closed:
+			await self._kill(entry)
+			return
+
+		reason = None
+		if entry.uses >= self.max_uses:
+			reason = f'reached {self.max_uses} uses'
+		elif not await self._healthy(entry):
+			reason = 'failed health check'
+		elif self.max_memory_mb is not None and await asyncio.to_thread(browser_memory_mb) > self.max_memory_mb:
+			reason = f'browsers over {self.max_memory_mb:.0f} MiB'
+		else:
+			try:
+				await self._scrub(entry.session)
+			except Exception as e:
+				reason = f'cleanup failed: {e}'
+
+		if reason is None:
+			self._idle.put_nowait(entry)
+			return
+
+		logger.debug('Recycling browser session: %s', reason)
+		self.stats.recycled += 1
+		await self._kill(entry)
+		# Replace it in the background so the pool stays warm
+		async with self._lock:
+			self._live += 1
+		task = asyncio.create_task(self._replace())
+		self._background.add(task)
+		task.add_done_callback(self._background.discard)
+
+	async def _replace(self):
+		try:
+			self._idle.put_nowait(await self._launch())
+		except Exception as e:
+			self._live -= 1
+			logger.warning('Could not relaunch browser session: %s', e)
+
+	async def _healthy(self, entry: _PooledSession) -> bool:
+		try:
+			await asyncio.wait_for(entry.session.get_current_page_url(), timeout=self.health_timeout)
+			return True
+		except Exception:
+			return False
+
+	async def _scrub(self, session: Any):
+		"""Reset a session to a fresh state: no cookies, one blank tab"""
+		await session.clear_cookies()
+		fresh = await session.new_page('about:blank')
+		for page in await session.get_pages():
+			if page is not fresh and getattr(page, '_target_id', None) != getattr(fresh, '_target_id', None):
+				await session.close_page(page)
+
+	async def _kill(self, entry: _PooledSession):
+		async with self._lock:
+			self._live -= 1
+		try:
+			await entry.session.kill()
+		except Exception as e:
+			logger.debug('Error killing browser session: %s', e)
+
+	async def close(self):
+		"""Kill every idle session and fail waiting borrowers; borrowed sessions are killed as they come back"""
+		self._closed = True
+		if self._background:
+			await asyncio.gather(*self._background, return_exceptions=True)
+		while not self._idle.empty():
+			entry = self._idle.get_nowait()
+			if entry is not None:
+				await self._kill(entry)
+		self._idle.put_nowait(None)
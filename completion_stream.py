@@ -0,0 +1,125 @@
+"""Run many jobs with bounded concurrency and handle their results in completion order.
+
+``asyncio.gather`` only returns once the slowest job has finished. Every
+finished result waits until then, and every job is started at once.
+``CompletionStream`` starts at most ``max_in_flight`` jobs and yields each
+outcome as soon as it lands, so the caller can save, report and post-process
+it straight away. Finished results wait in a buffer of ``max_buffered``
+entries. While the buffer is full, a finished job keeps its slot, so no new
+job starts until the caller catches up. At most ``max_in_flight + max_buffered``
+payloads are ever held in memory, whatever the job count.
+
+``Progress`` is the live ``done/total, rate, ETA`` line printed while results stream in.
+"""
+
+import asyncio
+import sys
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any, TextIO
+
+
+@dataclass
+class Completion:
+	key: Any
+	result: Any = None
+	error: Exception | None = None
+	elapsed: float = 0.0
+
+
+class CompletionStream:
+	"""Yield a ``Completion`` per ``(key, job)`` as each job finishes, never more than ``max_in_flight`` running"""
+
+	def __init__(self, jobs: Iterable[tuple[Any, Callable[[], Awaitable[Any]]]], max_in_flight: int = 8, max_buffered: int = 2):
+		self.jobs = list(jobs)
+		self.max_in_flight = max(max_in_flight, 1)
+		self.max_buffered = max(max_buffered, 1)
+		self.peak_in_flight = 0
+
+	def __len__(self) -> int:
+		return len(self.jobs)
+
+	async def __aiter__(self) -> AsyncIterator[Completion]:
+		finished: asyncio.Queue[Completion] = asyncio.Queue(maxsize=self.max_buffered)
+		slots = asyncio.Semaphore(self.max_in_flight)
+		tasks: set[asyncio.Task] = set()
+
+		async def run(key: Any, job: Callable[[], Awaitable[Any]]):
+			started = time.perf_counter()
+			try:
+				completion = Completion(key, result=await job())
+			except Exception as e:
+				completion = Completion(key, error=e)
+			completion.elapsed = time.perf_counter() - started
+			try:
+				# The slot is held until there is buffer room, so a slow consumer stops new jobs from starting
+				await finished.put(completion)
+			finally:
+				slots.release()
+
+		async def launch():
+			for key, job in self.jobs:
+				await slots.acquire()
+				task = asyncio.create_task(run(key, job))
+				tasks.add(task)
+				task.add_done_callback(tasks.discard)
+				self.peak_in_flight = max(self.peak_in_flight, len(tasks))
+
+		launcher = asyncio.create_task(launch())
+		try:
+			for _ in range(len(self.jobs)):
+				yield await finished.get()
+		finally:
+			for task in (launcher, *tasks):
+				task.cancel()
+			await asyncio.gather(launcher, *tasks, return_exceptions=True)
+
+
+class Progress:
+	"""A live ``done/total`` line with throughput and ETA, redrawn in place on a terminal and one line per update otherwise"""
+
+	def __init__(self, total: int, label: str = 'ads', out: TextIO | None = None):
+		self.total = total
+		self.label = label
+		self.out = out or sys.stderr
+		self.done = 0
+		self.failed = 0
+		self.started_at = time.perf_counter()
+		self.first_at: float | None = None
+		self._live = self.out.isatty()
+
+	def line(self) -> str:
+		elapsed = time.perf_counter() - self.started_at
+		finished = self.done + self.failed
+		text = f'⏳ {self.done}/{self.total} {self.label}'
+		if self.failed:
+			text += f', {self.failed} failed'
+		if finished:
+			remaining = (self.total - finished) * elapsed / finished
+			text += f' · {finished / elapsed * 60:.1f}/min · ' + (f'ETA {remaining:.0f}s' if finished < self.total else f'done in {elapsed:.1f}s')
+		return text
+
+	def update(self, ok: bool = True):
+		if self.first_at is None:
+			self.first_at = time.perf_counter() - self.started_at
+		if ok:
+			self.done += 1
+		else:
+			self.failed += 1
+		if self._live:
+			self.out.write(f'\r\033[K{self.line()}')
+		else:
+			self.out.write(self.line() + '\n')
+		self.out.flush()
+
+	def clear(self):
+		"""Wipe the live line before other output is printed (it is redrawn on the next update)"""
+		if self._live:
+			self.out.write('\r\033[K')
+			self.out.flush()
+
+	def close(self):
+		if self._live:
+			self.out.write('\n')
+			self.out.flush()
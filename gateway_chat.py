@@ -0,0 +1,26 @@
+"""ChatGoogle for the browser agent whose requests go through a GeminiGateway.
+
+The agent's LLM calls then share the per-model rate limits, concurrency limit
+and retries with every other Gemini request in the process. It lives in its
+own module because subclassing ChatGoogle imports the whole browser_use stack,
+and ad_generator only wants that once an analysis really needs the agent.
+"""
+
+from dataclasses import dataclass
+
+from browser_use.llm.google import ChatGoogle
+
+from gemini_client import GeminiGateway
+
+
+@dataclass
+class GatewayChatGoogle(ChatGoogle):
+	"""ChatGoogle whose requests share the gateway's limits and retries (without a gateway it is plain ChatGoogle)"""
+
+	gateway: GeminiGateway | None = None
+
+	async def ainvoke(self, messages, output_format=None, **kwargs):
+		invoke = super().ainvoke
+		if self.gateway is None:
+			return await invoke(messages, output_format, **kwargs)
+		return await self.gateway.call(str(self.model), lambda: invoke(messages, output_format, **kwargs))
@@ -0,0 +1,239 @@
+"""Rate-limited, retrying gateway shared by every Gemini request in a process.
+
+``GeminiGateway.call(model, request)`` runs ``request()`` (a coroutine factory)
+under three per-model controls:
+
+* a token bucket that caps requests per second,
+* an AIMD concurrency limit that halves when the API throttles (429) and grows
+  by one slot per window of successes while it is healthy,
+* exponential backoff with full jitter on retryable errors (429, 5xx,
+  timeouts, dropped connections), so a throttled ad is delayed, not lost.
+
+A request that starts paid work on the server, such as a Veo submission, is
+not safe to repeat once it may have reached the API: a timeout or a 5xx can
+follow an accepted job, and a retry would render (and bill) it twice. Such
+calls pass ``retryable=is_retryable_submission``, which only retries a 429 or
+a connection that was refused before anything was sent.
+
+Live counters per model are available from ``snapshot()``, and every call is
+traced as a ``gemini:<model>`` span with its queueing time, attempt count and
+tokens. The tokens of every response are also added to the run's accounting
+ledger.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from typing import TypeVar
+
+import accounting
+import tracing
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Requests per second per model; anything not listed uses GeminiGateway.default_rate
+DEFAULT_RATE_LIMITS = {
+	'gemini-2.5-pro': 2.0,
+	'gemini-2.5-flash-image': 2.0,
+	'veo-3.1-generate-preview': 0.5,
+	'operations': 5.0,
+	'files': 5.0,
+}
+
+
+def status_code(error: BaseException) -> int | None:
+	"""HTTP status of a genai APIError, browser-use ModelProviderError or httpx error, if it has one"""
+	for attr in ('code', 'status_code'):
+		value = getattr(error, attr, None)
+		if isinstance(value, int):
+			return value
+	response = getattr(error, 'response', None)
+	value = getattr(response, 'status_code', None)
+	return value if isinstance(value, int) else None
+
+
+def is_retryable(error: BaseException) -> bool:
+	code = status_code(error)
+	if code is not None:
+		return code in RETRYABLE_STATUS
+	return isinstance(error, (asyncio.TimeoutError, ConnectionError)) or type(error).__name__ in (
+		'ConnectError',
+		'ReadTimeout',
+		'WriteTimeout',
+		'PoolTimeout',
+		'RemoteProtocolError',
+	)
+
+
+def is_retryable_submission(error: BaseException) -> bool:
+	"""Whether a non-idempotent request certainly never started: it was throttled, or never connected"""
+	code = status_code(error)
+	if code is not None:
+		return code == 429
+	return isinstance(error, ConnectionRefusedError) or type(error).__name__ == 'ConnectError'
+
+
+class TokenBucket:
+	"""Allow ``rate`` acquisitions per second with bursts of up to ``capacity``"""
+
+	def __init__(self, rate: float, capacity: float | None = None):
+		self.rate = rate
+		self.capacity = capacity if capacity is not None else max(rate, 1.0)
+		self._tokens = self.capacity
+		self._updated = time.monotonic()
+		self._lock = asyncio.Lock()
+
+	async def acquire(self):
+		async with self._lock:
+			while True:
+				now = time.monotonic()
+				self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+				self._updated = now
+				if self._tokens >= 1:
+					self._tokens -= 1
+					return
+				await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AdaptiveLimiter:
+	"""AIMD concurrency limit: +1 slot per ``limit`` successes, halved on throttling"""
+
+	def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 32, decrease: float = 0.5):
+		self.limit = float(initial)
+		self.minimum = minimum
+		self.maximum = maximum
+		self.decrease = decrease
+		self.in_flight = 0
+		self._condition = asyncio.Condition()
+		self._last_decrease = 0.0
+
+	async def acquire(self):
+		async with self._condition:
+			await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+			self.in_flight += 1
+
+	async def release(self, throttled: bool = False, succeeded: bool = False):
+		async with self._condition:
+			self.in_flight -= 1
+			now = time.monotonic()
+			if throttled:
+				# One cut per burst of 429s, not one per request that was already in flight
+				if now - self._last_decrease > 1.0:
+					self.limit = max(self.minimum, self.limit * self.decrease)
+					self._last_decrease = now
+			elif succeeded:
+				self.limit = min(self.maximum, self.limit + 1 / self.limit)
+			self._condition.notify_all()
+
+
+@dataclass
+class ModelCounters:
+	requests: int = 0
+	successes: int = 0
+	failures: int = 0
+	retries: int = 0
+	throttled: int = 0
+	in_flight: int = 0
+	concurrency_limit: float = 0.0
+
+
+class GeminiGateway:
+	"""Shared per-model rate limiting, retries and adaptive concurrency for Gemini requests"""
+
+	def __init__(
+		self,
+		rate_limits: dict[str, float] | None = None,
+		default_rate: float = 2.0,
+		max_retries: int = 6,
+		base_delay: float = 1.0,
+		max_delay: float = 60.0,
+		initial_concurrency: int = 4,
+		max_concurrency: int = 32,
+	):
+		self.rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+		self.default_rate = default_rate
+		self.max_retries = max_retries
+		self.base_delay = base_delay
+		self.max_delay = max_delay
+		self.initial_concurrency = initial_concurrency
+		self.max_concurrency = max_concurrency
+		self._buckets: dict[str, TokenBucket] = {}
+		self._limiters: dict[str, AdaptiveLimiter] = {}
+		self._counters: dict[str, ModelCounters] = {}
+
+	def _controls(self, model: str) -> tuple[TokenBucket, AdaptiveLimiter, ModelCounters]:
+		if model not in self._buckets:
+			self._buckets[model] = TokenBucket(self.rate_limits.get(model, self.default_rate))
+			self._limiters[model] = AdaptiveLimiter(self.initial_concurrency, maximum=self.max_concurrency)
+			self._counters[model] = ModelCounters()
+		return self._buckets[model], self._limiters[model], self._counters[model]
+
+	def backoff(self, attempt: int) -> float:
+		"""Full-jitter exponential backoff for the given retry attempt (1-based)"""
+		return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+	async def call(
+		self,
+		model: str,
+		request: Callable[[], Awaitable[T]],
+		retryable: Callable[[BaseException], bool] = is_retryable,
+	) -> T:
+		"""Run request() for model under its rate limit and concurrency limit, retrying errors retryable() accepts"""
+		with tracing.span(f'gemini:{model}') as span:
+			return await self._call(model, request, span.attributes, retryable)
+
+	async def _call(self, model: str, request: Callable[[], Awaitable[T]], trace: dict, retryable: Callable[[BaseException], bool]) -> T:
+		bucket, limiter, counters = self._controls(model)
+		attempt = 0
+		trace['queued'] = 0.0
+		while True:
+			queued_at = time.perf_counter()
+			await limiter.acquire()
+			counters.in_flight = limiter.in_flight
+			throttled = succeeded = False
+			try:
+				await bucket.acquire()
+				trace['queued'] += time.perf_counter() - queued_at
+				trace['attempts'] = attempt + 1
+				counters.requests += 1
+				result = await request()
+				succeeded = True
+				counters.successes += 1
+				usage = accounting.record_response(model, result)
+				if usage.tokens:
+					trace['input_tokens'], trace['output_tokens'] = usage.input_tokens, usage.output_tokens
+				return result
+			except Exception as e:
+				throttled = status_code(e) == 429
+				counters.throttled += throttled
+				if not retryable(e) or attempt >= self.max_retries:
+					counters.failures += 1
+					raise
+				attempt += 1
+				counters.retries += 1
+				delay = self.backoff(attempt)
+				logger.debug('%s request failed (%s), retry %d/%d in %.1fs', model, e, attempt, self.max_retries, delay)
+			finally:
+				await limiter.release(throttled=throttled, succeeded=succeeded)
+				counters.in_flight = limiter.in_flight
+				counters.concurrency_limit = limiter.limit
+			await asyncio.sleep(delay)
+
+	def snapshot(self) -> dict[str, dict]:
+		"""Current counters per model"""
+		return {model: asdict(counters) for model, counters in self._counters.items()}
+
+	def summary(self) -> str:
+		parts = []
+		for model, c in self._counters.items():
+			parts.append(
+				f'{model}: {c.successes}/{c.requests} ok, {c.retries} retries, {c.throttled} throttled, limit {c.concurrency_limit:.1f}'
+			)
+		return '📡 ' + ('; '.join(parts) if parts else 'no Gemini requests')
@@ -0,0 +1,185 @@
+"""Hedged requests: cut the latency tail of a model by racing a duplicate.
+
+Most image requests finish close to the median, but a few straggle for many
+times longer, and a batch of ads is only as fast as its slowest one. ``Hedger``
+keeps the recent latencies of every model. When a request has been out for
+longer than the chosen percentile of them (p95 by default), it sends the same
+request once more. Whichever answer arrives first is used, and the other
+request is cancelled. If one of them fails, the other is still awaited.
+
+A hedge is an extra paid request, so they are capped by a budget that is global
+to the process: at most ``budget`` hedges per call (10% by default). A
+straggler that finds the budget spent waits for its primary like any other
+call. No request is hedged until a model has ``min_samples`` latencies. The
+threshold is recomputed as latencies come in, so in the first batch of a run the
+stragglers are hedged once their faster siblings have set the pace.
+
+Both attempts go through the ``GeminiGateway``, so hedges respect its rate and
+concurrency limits. The hedge timer only starts once the primary request is
+sent, so time spent queueing in the gateway never triggers a hedge.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TypeVar
+
+import tracing
+from gemini_client import GeminiGateway
+
+T = TypeVar('T')
+
+
+class LatencyTracker:
+	"""The last ``window`` request latencies of every model, with nearest-rank percentiles"""
+
+	def __init__(self, window: int = 200):
+		self.window = window
+		self._samples: dict[str, deque[float]] = {}
+		self._updated: dict[str, asyncio.Event] = {}
+
+	def record(self, model: str, seconds: float):
+		self._samples.setdefault(model, deque(maxlen=self.window)).append(seconds)
+		# Wake everything waiting on the previous sample, and start a fresh event for the next one
+		event = self._updated.pop(model, None)
+		if event is not None:
+			event.set()
+
+	def updated(self, model: str) -> asyncio.Event:
+		"""An event set by the next latency recorded for model"""
+		if model not in self._updated:
+			self._updated[model] = asyncio.Event()
+		return self._updated[model]
+
+	def models(self) -> list[str]:
+		return list(self._samples)
+
+	def count(self, model: str) -> int:
+		return len(self._samples.get(model, ()))
+
+	def percentile(self, model: str, q: float) -> float | None:
+		samples = sorted(self._samples.get(model, ()))
+		if not samples:
+			return None
+		return samples[min(len(samples), max(1, math.ceil(q * len(samples)))) - 1]
+
+
+@dataclass
+class HedgeStats:
+	calls: int = 0
+	issued: int = 0
+	won: int = 0
+	over_budget: int = 0
+	cancelled: int = 0
+
+
+class _Sent(asyncio.Event):
+	"""Set when the primary attempt leaves the gateway, at ``at``"""
+
+	at = 0.0
+
+
+class Hedger:
+	"""Send a duplicate of any request still running past the model's latency percentile, within a global budget"""
+
+	def __init__(
+		self,
+		gateway: GeminiGateway,
+		percentile: float = 0.95,
+		budget: float = 0.1,
+		min_samples: int = 5,
+		window: int = 200,
+	):
+		if not 0 < percentile < 1:
+			raise ValueError(f'hedge percentile must be between 0 and 1, not {percentile}')
+		self.gateway = gateway
+		self.percentile = percentile
+		self.budget = budget
+		self.min_samples = min_samples
+		self.latencies = LatencyTracker(window)
+		self.stats = HedgeStats()
+
+	def threshold(self, model: str) -> float | None:
+		"""Seconds after which a request to model is hedged, None while there are too few samples"""
+		if self.latencies.count(model) < max(self.min_samples, 1):
+			return None
+		return self.latencies.percentile(model, self.percentile)
+
+	def _timed(self, model: str, request: Callable[[], Awaitable[T]], sent: _Sent | None = None) -> Callable[[], Awaitable[T]]:
+		"""request, recording how long each attempt took once the gateway let it through"""
+
+		async def timed() -> T:
+			started = time.perf_counter()
+			if sent is not None and not sent.is_set():
+				sent.at = started
+				sent.set()
+			result = await request()
+			self.latencies.record(model, time.perf_counter() - started)
+			return result
+
+		return timed
+
+	async def _straggling(self, model: str, primary: asyncio.Task, sent: _Sent) -> bool:
+		"""Wait until primary is done (False) or has been out for longer than the hedge threshold (True)"""
+		while not primary.done():
+			threshold = self.threshold(model)
+			waiters = {asyncio.ensure_future(self.latencies.updated(model).wait())}
+			timeout = None
+			if not sent.is_set():
+				waiters.add(asyncio.ensure_future(sent.wait()))
+			elif threshold is not None:
+				timeout = sent.at + threshold - time.perf_counter()
+				if timeout <= 0:
+					for waiter in waiters:
+						waiter.cancel()
+					return True
+			try:
+				await asyncio.wait({primary, *waiters}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+			finally:
+				for waiter in waiters:
+					waiter.cancel()
+		return False
+
+	async def call(self, model: str, request: Callable[[], Awaitable[T]]) -> T:
+		"""Like ``GeminiGateway.call``, hedging request() when it straggles"""
+		self.stats.calls += 1
+		sent = _Sent()
+		primary = asyncio.create_task(self.gateway.call(model, self._timed(model, request, sent)))
+		hedge: asyncio.Task | None = None
+		try:
+			if not await self._straggling(model, primary, sent):
+				return primary.result()
+			if self.stats.issued + 1 > self.budget * self.stats.calls:
+				self.stats.over_budget += 1
+				return await primary
+
+			self.stats.issued += 1
+			with tracing.span(f'hedge:{model}', after=round(time.perf_counter() - sent.at, 3)) as span:
+				hedge = asyncio.create_task(self.gateway.call(model, self._timed(model, request)))
+				done, pending = await asyncio.wait({primary, hedge}, return_when=asyncio.FIRST_COMPLETED)
+				winners = [task for task in done if task.exception() is None]
+				if not winners:
+					# The first attempt failed, the other one may still succeed
+					await asyncio.wait(pending)
+					winners = [task for task in pending if task.exception() is None]
+				first = winners[0] if winners else primary
+				span.attributes['won'] = first is hedge
+				if first is hedge:
+					self.stats.won += 1
+				return first.result()
+		finally:
+			for task in (primary, hedge):
+				if task is not None and not task.done():
+					task.cancel()
+					self.stats.cancelled += 1
+
+	def summary(self) -> str:
+		s = self.stats
+		parts = [f'{s.issued} hedges issued for {s.calls} calls, {s.won} won, {s.over_budget} over the {self.budget:.0%} budget']
+		for model in self.latencies.models():
+			p50, p90, p99 = (self.latencies.percentile(model, q) for q in (0.5, 0.9, 0.99))
+			parts.append(f'{model} p50 {p50:.1f}s p90 {p90:.1f}s p99 {p99:.1f}s')
+		return f'🪁 Hedging at p{self.percentile * 100:g}: ' + '; '.join(parts)
@@ -0,0 +1,183 @@
+"""Compact on-disk agent history, so reports can be re-rendered without re-running the agent.
+
+Each run is stored as gzip-compressed JSONL. The first line is a header (task,
+timestamp, report name), followed by one ``AgentHistory.model_dump()`` line per
+step, appended and flushed as the step finishes, so an interrupted run keeps
+everything up to its last step. The bulky ``state_message`` (the page state
+sent to the model) is dropped. Screenshots move out of the records into
+``screenshots/<sha256>.png`` beside the history files and are referenced by
+hash, so a frame seen repeatedly, in one run or across runs, is stored once.
+
+``load_history`` returns light step objects with the attributes the report
+builder reads, so rendering needs neither a browser nor browser-use's models.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import uuid
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DIR = Path('output') / 'history'
+FORMAT_VERSION = 1
+SUFFIX = '.jsonl.gz'
+
+
+@dataclass
+class HistoryStats:
+	steps: int = 0
+	screenshots: int = 0
+	screenshots_deduplicated: int = 0
+
+
+class HistoryWriter:
+	"""Append an agent's history items to ``path`` as they are produced"""
+
+	def __init__(self, path: Path | str, task: str, timestamp: str, report: str | None = None):
+		self.path = Path(path)
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		self.blobs = self.path.parent / 'screenshots'
+		self.stats = HistoryStats()
+		self._seen = 0
+		self._file = gzip.open(self.path, 'wt', encoding='utf-8')
+		self._write({'type': 'run', 'version': FORMAT_VERSION, 'task': task, 'timestamp': timestamp, 'report': report})
+
+	def _write(self, record: dict):
+		self._file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+		# Sync-flush so everything written so far can be read back even if the process dies
+		self._file.flush()
+
+	def collect(self, history: Any):
+		"""Store every item added to an AgentHistoryList since the last call"""
+		for item in history.history[self._seen :]:
+			self.add(item)
+		self._seen = len(history.history)
+
+	def add(self, item: Any):
+		record = item.model_dump()
+		record.pop('state_message', None)
+		state = record.get('state') or {}
+		screenshot = state.pop('screenshot_path', None)
+		if screenshot:
+			state['screenshot'] = self._store_screenshot(Path(screenshot))
+		self.stats.steps += 1
+		self._write({'type': 'step', **record})
+
+	def _store_screenshot(self, path: Path) -> str | None:
+		try:
+			data = path.read_bytes()
+		except OSError as e:
+			logger.debug('Screenshot %s unavailable: %s', path, e)
+			return None
+		digest = hashlib.sha256(data).hexdigest()
+		blob = self.blobs / f'{digest}{path.suffix or ".png"}'
+		if blob.exists():
+			self.stats.screenshots_deduplicated += 1
+		else:
+			self.blobs.mkdir(parents=True, exist_ok=True)
+			partial = blob.with_name(f'.{blob.name}.{uuid.uuid4().hex}.part')
+			partial.write_bytes(data)
+			os.replace(partial, blob)
+			self.stats.screenshots += 1
+		return blob.name
+
+	def close(self):
+		if not self._file.closed:
+			self._file.close()
+
+
+class _StoredAction:
+	def __init__(self, data: dict):
+		self.data = data
+
+	def model_dump(self, exclude_none: bool = False, mode: str = 'python', **kwargs) -> dict:
+		return self.data
+
+
+class _StoredBrain:
+	"""Mirrors browser-use's AgentBrain, including how it prints"""
+
+	FIELDS = ('thinking', 'evaluation_previous_goal', 'memory', 'next_goal')
+
+	def __init__(self, output: dict):
+		self.thinking = output.get('thinking')
+		self.evaluation_previous_goal = output.get('evaluation_previous_goal') or ''
+		self.memory = output.get('memory') or ''
+		self.next_goal = output.get('next_goal') or ''
+
+	def __str__(self) -> str:
+		return ' '.join(f'{name}={getattr(self, name)!r}' for name in self.FIELDS)
+
+
+def _step(record: dict, blobs: Path) -> SimpleNamespace:
+	output = record.get('model_output')
+	model_output = None
+	if output:
+		model_output = SimpleNamespace(action=[_StoredAction(a) for a in output.get('action', [])], current_state=_StoredBrain(output))
+
+	state = record.get('state') or {}
+	screenshot = state.get('screenshot')
+	metadata = record.get('metadata')
+	return SimpleNamespace(
+		model_output=model_output,
+		result=[
+			SimpleNamespace(
+				extracted_content=r.get('extracted_content'),
+				error=r.get('error'),
+				is_done=r.get('is_done'),
+				success=r.get('success'),
+			)
+			for r in record.get('result', [])
+		],
+		state=SimpleNamespace(
+			url=state.get('url'),
+			title=state.get('title'),
+			screenshot_path=str(blobs / screenshot) if screenshot else None,
+		),
+		metadata=SimpleNamespace(duration_seconds=metadata['step_end_time'] - metadata['step_start_time']) if metadata else None,
+	)
+
+
+def _records(path: Path) -> Iterator[dict]:
+	with gzip.open(path, 'rt', encoding='utf-8') as f:
+		try:
+			for line in f:
+				if line.strip():
+					yield json.loads(line)
+		except (EOFError, gzip.BadGzipFile, json.JSONDecodeError) as e:
+			# A run that was killed mid-write: keep every complete step before the damage
+			logger.warning('%s is truncated, loading the steps before it: %s', path, e)
+
+
+def load_history(path: Path | str) -> tuple[dict, list[SimpleNamespace]]:
+	"""The header and the steps of a stored run"""
+	path = Path(path)
+	header: dict = {}
+	steps = []
+	for record in _records(path):
+		if record.get('type') == 'run':
+			header = record
+		elif record.get('type') == 'step':
+			steps.append(_step(record, path.parent / 'screenshots'))
+	if header.get('version', FORMAT_VERSION) > FORMAT_VERSION:
+		raise ValueError(f'{path} was written by a newer history format (version {header["version"]})')
+	return header, steps
+
+
+def history_files(paths: list[Path | str]) -> list[Path]:
+	"""Expand files and directories (searched for *.jsonl.gz) into a sorted list of history files"""
+	files: list[Path] = []
+	for path in map(Path, paths):
+		if path.is_dir():
+			files.extend(sorted(path.glob(f'*{SUFFIX}')))
+		else:
+			files.append(path)
+	return files
@@ -0,0 +1,347 @@
+"""Asynchronous human-in-the-loop answers for agent tools.
+
+A tool that needs a human awaits ``HumanInputBroker.ask()`` instead of calling
+``input()``, so only the asking agent waits: the event loop, and every other
+agent on it, keeps running. Questions from any number of agents are pending
+at once, each under a short id, and are published to every configured front
+end. Whichever front end answers first wins, and an unanswered question falls
+back to a default answer after a timeout.
+
+Front ends: ``ConsoleFrontend`` (stdin, read on a daemon thread),
+``FileQueueFrontend`` (question files in, answer files out),
+``HTTPFrontend`` (a small local HTTP endpoint) and ``StubFrontend`` (scripted
+answers for tests and benchmarks).
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from local_http import read_request, respond
+
+logger = logging.getLogger(__name__)
+
+
+class HumanInputTimeout(TimeoutError):
+	"""No answer arrived in time and there was no default to fall back on"""
+
+
+@dataclass
+class Question:
+	id: str
+	text: str
+	agent: str = ''
+	asked_at: float = field(default_factory=time.time)
+
+	def to_dict(self) -> dict:
+		return asdict(self)
+
+
+@dataclass
+class BrokerStats:
+	asked: int = 0
+	answered: int = 0
+	timed_out: int = 0
+
+
+class Frontend:
+	"""A channel through which a human sees pending questions and answers them via ``broker.answer()``"""
+
+	broker: 'HumanInputBroker'
+
+	async def start(self, broker: 'HumanInputBroker'):
+		self.broker = broker
+
+	async def publish(self, question: Question):
+		pass
+
+	async def withdraw(self, question: Question):
+		"""The question was answered (possibly elsewhere) or timed out"""
+
+	async def close(self):
+		pass
+
+
+class HumanInputBroker:
+	"""Route questions from concurrent agents to human front ends and their answers back.
+
+	``timeout`` (seconds, None waits forever) and ``default`` apply to every
+	``ask()`` that does not pass its own. Without a default, a question that
+	times out raises ``HumanInputTimeout``.
+	"""
+
+	def __init__(self, frontends: list[Frontend] | None = None, timeout: float | None = 120.0, default: str | None = None):
+		self.frontends = list(frontends or [])
+		self.timeout = timeout
+		self.default = default
+		self.stats = BrokerStats()
+		self._ids = itertools.count(1)
+		self._pending: dict[str, tuple[Question, asyncio.Future]] = {}
+		self._started: list[Frontend] = []
+
+	async def __aenter__(self) -> 'HumanInputBroker':
+		await self.start()
+		return self
+
+	async def __aexit__(self, *exc_info):
+		await self.close()
+
+	async def start(self):
+		for frontend in self.frontends:
+			if frontend not in self._started:
+				await frontend.start(self)
+				self._started.append(frontend)
+
+	async def close(self):
+		for question, future in list(self._pending.values()):
+			if not future.done():
+				future.cancel()
+		while self._started:
+			await self._started.pop().close()
+
+	@property
+	def pending(self) -> list[Question]:
+		return [question for question, _ in self._pending.values()]
+
+	async def _broadcast(self, method: str, question: Question):
+		# A broken front end must not keep the others (or the agent) from getting the question
+		results = await asyncio.gather(*(getattr(frontend, method)(question) for frontend in self._started), return_exceptions=True)
+		for frontend, result in zip(self._started, results):
+			if isinstance(result, Exception):
+				logger.warning('%s.%s failed for %s: %s', type(frontend).__name__, method, question.id, result)
+
+	async def ask(self, text: str, agent: str = '', timeout: float | None = None, default: str | None = None) -> str:
+		"""Wait for a human to answer ``text``; other tasks keep running meanwhile"""
+		await self.start()
+		timeout = self.timeout if timeout is None else timeout
+		default = self.default if default is None else default
+
+		question = Question(id=f'q{next(self._ids)}', text=text, agent=agent)
+		future = asyncio.get_running_loop().create_future()
+		self._pending[question.id] = (question, future)
+		self.stats.asked += 1
+		try:
+			await self._broadcast('publish', question)
+			try:
+				return await asyncio.wait_for(future, timeout)
+			except asyncio.TimeoutError:
+				self.stats.timed_out += 1
+				if default is None:
+					raise HumanInputTimeout(f'No answer to {question.id} ({text!r}) within {timeout}s') from None
+				logger.info('No answer to %s within %ss, using the default', question.id, timeout)
+				return default
+		finally:
+			self._pending.pop(question.id, None)
+			await self._broadcast('withdraw', question)
+
+	def answer(self, question_id: str, text: str) -> bool:
+		"""Resolve a pending question; False if it is unknown or already answered"""
+		entry = self._pending.get(question_id)
+		if entry is None or entry[1].done():
+			return False
+		entry[1].set_result(text)
+		self.stats.answered += 1
+		return True
+
+
+class ConsoleFrontend(Frontend):
+	"""Questions printed to stdout, answered on stdin as ``<id> <answer>`` (or just the answer if only one is pending).
+
+	stdin is read on a daemon thread so a pending read never blocks the event
+	loop or interpreter exit.
+	"""
+
+	def __init__(self, stream=None, output=None):
+		self.stream = stream or sys.stdin
+		self.output = output or sys.stdout
+		self._reader: threading.Thread | None = None
+		self._loop: asyncio.AbstractEventLoop | None = None
+
+	async def start(self, broker: HumanInputBroker):
+		await super().start(broker)
+		self._loop = asyncio.get_running_loop()
+
+	def _read(self):
+		for line in self.stream:
+			try:
+				self._loop.call_soon_threadsafe(self._on_line, line.rstrip('\n'))
+			except RuntimeError:
+				# The event loop has gone away
+				return
+
+	def _on_line(self, line: str):
+		if not line.strip():
+			return
+		pending = self.broker.pending
+		question_id, _, rest = line.strip().partition(' ')
+		if any(q.id == question_id for q in pending):
+			self.broker.answer(question_id, rest.strip())
+		elif len(pending) == 1:
+			self.broker.answer(pending[0].id, line.strip())
+		elif pending:
+			print(f'⚠️  {len(pending)} questions are pending, answer with "<id> <answer>": {", ".join(q.id for q in pending)}', file=self.output)
+		else:
+			print('⚠️  No question is pending', file=self.output)
+
+	async def publish(self, question: Question):
+		if self._reader is None:
+			# Started on first use, so a broker that never asks never holds on to stdin
+			self._reader = threading.Thread(target=self._read, name='human-input-stdin', daemon=True)
+			self._reader.start()
+		who = f' {question.agent}' if question.agent else ''
+		print(f'❓ [{question.id}]{who}: {question.text}', file=self.output)
+		print(f'   answer with "{question.id} <answer>"', file=self.output, flush=True)
+
+
+class FileQueueFrontend(Frontend):
+	"""Questions written to ``<directory>/questions/<id>.json``; answered by dropping ``<directory>/answers/<id>.txt``"""
+
+	def __init__(self, directory: Path | str = Path('output') / 'human_input', poll_interval: float = 0.5):
+		self.directory = Path(directory)
+		self.questions = self.directory / 'questions'
+		self.answers = self.directory / 'answers'
+		self.poll_interval = poll_interval
+		self._task: asyncio.Task | None = None
+
+	async def start(self, broker: HumanInputBroker):
+		await super().start(broker)
+		self.questions.mkdir(parents=True, exist_ok=True)
+		self.answers.mkdir(parents=True, exist_ok=True)
+		# Question ids restart with every broker, so leftovers from an earlier run would be misrouted
+		for stale in [*self.questions.glob('*.json'), *self.answers.glob('*.txt')]:
+			stale.unlink(missing_ok=True)
+		self._task = asyncio.create_task(self._watch())
+
+	async def publish(self, question: Question):
+		partial = self.questions / f'.{question.id}.json.part'
+		partial.write_text(json.dumps(question.to_dict(), ensure_ascii=False), encoding='utf-8')
+		os.replace(partial, self.questions / f'{question.id}.json')
+
+	async def withdraw(self, question: Question):
+		(self.questions / f'{question.id}.json').unlink(missing_ok=True)
+
+	async def _watch(self):
+		while True:
+			await asyncio.sleep(self.poll_interval)
+			if not self.broker.pending:
+				continue
+			for path in self.answers.glob('*.txt'):
+				try:
+					text = path.read_text(encoding='utf-8').strip()
+					path.unlink()
+				except OSError as e:
+					logger.debug('Could not read answer %s: %s', path, e)
+					continue
+				if not self.broker.answer(path.stem, text):
+					logger.info('Ignoring answer for unknown or closed question %s', path.stem)
+
+	async def close(self):
+		if self._task is not None:
+			self._task.cancel()
+			await asyncio.gather(self._task, return_exceptions=True)
+
+
+class HTTPFrontend(Frontend):
+	"""A local HTTP endpoint: ``GET /questions`` lists pending questions, ``POST /questions/<id>`` answers one.
+
+	The POST body is the answer as plain text, or JSON ``{"answer": "..."}``.
+	With ``port=0`` a free port is chosen and stored on ``self.port``.
+	"""
+
+	MAX_BODY = 64 * 1024
+
+	def __init__(self, host: str = '127.0.0.1', port: int = 8765):
+		self.host = host
+		self.port = port
+		self._server: asyncio.AbstractServer | None = None
+
+	async def start(self, broker: HumanInputBroker):
+		await super().start(broker)
+		self._server = await asyncio.start_server(self._handle, self.host, self.port)
+		self.port = self._server.sockets[0].getsockname()[1]
+		logger.info('Answer questions at http://%s:%d/questions', self.host, self.port)
+
+	async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+		try:
+			status, payload = await self._route(reader)
+		except (ValueError, asyncio.IncompleteReadError) as e:
+			status, payload = 400, {'error': str(e)}
+		try:
+			await respond(writer, status, payload)
+		finally:
+			writer.close()
+
+	async def _route(self, reader: asyncio.StreamReader) -> tuple[int, object]:
+		request = await read_request(reader, self.MAX_BODY)
+		method, parts, body = request.method, request.parts, request.body.decode('utf-8')
+
+		if parts[0] != 'questions' or len(parts) > 2:
+			return 404, {'error': 'not found'}
+		if len(parts) == 1:
+			if method != 'GET':
+				return 405, {'error': 'use GET'}
+			return 200, [question.to_dict() for question in self.broker.pending]
+		if method != 'POST':
+			return 405, {'error': 'use POST'}
+
+		answer = body
+		if request.headers.get('content-type', '').startswith('application/json'):
+			fields = json.loads(body)
+			if not isinstance(fields, dict):
+				raise ValueError('JSON body must be an object like {"answer": "..."}')
+			answer = fields.get('answer', '')
+		if self.broker.answer(parts[1], str(answer).strip()):
+			return 200, {'answered': parts[1]}
+		return 404, {'error': f'{parts[1]} is not pending'}
+
+	async def close(self):
+		if self._server is not None:
+			self._server.close()
+			await self._server.wait_closed()
+
+
+class StubFrontend(Frontend):
+	"""Scripted answers for tests and benchmarks.
+
+	``answers`` maps question text to an answer, or is a callable taking the
+	Question; a None answer leaves the question to time out. Answers arrive
+	after ``delay`` seconds.
+	"""
+
+	def __init__(self, answers: dict[str, str] | Callable[[Question], str | None] | None = None, default: str | None = 'yes', delay: float = 0.0):
+		self.answers = answers or {}
+		self.default = default
+		self.delay = delay
+		self.asked: list[Question] = []
+		self._tasks: set[asyncio.Task] = set()
+
+	def _answer_for(self, question: Question) -> str | None:
+		if callable(self.answers):
+			return self.answers(question)
+		return self.answers.get(question.text, self.default)
+
+	async def publish(self, question: Question):
+		self.asked.append(question)
+		answer = self._answer_for(question)
+		if answer is None:
+			return
+		task = asyncio.create_task(self._reply(question.id, answer))
+		self._tasks.add(task)
+		task.add_done_callback(self._tasks.discard)
+
+	async def _reply(self, question_id: str, answer: str):
+		await asyncio.sleep(self.delay)
+		self.broker.answer(question_id, answer)
+
+	async def close(self):
+		for task in self._tasks:
+			task.cancel()
+		await asyncio.gather(*self._tasks, return_exceptions=True)
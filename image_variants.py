@@ -0,0 +1,226 @@
+"""Off-loop post-processing of image ads into per-placement variants.
+
+Each generated ad is a single square PNG. Placements want their own aspect
+ratios (feed 1:1, portrait 4:5, stories 9:16), lighter formats than PNG and
+small previews for review. ``VariantPipeline`` makes them as soon as an ad
+arrives, in a process pool, so decoding and re-encoding megapixel images never
+stalls the event loop that in-flight Gemini requests run on. For every
+placement the ad is centre-cropped and resized to cover the target size, then
+encoded in each format (WebP and JPEG by default), with a small JPEG thumbnail.
+
+Only blob paths are queued. Images are decoded in the worker processes and
+the encoded bytes are stored as soon as they come back. At most ``workers``
+images are in memory at any time. The queue is bounded, so a large
+``--count`` run waits for variant room rather than building up a backlog.
+Every variant is stored in the OutputStore, and a ``variants`` manifest line
+links it to its ad.
+"""
+
+import asyncio
+import contextvars
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import tracing
+from output_store import OutputStore
+
+QUALITY = 85
+THUMBNAIL_WIDTH = 270
+
+# format -> (PIL format name, save options)
+FORMATS = {
+	'webp': ('WEBP', {'quality': QUALITY, 'method': 4}),
+	'jpeg': ('JPEG', {'quality': QUALITY, 'optimize': True, 'progressive': True}),
+	'png': ('PNG', {'optimize': True}),
+}
+
+
+@dataclass(frozen=True)
+class Placement:
+	name: str
+	width: int
+	height: int
+
+
+DEFAULT_PLACEMENTS = (Placement('square', 1080, 1080), Placement('portrait', 1080, 1350), Placement('story', 1080, 1920))
+DEFAULT_FORMATS = ('webp', 'jpeg')
+
+
+def parse_placements(spec: str) -> tuple[Placement, ...]:
+	"""``square=1080x1080,story=1080x1920`` (a bare ``1080x1350`` is named after its size); ``none`` is no placements"""
+	if spec.strip().lower() in ('', 'none'):
+		return ()
+	placements = []
+	for item in spec.split(','):
+		name, _, size = item.strip().rpartition('=')
+		width, _, height = size.lower().partition('x')
+		if not width.isdigit() or not height.isdigit() or not int(width) or not int(height):
+			raise ValueError(f'placement {item.strip()!r} is not NAME=WIDTHxHEIGHT')
+		placements.append(Placement(name or size, int(width), int(height)))
+	return tuple(placements)
+
+
+def parse_formats(spec: str) -> tuple[str, ...]:
+	formats = tuple(name.strip().lower().replace('jpg', 'jpeg') for name in spec.split(',') if name.strip())
+	unknown = [name for name in formats if name not in FORMATS]
+	if unknown:
+		raise ValueError(f'unsupported variant format(s) {", ".join(unknown)}, use {", ".join(FORMATS)}')
+	return formats
+
+
+def render_variants(
+	source: str,
+	placements: tuple[Placement, ...],
+	formats: tuple[str, ...],
+	thumbnail_width: int = THUMBNAIL_WIDTH,
+) -> tuple[list[dict], float]:
+	"""Crop, resize and encode the image at source for every placement (runs in a worker process).
+
+	Returns one dict per variant, with its encoded bytes under ``data``, and the seconds spent.
+	"""
+	from PIL import Image, ImageOps
+
+	started = time.process_time()
+	with Image.open(source) as image:
+		image = image.convert('RGB')
+
+	variants = []
+
+	def encode(img, placement: str, fmt: str, thumbnail: bool = False):
+		pil_format, options = FORMATS[fmt]
+		buffer = io.BytesIO()
+		img.save(buffer, format=pil_format, **options)
+		variants.append(
+			{'placement': placement, 'format': fmt, 'width': img.width, 'height': img.height, 'thumbnail': thumbnail, 'data': buffer.getvalue()}
+		)
+
+	for placement in placements:
+		fitted = ImageOps.fit(image, (placement.width, placement.height), Image.Resampling.LANCZOS)
+		for fmt in formats:
+			encode(fitted, placement.name, fmt)
+		if thumbnail_width:
+			fitted.thumbnail((thumbnail_width, thumbnail_width * placement.height // placement.width), Image.Resampling.LANCZOS)
+			encode(fitted, placement.name, 'jpeg', thumbnail=True)
+	return variants, time.process_time() - started
+
+
+@dataclass
+class VariantStats:
+	ads: int = 0
+	variants: int = 0
+	bytes: int = 0
+	failed: int = 0
+	worker_seconds: float = 0.0
+	queue_waits: list[float] = field(default_factory=list)
+
+	def summary(self) -> str:
+		if not self.ads and not self.failed:
+			return '🖼️ No image variants'
+		waited = f', max wait for queue room {max(self.queue_waits):.2f}s' if self.queue_waits else ''
+		return (
+			f'🖼️ {self.variants} variants of {self.ads} ads ({self.bytes / (1024 * 1024):.1f} MB), '
+			f'{self.worker_seconds:.1f}s of worker CPU{waited}' + (f', {self.failed} failed' if self.failed else '')
+		)
+
+
+class VariantPipeline:
+	"""Make and store the placement variants of every submitted ad in a process pool, ``workers`` at a time"""
+
+	def __init__(
+		self,
+		store: OutputStore,
+		placements: tuple[Placement, ...] = DEFAULT_PLACEMENTS,
+		formats: tuple[str, ...] = DEFAULT_FORMATS,
+		thumbnail_width: int = THUMBNAIL_WIDTH,
+		workers: int | None = None,
+		queue_size: int | None = None,
+	):
+		self.store = store
+		self.placements = tuple(placements)
+		self.formats = tuple(formats)
+		self.thumbnail_width = thumbnail_width
+		self.workers = workers or min(4, os.cpu_count() or 1)
+		self.queue_size = queue_size or self.workers * 2
+		self.stats = VariantStats()
+		self._executor: ProcessPoolExecutor | None = None
+		self._loop: asyncio.AbstractEventLoop | None = None
+		self._queue: asyncio.Queue | None = None
+		self._tasks: list[asyncio.Task] = []
+
+	def _start(self):
+		loop = asyncio.get_running_loop()
+		if self._loop is loop:
+			return
+		self._loop = loop
+		self._queue = asyncio.Queue(maxsize=self.queue_size)
+		# Started outside any ad's tracing context, each item sets its own
+		self._tasks = [contextvars.Context().run(asyncio.create_task, self._work()) for _ in range(self.workers)]
+		if self._executor is None:
+			# Spawned, not forked: the parent has an event loop and HTTP client threads that a fork would copy mid-flight
+			self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+	async def submit(self, ad_path: Path | str, url: str, ad_id: int | None = None):
+		"""Queue an ad's blob for variants, waiting while the queue is full"""
+		if not self.placements:
+			return
+		self._start()
+		started = time.perf_counter()
+		await self._queue.put((Path(ad_path), url, ad_id))
+		self.stats.queue_waits.append(time.perf_counter() - started)
+
+	async def _render(self, ad_path: Path) -> tuple[list[dict], float]:
+		return await asyncio.get_running_loop().run_in_executor(
+			self._executor, render_variants, str(ad_path), self.placements, self.formats, self.thumbnail_width
+		)
+
+	async def make(self, ad_path: Path, url: str, ad_id: int | None = None) -> list[dict]:
+		"""Render, store and index one ad's variants, returning their manifest entries"""
+		with tracing.context(url=url, ad_id=ad_id), tracing.span('variants') as span:
+			variants, seconds = await self._render(ad_path)
+			records = []
+			for variant in variants:
+				data = variant.pop('data')
+				path = await self.store.put(data, 'jpg' if variant['format'] == 'jpeg' else variant['format'])
+				records.append({**variant, 'blob': path.stem, 'path': str(path), 'bytes': len(data)})
+			self.store.record_variants(ad_path, url, records)
+			span.attributes['variants'] = len(records)
+		self.stats.ads += 1
+		self.stats.variants += len(records)
+		self.stats.bytes += sum(record['bytes'] for record in records)
+		self.stats.worker_seconds += seconds
+		return records
+
+	async def _work(self):
+		while True:
+			ad_path, url, ad_id = await self._queue.get()
+			try:
+				await self.make(ad_path, url, ad_id)
+			except Exception as e:
+				self.stats.failed += 1
+				print(f'❌ Variants failed for ad #{ad_id}: {e}')
+			finally:
+				self._queue.task_done()
+
+	async def join(self):
+		"""Wait until every ad submitted so far has its variants stored"""
+		if self._queue is not None and self._loop is asyncio.get_running_loop():
+			await self._queue.join()
+
+	async def close(self):
+		await self.join()
+		for task in self._tasks:
+			task.cancel()
+		await asyncio.gather(*self._tasks, return_exceptions=True)
+		self._tasks, self._loop, self._queue = [], None, None
+		await asyncio.to_thread(self.shutdown)
+
+	def shutdown(self):
+		"""Stop the worker processes (anything still queued is dropped)"""
+		if self._executor is not None:
+			self._executor.shutdown(wait=True, cancel_futures=True)
+			self._executor = None
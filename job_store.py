@@ -0,0 +1,201 @@
+"""Durable record of ad runs in SQLite, so an interrupted run can be resumed.
+
+Every ``create_multiple_ads`` run is a row in ``runs`` (URL, mode, ad count,
+and the landing-page analysis once it exists). Each of its ads is a row in
+``ads`` that moves from ``pending`` through ``submitted`` (a Veo job is
+rendering, its operation name recorded) to ``done`` (output path recorded) or
+``failed`` (error recorded, the operation kept). Each change is committed as
+it happens, so a crash loses at most the step in flight. Commits wait on the
+disk, so they run on a worker thread and the ``JobRun`` methods that write are
+coroutines; lookups are single indexed rows and stay on the loop. A resumed
+run reuses the stored analysis and concepts, skips ads already on disk, and
+polls Veo operations that were already paid for instead of submitting them
+again.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+DEFAULT_PATH = Path('output') / 'jobs.sqlite3'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+	id INTEGER PRIMARY KEY AUTOINCREMENT,
+	url TEXT NOT NULL,
+	mode TEXT NOT NULL,
+	count INTEGER NOT NULL,
+	status TEXT NOT NULL DEFAULT 'running',
+	analysis TEXT,
+	screenshot_path TEXT,
+	page_timestamp TEXT,
+	source TEXT,
+	created_at REAL NOT NULL,
+	updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_url ON runs (url, mode, status);
+CREATE TABLE IF NOT EXISTS ads (
+	run_id INTEGER NOT NULL REFERENCES runs (id),
+	ad_id INTEGER NOT NULL,
+	status TEXT NOT NULL DEFAULT 'pending',
+	concept TEXT,
+	prompt TEXT,
+	operation TEXT,
+	output_path TEXT,
+	error TEXT,
+	updated_at REAL NOT NULL,
+	PRIMARY KEY (run_id, ad_id)
+);
+"""
+
+
+@dataclass
+class AdRecord:
+	ad_id: int
+	status: str = 'pending'
+	concept: str | None = None
+	prompt: str | None = None
+	operation: str | None = None
+	output_path: str | None = None
+	error: str | None = None
+
+	@property
+	def completed(self) -> bool:
+		"""Done, and the ad is still on disk"""
+		return self.status == 'done' and bool(self.output_path) and Path(self.output_path).exists()
+
+
+class JobStore:
+	def __init__(self, path: Path | str = DEFAULT_PATH):
+		self.path = Path(path)
+		self.path.parent.mkdir(parents=True, exist_ok=True)
+		self._db = sqlite3.connect(self.path, check_same_thread=False)
+		self._db.row_factory = sqlite3.Row
+		# Commits run on worker threads while lookups run on the loop, one at a time on the shared connection
+		self._lock = threading.Lock()
+		# WAL keeps each per-step commit cheap
+		self._db.execute('PRAGMA journal_mode=WAL')
+		self._db.execute('PRAGMA synchronous=NORMAL')
+		self._db.executescript(SCHEMA)
+
+	def _query(self, sql: str, *params) -> list[sqlite3.Row]:
+		with self._lock:
+			return self._db.execute(sql, params).fetchall()
+
+	def _write_many(self, sql: str, rows: list[tuple]):
+		with self._lock, self._db:
+			self._db.executemany(sql, rows)
+
+	async def _write(self, sql: str, *params):
+		await asyncio.to_thread(self._write_many, sql, [params])
+
+	def _insert_run(self, url: str, mode: str, count: int) -> int:
+		now = time.time()
+		with self._lock, self._db:
+			cursor = self._db.execute('INSERT INTO runs (url, mode, count, created_at, updated_at) VALUES (?, ?, ?, ?, ?)', (url, mode, count, now, now))
+			self._db.executemany(
+				'INSERT INTO ads (run_id, ad_id, updated_at) VALUES (?, ?, ?)', [(cursor.lastrowid, ad_id, now) for ad_id in range(1, count + 1)]
+			)
+		return cursor.lastrowid
+
+	async def start_run(self, url: str, mode: str, count: int) -> 'JobRun':
+		run_id = await asyncio.to_thread(self._insert_run, url, mode, count)
+		return JobRun(self, run_id, url, mode, count)
+
+	def latest_unfinished(self, url: str, mode: str) -> 'JobRun | None':
+		"""The most recent run for url and mode that did not complete every ad"""
+		rows = self._query("SELECT id, url, mode, count FROM runs WHERE url = ? AND mode = ? AND status != 'done' ORDER BY id DESC LIMIT 1", url, mode)
+		return JobRun(self, rows[0]['id'], rows[0]['url'], rows[0]['mode'], rows[0]['count']) if rows else None
+
+	def close(self):
+		with self._lock:
+			self._db.close()
+
+
+class JobRun:
+	"""One run's rows in a JobStore"""
+
+	def __init__(self, store: JobStore, run_id: int, url: str, mode: str, count: int):
+		self.store = store
+		self.id = run_id
+		self.url = url
+		self.mode = mode
+		self.count = count
+
+	async def save_analysis(self, page_data: dict):
+		screenshot = page_data.get('screenshot_path')
+		await self.store._write(
+			'UPDATE runs SET analysis = ?, screenshot_path = ?, page_timestamp = ?, source = ?, updated_at = ? WHERE id = ?',
+			page_data['analysis'],
+			str(screenshot) if screenshot else None,
+			page_data.get('timestamp'),
+			page_data.get('source'),
+			time.time(),
+			self.id,
+		)
+
+	def page_data(self) -> dict | None:
+		"""The stored analysis in analyze_landing_page's page_data shape, or None if the run never got that far"""
+		rows = self.store._query('SELECT analysis, screenshot_path, page_timestamp, source FROM runs WHERE id = ?', self.id)
+		if not rows or rows[0]['analysis'] is None:
+			return None
+		row = rows[0]
+		screenshot = Path(row['screenshot_path']) if row['screenshot_path'] else None
+		return {
+			'url': self.url,
+			'analysis': row['analysis'],
+			'screenshot_path': screenshot if screenshot and screenshot.exists() else None,
+			'timestamp': row['page_timestamp'],
+			'source': row['source'],
+		}
+
+	async def save_concepts(self, concepts: list[str]):
+		now = time.time()
+		await asyncio.to_thread(
+			self.store._write_many,
+			'UPDATE ads SET concept = ?, updated_at = ? WHERE run_id = ? AND ad_id = ?',
+			[(concept, now, self.id, ad_id) for ad_id, concept in enumerate(concepts, 1)],
+		)
+
+	def concepts(self) -> list[str] | None:
+		"""Every ad's concept, or None unless all of them were stored"""
+		concepts = [record.concept for record in self.ads().values()]
+		return concepts if len(concepts) == self.count and None not in concepts else None
+
+	def ads(self) -> dict[int, AdRecord]:
+		rows = self.store._query('SELECT ad_id, status, concept, prompt, operation, output_path, error FROM ads WHERE run_id = ? ORDER BY ad_id', self.id)
+		return {row['ad_id']: AdRecord(**dict(row)) for row in rows}
+
+	def ad(self, ad_id: int) -> AdRecord:
+		rows = self.store._query(
+			'SELECT ad_id, status, concept, prompt, operation, output_path, error FROM ads WHERE run_id = ? AND ad_id = ?', self.id, ad_id
+		)
+		return AdRecord(**dict(rows[0])) if rows else AdRecord(ad_id)
+
+	async def _update_ad(self, ad_id: int, **columns):
+		assignments = ', '.join(f'{name} = ?' for name in columns)
+		await self.store._write(
+			f'UPDATE ads SET {assignments}, updated_at = ? WHERE run_id = ? AND ad_id = ?', *columns.values(), time.time(), self.id, ad_id
+		)
+
+	async def save_prompt(self, ad_id: int, prompt: str):
+		await self._update_ad(ad_id, prompt=prompt)
+
+	async def submitted(self, ad_id: int, operation: str):
+		await self._update_ad(ad_id, status='submitted', operation=operation, error=None)
+
+	async def done(self, ad_id: int, output_path: str):
+		await self._update_ad(ad_id, status='done', output_path=output_path, error=None)
+
+	async def failed(self, ad_id: int, error: str):
+		# The operation is kept: if only the download failed, a resume fetches the paid-for video again
+		await self._update_ad(ad_id, status='failed', error=error)
+
+	async def finish(self) -> str:
+		"""Mark the run done if every ad is, otherwise incomplete (a later --resume picks it up)"""
+		status = 'done' if all(record.completed for record in self.ads().values()) else 'incomplete'
+		await self.store._write('UPDATE runs SET status = ?, updated_at = ? WHERE id = ?', status, time.time(), self.id)
+		return status
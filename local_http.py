@@ -0,0 +1,50 @@
+"""Minimal HTTP/1.1 request parsing and JSON responses for the local endpoints.
+
+``AdService`` and ``HTTPFrontend`` each serve a tiny API on an
+``asyncio.start_server`` socket, one request per connection. This covers what
+they need and no more: the request line, headers, a ``Content-Length`` body
+with a size cap, and a JSON response that closes the connection.
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+
+MAX_BODY = 64 * 1024
+REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 503: 'Service Unavailable'}
+
+
+@dataclass
+class Request:
+	method: str
+	target: str
+	headers: dict[str, str] = field(default_factory=dict)
+	body: bytes = b''
+
+	@property
+	def parts(self) -> list[str]:
+		"""The path's segments, without the query string: '/jobs/abc?x=1' -> ['jobs', 'abc']"""
+		return self.target.split('?', 1)[0].strip('/').split('/')
+
+
+async def read_request(reader: asyncio.StreamReader, max_body: int = MAX_BODY) -> Request:
+	"""Read one request, raising ValueError when it is malformed or its body is over max_body bytes"""
+	method, target, _ = (await reader.readline()).decode('latin-1').split(' ', 2)
+	headers = {}
+	while (line := (await reader.readline()).decode('latin-1').strip()):
+		name, _, value = line.partition(':')
+		headers[name.strip().lower()] = value.strip()
+	length = int(headers.get('content-length', 0))
+	if length > max_body:
+		raise ValueError('request body too large')
+	return Request(method, target, headers, await reader.readexactly(length) if length else b'')
+
+
+async def respond(writer: asyncio.StreamWriter, status: int, payload: object, headers: dict | None = None):
+	"""Write payload as a JSON response that closes the connection"""
+	body = json.dumps(payload, ensure_ascii=False).encode()
+	head = f'HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n'
+	for name, value in (headers or {}).items():
+		head += f'{name}: {value}\r\n'
+	writer.write(head.encode() + b'\r\n' + body)
+	await writer.drain()
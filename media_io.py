@@ -0,0 +1,48 @@
+"""Chunked, atomic file output for generated media.
+
+Generated videos can be large, so they are never held in memory whole: the bytes
+are streamed in chunks into a temporary sibling of the final path and renamed
+into place once complete. Readers never observe a half-written file, and
+concurrent runs writing the same name cannot clobber each other's temp files.
+"""
+
+import os
+import uuid
+from collections.abc import AsyncIterable, AsyncIterator
+from pathlib import Path
+
+CHUNK_SIZE = 1 << 20
+
+
+async def write_atomic(path: Path, data: bytes | AsyncIterable[bytes]) -> int:
+	"""Write ``data`` (bytes or an async stream of chunks) to ``path`` atomically, returning the byte count"""
+	import aiofiles
+
+	tmp_path = path.with_name(f'.{path.name}.{uuid.uuid4().hex}.part')
+	written = 0
+	try:
+		async with aiofiles.open(tmp_path, 'wb') as f:
+			if isinstance(data, (bytes, bytearray, memoryview)):
+				await f.write(data)
+				written = len(data)
+			else:
+				async for chunk in data:
+					await f.write(chunk)
+					written += len(chunk)
+		os.replace(tmp_path, path)
+	except BaseException:
+		tmp_path.unlink(missing_ok=True)
+		raise
+	return written
+
+
+async def iter_url(url: str, headers: dict[str, str] | None = None, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+	"""Stream the body of ``url`` in chunks of at most ``chunk_size`` bytes"""
+	import httpx
+
+	timeout = httpx.Timeout(60.0, read=300.0)
+	async with httpx.AsyncClient(follow_redirects=True, timeout=timeout) as http:
+		async with http.stream('GET', url, headers=headers) as response:
+			response.raise_for_status()
+			async for chunk in response.aiter_bytes(chunk_size):
+				yield chunk
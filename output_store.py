@@ -0,0 +1,245 @@
+"""Content-addressed output directory with an append-only manifest.
+
+Every artifact (ad image or video, landing-page screenshot, analysis text,
+prompt) is stored once as ``blobs/<sha256[:2]>/<sha256>.<ext>``, however many
+ads or runs produce it, so names never collide and nothing is duplicated.
+``manifest.jsonl`` ties them together, one JSON line per event:
+
+	{"type": "analysis", "url": ..., "analysis": <sha>, "screenshot": <sha>, "time": ...}
+	{"type": "ad", "url": ..., "mode": ..., "ad_id": ..., "analysis": <sha>, "prompt": <sha>, "ad": <sha>, "path": ..., ...}
+	{"type": "variants", "url": ..., "ad": <sha>, "variants": [{"placement": ..., "format": ..., "blob": <sha>, ...}, ...]}
+
+so URL -> analysis -> prompts -> ads can be answered from the manifest alone,
+without listing or opening the blobs. An analysis line is written only the
+first time a URL is seen with that analysis and screenshot.
+
+Usage:
+	python output_store.py                        # every URL with its ad counts
+	python output_store.py https://example.com    # one URL's analyses, prompts and ads
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import AsyncIterable, Iterator
+from pathlib import Path
+
+from media_io import CHUNK_SIZE, write_atomic
+from page_cache import normalize_url
+
+
+def _hash_file(path: Path) -> str:
+	digest = hashlib.sha256()
+	with open(path, 'rb') as f:
+		while chunk := f.read(CHUNK_SIZE):
+			digest.update(chunk)
+	return digest.hexdigest()
+
+
+class OutputStore:
+	def __init__(self, root: Path | str = Path('output')):
+		self.root = Path(root)
+		self.blobs = self.root / 'blobs'
+		self.staging = self.blobs / '.staging'
+		self.manifest = self.root / 'manifest.jsonl'
+		self.staging.mkdir(parents=True, exist_ok=True)
+		self._analyses: set[tuple] | None = None
+		# (url, analysis, screenshot path) -> analysis record, so a page's screenshot is hashed once per run
+		self._recorded: dict[tuple, dict] = {}
+
+	def blob_path(self, digest: str, ext: str) -> Path:
+		return self.blobs / digest[:2] / f'{digest}.{ext}'
+
+	def _place(self, source: Path, digest: str, ext: str, move: bool) -> Path:
+		target = self.blob_path(digest, ext)
+		if target.exists():
+			if move:
+				source.unlink(missing_ok=True)
+			return target
+		target.parent.mkdir(parents=True, exist_ok=True)
+		if move:
+			os.replace(source, target)
+		else:
+			partial = target.with_name(f'.{target.name}.{uuid.uuid4().hex}.part')
+			partial.write_bytes(source.read_bytes())
+			os.replace(partial, target)
+		return target
+
+	async def put(self, content: Path | bytes | AsyncIterable[bytes], ext: str, move: bool = True) -> Path:
+		"""Store content under its hash and return the blob path.
+
+		A Path is moved in (copied with move=False), bytes are written as they are, and an
+		async chunk stream is hashed while it is written to a staging file.
+		"""
+		if isinstance(content, Path):
+			digest = await asyncio.to_thread(_hash_file, content)
+			return await asyncio.to_thread(self._place, content, digest, ext, move)
+
+		if isinstance(content, (bytes, bytearray, memoryview)):
+			digest = hashlib.sha256(content).hexdigest()
+			target = self.blob_path(digest, ext)
+			if not target.exists():
+				target.parent.mkdir(parents=True, exist_ok=True)
+				await write_atomic(target, content)
+			return target
+
+		import aiofiles
+
+		staged = self.staging / f'{uuid.uuid4().hex}.part'
+		hasher = hashlib.sha256()
+		try:
+			async with aiofiles.open(staged, 'wb') as f:
+				async for chunk in content:
+					hasher.update(chunk)
+					await f.write(chunk)
+		except BaseException:
+			staged.unlink(missing_ok=True)
+			raise
+		return self._place(staged, hasher.hexdigest(), ext, move=True)
+
+	async def put_text(self, text: str) -> str:
+		path = await self.put(text.encode('utf-8'), 'txt')
+		return path.stem
+
+	def _append(self, record: dict):
+		# One write per line on an O_APPEND file, so concurrent writers never interleave within a record
+		with open(self.manifest, 'a', encoding='utf-8') as f:
+			f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+	def records(self, record_type: str | None = None, url: str | None = None) -> Iterator[dict]:
+		"""Manifest lines, optionally only one type and one (normalized) URL"""
+		if not self.manifest.exists():
+			return
+		key = normalize_url(url) if url else None
+		with open(self.manifest, encoding='utf-8') as f:
+			for line in f:
+				if not line.strip():
+					continue
+				record = json.loads(line)
+				if record_type and record.get('type') != record_type:
+					continue
+				if key and record.get('key') != key:
+					continue
+				yield record
+
+	async def record_analysis(self, url: str, analysis: str, screenshot_path: Path | None = None) -> dict:
+		"""Store a page's analysis and screenshot once and return its manifest record"""
+		memo = (url, analysis, str(screenshot_path))
+		if memo in self._recorded:
+			return self._recorded[memo]
+
+		screenshot = None
+		if screenshot_path and Path(screenshot_path).exists():
+			# Copied, the original is still the reference image of ads being generated
+			screenshot = (await self.put(Path(screenshot_path), Path(screenshot_path).suffix.lstrip('.') or 'png', move=False)).stem
+		record = {
+			'type': 'analysis',
+			'url': url,
+			'key': normalize_url(url),
+			'analysis': await self.put_text(analysis),
+			'screenshot': screenshot,
+			'time': round(time.time(), 3),
+		}
+		if self._analyses is None:
+			self._analyses = {(r['key'], r['analysis'], r.get('screenshot')) for r in self.records('analysis')}
+		identity = (record['key'], record['analysis'], screenshot)
+		if identity not in self._analyses:
+			self._analyses.add(identity)
+			self._append(record)
+		self._recorded[memo] = record
+		return record
+
+	async def record_ad(
+		self,
+		url: str,
+		mode: str,
+		content: Path | bytes | AsyncIterable[bytes],
+		ext: str,
+		analysis: str,
+		prompt: str,
+		ad_id: int | None = None,
+		screenshot_path: Path | None = None,
+	) -> Path:
+		"""Store an ad with its prompt (and the page analysis, once) and index it in the manifest"""
+		page = await self.record_analysis(url, analysis, screenshot_path)
+		path = await self.put(content, ext)
+		self._append(
+			{
+				'type': 'ad',
+				'url': url,
+				'key': page['key'],
+				'mode': mode,
+				'ad_id': ad_id,
+				'analysis': page['analysis'],
+				'prompt': await self.put_text(prompt),
+				'ad': path.stem,
+				'path': str(path),
+				'bytes': path.stat().st_size,
+				'time': round(time.time(), 3),
+			}
+		)
+		return path
+
+	def record_variants(self, ad_path: Path | str, url: str, variants: list[dict]):
+		"""Index the placement variants (already stored with put) made from the ad blob at ad_path"""
+		self._append(
+			{
+				'type': 'variants',
+				'url': url,
+				'key': normalize_url(url),
+				'ad': Path(ad_path).stem,
+				'variants': variants,
+				'time': round(time.time(), 3),
+			}
+		)
+
+	def read_text(self, digest: str) -> str:
+		return self.blob_path(digest, 'txt').read_text(encoding='utf-8')
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Query the output manifest')
+	parser.add_argument('url', nargs='?', help='Show this URL\'s analyses, prompts and ads (default: summary of every URL)')
+	parser.add_argument('--output-dir', default='output')
+	cli_args = parser.parse_args()
+
+	store = OutputStore(cli_args.output_dir)
+	if not cli_args.url:
+		ads: dict[str, list[dict]] = defaultdict(list)
+		for record in store.records('ad'):
+			ads[record['url']].append(record)
+		for url, records in sorted(ads.items()):
+			modes = ', '.join(f'{mode} {len([r for r in records if r["mode"] == mode])}' for mode in sorted({r['mode'] for r in records}))
+			print(f'{url}: {len(records)} ads ({modes})')
+		return
+
+	analyses = list(store.records('analysis', cli_args.url))
+	if not analyses:
+		print(f'No outputs recorded for {cli_args.url}')
+		return
+	ads_by_analysis: dict[str, list[dict]] = defaultdict(list)
+	for record in store.records('ad', cli_args.url):
+		ads_by_analysis[record['analysis']].append(record)
+	variants = {record['ad']: record['variants'] for record in store.records('variants', cli_args.url)}
+	for analysis in analyses:
+		print(f'📄 Analysis {analysis["analysis"][:12]}, screenshot {analysis["screenshot"][:12] if analysis["screenshot"] else "none"}')
+		print('   ' + store.read_text(analysis['analysis']).strip().replace('\n', '\n   ')[:500])
+		by_prompt: dict[str, list[dict]] = defaultdict(list)
+		for ad in ads_by_analysis.pop(analysis['analysis'], []):
+			by_prompt[ad['prompt']].append(ad)
+		for prompt, prompt_ads in by_prompt.items():
+			print(f'   ✏️  Prompt {prompt[:12]}: {len(prompt_ads)} ads')
+			for ad in prompt_ads:
+				print(f'      {ad["mode"]} #{ad["ad_id"]}: {ad["path"]}')
+				for variant in variants.get(ad['ad'], []):
+					kind = 'thumbnail' if variant['thumbnail'] else variant['format']
+					print(f'         {variant["placement"]} {variant["width"]}x{variant["height"]} {kind}: {variant["path"]}')
+
+
+if __name__ == '__main__':
+	main()
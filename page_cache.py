@@ -0,0 +1,232 @@
+"""On-disk cache of landing-page analyses.
+
+A browser-use analysis costs many gemini-2.5-pro steps, so its ``page_data``
+(analysis text plus screenshot) is cached per normalized URL. Entries expire
+after ``ttl`` seconds, the cache is kept under ``max_bytes`` by evicting the
+least recently used entries, and with ``validate`` a cheap HTTP check
+(ETag / Last-Modified, falling back to a hash of the HTML) must agree that the
+page is unchanged before a cached entry is trusted. Every entry is stored with a
+fingerprint for that check, whether or not this run validates; an entry without
+one is a miss for a validating run.
+
+Layout: ``<directory>/<key>.json`` holds the entry metadata and analysis,
+``<directory>/<key>.png`` the screenshot, where key is a hash of the URL.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid', 'ref', '_ga'}
+
+
+def normalize_url(url: str) -> str:
+	"""Canonical form of url: lowercase scheme/host, no default port, fragment, tracking params or trailing slash"""
+	if '://' not in url:
+		url = f'https://{url}'
+	parts = urlsplit(url.strip())
+	scheme = parts.scheme.lower()
+	host = (parts.hostname or '').lower()
+	if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+		host = f'{host}:{parts.port}'
+	path = parts.path.rstrip('/') or '/'
+	query = sorted(
+		(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.startswith('utm_') and k not in TRACKING_PARAMS
+	)
+	return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+async def fetch_fingerprint(url: str, previous: dict | None = None, timeout: float = 10.0) -> dict | None:
+	"""Cheap change detector for url: its ETag / Last-Modified, or a hash of the HTML.
+
+	With ``previous`` a conditional request is made, and a 304 returns ``previous`` unchanged.
+	Returns None when the page cannot be fetched.
+	"""
+	import httpx
+
+	headers = {}
+	if previous:
+		if previous.get('etag'):
+			headers['If-None-Match'] = previous['etag']
+		if previous.get('last_modified'):
+			headers['If-Modified-Since'] = previous['last_modified']
+	try:
+		async with httpx.AsyncClient(follow_redirects=True, timeout=timeout) as http:
+			response = await http.get(url, headers=headers)
+	except httpx.HTTPError as e:
+		logger.debug('Fingerprint request for %s failed: %s', url, e)
+		return None
+	if response.status_code == 304 and previous:
+		return previous
+	if response.status_code >= 400:
+		return None
+	return response_fingerprint(response)
+
+
+def response_fingerprint(response) -> dict:
+	"""Fingerprint of a page from an httpx response already fetched for it"""
+	return {
+		'etag': response.headers.get('etag'),
+		'last_modified': response.headers.get('last-modified'),
+		'html_hash': hashlib.sha256(response.content).hexdigest(),
+	}
+
+
+def fingerprints_match(cached: dict, current: dict) -> bool:
+	if cached.get('etag') and current.get('etag'):
+		return cached['etag'] == current['etag']
+	if cached.get('last_modified') and current.get('last_modified'):
+		return cached['last_modified'] == current['last_modified']
+	return cached.get('html_hash') == current.get('html_hash')
+
+
+class PageAnalysisCache:
+	"""TTL + size-bounded LRU cache of ``page_data`` dicts keyed by normalized URL.
+
+	With ``refresh`` lookups always miss but fresh analyses are still stored.
+	"""
+
+	def __init__(
+		self,
+		directory: Path = Path('output') / 'cache',
+		ttl: float = 24 * 3600,
+		max_bytes: int = 200 * 1024 * 1024,
+		validate: bool = False,
+		refresh: bool = False,
+	):
+		self.directory = directory
+		self.ttl = ttl
+		self.max_bytes = max_bytes
+		self.validate = validate
+		self.refresh = refresh
+		self.hits = 0
+		self.misses = 0
+		self._lock = asyncio.Lock()
+
+	def key(self, url: str) -> str:
+		return hashlib.sha256(normalize_url(url).encode()).hexdigest()[:32]
+
+	def _entry_path(self, key: str) -> Path:
+		return self.directory / f'{key}.json'
+
+	async def get(self, url: str) -> dict | None:
+		"""Cached page_data for url, or None on a miss, expiry or failed validation"""
+		if self.refresh:
+			self.misses += 1
+			return None
+
+		key = self.key(url)
+		entry = await asyncio.to_thread(self._read, key)
+		if entry is None or time.time() - entry['created_at'] > self.ttl:
+			self.misses += 1
+			return None
+
+		if self.validate:
+			if not entry.get('fingerprint'):
+				# Nothing to compare the page against, so the analysis cannot be trusted
+				logger.debug('Cached analysis for %s has no fingerprint to validate', url)
+				self.misses += 1
+				return None
+			current = await fetch_fingerprint(entry['url'], entry['fingerprint'])
+			if current is None or not fingerprints_match(entry['fingerprint'], current):
+				logger.debug('Cached analysis for %s is stale, page changed', url)
+				self.misses += 1
+				return None
+
+		entry['last_access'] = time.time()
+		await asyncio.to_thread(self._write_json, key, entry)
+		self.hits += 1
+
+		screenshot = self.directory / entry['screenshot'] if entry.get('screenshot') else None
+		return {
+			'url': url,
+			'analysis': entry['analysis'],
+			'screenshot_path': screenshot if screenshot and screenshot.exists() else None,
+			# Fresh timestamp so ads generated from a cached analysis do not reuse old output names
+			'timestamp': datetime.now().strftime('%Y%m%d_%H%M%S'),
+			'source': 'cache',
+		}
+
+	async def put(self, page_data: dict):
+		"""Store page_data (copying its screenshot into the cache) and evict down to max_bytes.
+
+		Every entry gets a fingerprint, so a later ``validate`` run can check it: the one in page_data when
+		the fast path already fetched the page, otherwise the page is fetched once more for it.
+		"""
+		url = page_data['url']
+		key = self.key(url)
+		fingerprint = page_data.get('fingerprint') or await fetch_fingerprint(url)
+		entry = {
+			'url': url,
+			'normalized_url': normalize_url(url),
+			'analysis': page_data['analysis'],
+			'screenshot': None,
+			'fingerprint': fingerprint,
+			'created_at': time.time(),
+			'last_access': time.time(),
+		}
+		async with self._lock:
+			await asyncio.to_thread(self._store, key, entry, page_data.get('screenshot_path'))
+			await asyncio.to_thread(self._evict)
+
+	async def invalidate(self, url: str):
+		key = self.key(url)
+		async with self._lock:
+			await asyncio.to_thread(self._remove, key)
+
+	def _read(self, key: str) -> dict | None:
+		try:
+			return json.loads(self._entry_path(key).read_text(encoding='utf-8'))
+		except (OSError, ValueError):
+			return None
+
+	def _write_json(self, key: str, entry: dict):
+		path = self._entry_path(key)
+		tmp_path = path.with_name(f'.{path.name}.{uuid.uuid4().hex}.tmp')
+		tmp_path.write_text(json.dumps(entry), encoding='utf-8')
+		os.replace(tmp_path, path)
+
+	def _store(self, key: str, entry: dict, screenshot_path: Path | None):
+		self.directory.mkdir(parents=True, exist_ok=True)
+		if screenshot_path and Path(screenshot_path).exists():
+			name = f'{key}.png'
+			tmp_path = self.directory / f'.{name}.{uuid.uuid4().hex}.tmp'
+			shutil.copyfile(screenshot_path, tmp_path)
+			os.replace(tmp_path, self.directory / name)
+			entry['screenshot'] = name
+		self._write_json(key, entry)
+
+	def _remove(self, key: str):
+		self._entry_path(key).unlink(missing_ok=True)
+		(self.directory / f'{key}.png').unlink(missing_ok=True)
+
+	def _evict(self):
+		entries = []
+		total = 0
+		for path in self.directory.glob('*.json'):
+			key = path.stem
+			entry = self._read(key)
+			screenshot = self.directory / f'{key}.png'
+			try:
+				size = path.stat().st_size + (screenshot.stat().st_size if screenshot.exists() else 0)
+			except OSError:
+				continue
+			total += size
+			entries.append(((entry or {}).get('last_access', 0), key, size))
+
+		entries.sort()
+		for _, key, size in entries:
+			if total <= self.max_bytes:
+				break
+			self._remove(key)
+			total -= size
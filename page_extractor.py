@@ -0,0 +1,229 @@
+"""HTTP fast path for landing-page brand extraction.
+
+Most of what the browser agent is asked for (brand name, tagline, call to action,
+pricing) is already in the raw HTML: ``<title>``, OpenGraph / Twitter meta tags,
+JSON-LD ``Product`` / ``Offer`` blocks, the first ``<h1>`` and the page's buttons.
+``extract_page_data`` fetches and parses that in well under a second and returns
+the same ``page_data`` shape as ``LandingPageAnalyzer``, together with a
+completeness score so the caller can fall back to the agent when it is too low.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any
+from urllib.parse import urljoin
+
+from page_cache import response_fingerprint
+
+logger = logging.getLogger(__name__)
+
+MAX_HTML_BYTES = 2 * 1024 * 1024
+MAX_IMAGE_BYTES = 8 * 1024 * 1024
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+
+# Weight of each field in the completeness score
+FIELD_WEIGHTS = {'name': 0.3, 'tagline': 0.3, 'cta': 0.2, 'pricing': 0.2}
+
+CTA_HINT = re.compile(r'\b(btn|button|cta|call-to-action|signup|sign-up|get-started|buy)\b', re.IGNORECASE)
+# Text of a button or link that asks for a conversion; cookie banners, menu toggles and search buttons do not
+CTA_TEXT = re.compile(
+	r'\b(buy|shop|order|pre-?order|get|start|try|sign ?up|subscribe|join|book|download|install|request|reserve|claim|add to (cart|bag)|checkout)\b',
+	re.IGNORECASE,
+)
+PRICE_PATTERN = re.compile(r'(?:[$€£¥]\s?\d[\d,]*(?:\.\d{2})?|\d[\d,]*(?:\.\d{2})?\s?(?:USD|EUR|GBP))(?:\s?/\s?(?:mo|month|yr|year))?')
+TITLE_SEPARATORS = re.compile(r'\s+[|–—-]\s+')
+
+_CLOSING_TAGS = {'title': {'title'}, 'h1': {'h1'}, 'json_ld': {'script'}, 'cta': {'button', 'a'}}
+
+
+class _BrandInfoParser(HTMLParser):
+	def __init__(self):
+		super().__init__(convert_charrefs=True)
+		self.title = ''
+		self.meta: dict[str, str] = {}
+		self.json_ld: list[str] = []
+		self.h1 = ''
+		self.ctas: list[str] = []
+		self.text_prices: list[str] = []
+		self._capture: str | None = None
+		self._buffer: list[str] = []
+
+	def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]):
+		attr = {k: v or '' for k, v in attrs}
+		if tag == 'meta':
+			key = (attr.get('property') or attr.get('name') or attr.get('itemprop') or '').lower()
+			if key and 'content' in attr and key not in self.meta:
+				self.meta[key] = attr['content'].strip()
+		elif tag == 'title' and not self.title:
+			self._start('title')
+		elif tag == 'h1' and not self.h1:
+			self._start('h1')
+		elif tag == 'script' and attr.get('type', '').lower() == 'application/ld+json':
+			self._start('json_ld')
+		elif tag == 'button' or (tag == 'a' and (attr.get('role') == 'button' or CTA_HINT.search(attr.get('class', '') + ' ' + attr.get('id', '')))):
+			if self._capture is None:
+				self._start('cta')
+
+	def handle_endtag(self, tag: str):
+		if self._capture is None or tag not in _CLOSING_TAGS[self._capture]:
+			return
+
+		text = ' '.join(''.join(self._buffer).split())
+		if self._capture == 'title':
+			self.title = text
+		elif self._capture == 'h1':
+			self.h1 = text
+		elif self._capture == 'json_ld':
+			self.json_ld.append(''.join(self._buffer))
+		elif text and len(text) <= 40 and CTA_TEXT.search(text):
+			self.ctas.append(text)
+		self._capture = None
+		self._buffer = []
+
+	def handle_data(self, data: str):
+		if self._capture is not None:
+			self._buffer.append(data)
+		elif len(self.text_prices) < 5:
+			self.text_prices.extend(PRICE_PATTERN.findall(data)[: 5 - len(self.text_prices)])
+
+	def _start(self, what: str):
+		self._capture = what
+		self._buffer = []
+
+
+def _walk_json_ld(node: Any):
+	"""Yield every dict in a JSON-LD document, descending into @graph and nested values"""
+	if isinstance(node, dict):
+		yield node
+		for value in node.values():
+			yield from _walk_json_ld(value)
+	elif isinstance(node, list):
+		for item in node:
+			yield from _walk_json_ld(item)
+
+
+def _types(node: dict) -> set[str]:
+	value = node.get('@type', [])
+	return {value} if isinstance(value, str) else set(value)
+
+
+def _format_price(offer: dict) -> str | None:
+	price = offer.get('price') or offer.get('lowPrice')
+	if price in (None, ''):
+		return None
+	currency = offer.get('priceCurrency', '')
+	return f'{price} {currency}'.strip()
+
+
+def extract_brand_info(html: str) -> dict[str, str | None]:
+	"""Pull name, tagline, cta, pricing and image out of raw HTML (missing fields are None)"""
+	parser = _BrandInfoParser()
+	parser.feed(html)
+	parser.close()
+	meta = parser.meta
+
+	name = tagline = pricing = None
+	for raw in parser.json_ld:
+		try:
+			document = json.loads(raw)
+		except ValueError:
+			continue
+		for node in _walk_json_ld(document):
+			types = _types(node)
+			if types & {'Product', 'Organization', 'Brand', 'SoftwareApplication', 'WebSite'} and not name and isinstance(node.get('name'), str):
+				name = node['name']
+			if 'Product' in types and not tagline and isinstance(node.get('description'), str):
+				tagline = node['description']
+			if types & {'Offer', 'AggregateOffer'} and not pricing:
+				pricing = _format_price(node)
+
+	title_parts = TITLE_SEPARATORS.split(parser.title) if parser.title else []
+	name = name or meta.get('og:site_name') or meta.get('application-name') or (title_parts[0] if title_parts else None)
+	tagline = tagline or meta.get('og:description') or meta.get('description') or meta.get('twitter:description') or parser.h1 or None
+	if not pricing and meta.get('product:price:amount'):
+		pricing = f'{meta["product:price:amount"]} {meta.get("product:price:currency", "")}'.strip()
+	pricing = pricing or (parser.text_prices[0] if parser.text_prices else None)
+
+	return {
+		'name': name or None,
+		'tagline': tagline,
+		'headline': parser.h1 or None,
+		'cta': parser.ctas[0] if parser.ctas else None,
+		'pricing': pricing,
+		'image': meta.get('og:image') or meta.get('twitter:image') or None,
+	}
+
+
+def completeness(info: dict[str, str | None]) -> float:
+	return sum(weight for field, weight in FIELD_WEIGHTS.items() if info.get(field))
+
+
+def format_analysis(info: dict[str, str | None]) -> str:
+	"""Render extracted fields as the same kind of brand summary the agent returns"""
+	lines = [
+		f'Brand/Product name: {info.get("name") or "Unknown"}',
+		f'Main tagline / value proposition: {info.get("tagline") or "Not found"}',
+	]
+	if info.get('headline') and info.get('headline') != info.get('tagline'):
+		lines.append(f'Headline: {info["headline"]}')
+	lines.append(f'Primary call-to-action: {info.get("cta") or "Not found"}')
+	lines.append(f'Pricing / special offer: {info.get("pricing") or "None visible"}')
+	return '\n'.join(lines)
+
+
+async def _download_image(http, url: str, output_dir: Path, timestamp: str) -> Path | None:
+	try:
+		response = await http.get(url)
+		response.raise_for_status()
+	except Exception as e:
+		logger.debug('Could not download reference image %s: %s', url, e)
+		return None
+	content_type = response.headers.get('content-type', '')
+	if not content_type.startswith('image/') or len(response.content) > MAX_IMAGE_BYTES:
+		return None
+	extension = {'image/jpeg': 'jpg', 'image/webp': 'webp', 'image/gif': 'gif'}.get(content_type.split(';')[0], 'png')
+	path = output_dir / f'landing_page_{timestamp}.{extension}'
+	await asyncio.to_thread(path.write_bytes, response.content)
+	return path
+
+
+async def extract_page_data(url: str, output_dir: Path, timeout: float = 10.0) -> dict | None:
+	"""Fetch url and build page_data from its HTML, or None if the page cannot be fetched.
+
+	The result carries ``'source': 'http'`` and a ``'completeness'`` score in [0, 1].
+	The page's og:image, when there is one, is saved as the reference screenshot, and
+	``'fingerprint'`` holds the response's cache fingerprint.
+	"""
+	import httpx
+
+	timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+	async with httpx.AsyncClient(follow_redirects=True, timeout=timeout, headers={'User-Agent': USER_AGENT}) as http:
+		try:
+			response = await http.get(url)
+			response.raise_for_status()
+		except httpx.HTTPError as e:
+			logger.debug('Fast path fetch of %s failed: %s', url, e)
+			return None
+		if 'html' not in response.headers.get('content-type', 'text/html'):
+			return None
+
+		info = extract_brand_info(response.text[:MAX_HTML_BYTES])
+		screenshot_path = None
+		if info['image']:
+			screenshot_path = await _download_image(http, urljoin(str(response.url), info['image']), output_dir, timestamp)
+
+	return {
+		'url': url,
+		'analysis': format_analysis(info),
+		'screenshot_path': screenshot_path,
+		'timestamp': timestamp,
+		'source': 'http',
+		'completeness': completeness(info),
+		# Lets the cache validate this analysis later without fetching the page again now
+		'fingerprint': response_fingerprint(response),
+	}
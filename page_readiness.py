@@ -0,0 +1,95 @@
+"""Page-readiness signals for taking landing-page screenshots at the right moment.
+
+A fixed sleep before the screenshot is too long on fast pages and too short on
+slow ones. Instead the capture waits for the agent's first real navigation and
+then for the page to settle: ``document.readyState`` is ``complete`` and neither
+the DOM node count nor the number of loaded resources (a cheap network-idle
+proxy) has changed for a few consecutive samples. Every wait is bounded by a
+timeout, after which whatever is on screen is captured.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+READINESS_SCRIPT = """JSON.stringify({
+	ready: document.readyState,
+	nodes: document.getElementsByTagName('*').length,
+	resources: performance.getEntriesByType('resource').length,
+})"""
+
+
+async def wait_for_first_navigation(browser_session: Any, timeout: float = 20.0, interval: float = 0.2) -> str | None:
+	"""Poll until the focused tab shows an http(s) page, returning its URL (None on timeout)"""
+	deadline = time.monotonic() + timeout
+	while time.monotonic() < deadline:
+		try:
+			url = await browser_session.get_current_page_url()
+		except Exception:
+			url = ''
+		if url.startswith(('http://', 'https://')):
+			return url
+		await asyncio.sleep(interval)
+	return None
+
+
+async def _sample(browser_session: Any) -> dict | None:
+	try:
+		cdp_session = await browser_session.get_or_create_cdp_session()
+		result = await cdp_session.cdp_client.send.Runtime.evaluate(
+			params={'expression': READINESS_SCRIPT, 'returnByValue': True},
+			session_id=cdp_session.session_id,
+		)
+		return json.loads(result['result']['value'])
+	except Exception as e:
+		logger.debug('Readiness sample failed: %s', e)
+		return None
+
+
+async def wait_until_stable(browser_session: Any, timeout: float = 10.0, interval: float = 0.25, stable_samples: int = 3) -> bool:
+	"""Wait for a loaded page whose DOM size and resource count stop changing. False on timeout."""
+	deadline = time.monotonic() + timeout
+	previous = None
+	stable = 0
+	while time.monotonic() < deadline:
+		sample = await _sample(browser_session)
+		if sample and sample['ready'] == 'complete':
+			current = (sample['nodes'], sample['resources'])
+			stable = stable + 1 if current == previous else 0
+			previous = current
+			if stable >= stable_samples - 1:
+				return True
+		else:
+			previous, stable = None, 0
+		await asyncio.sleep(interval)
+	return False
+
+
+async def capture_when_ready(
+	browser_session: Any,
+	path: Path,
+	navigation_timeout: float = 20.0,
+	settle_timeout: float = 10.0,
+) -> Path | None:
+	"""Screenshot the viewport once the first navigation has settled; None if there was no page to capture"""
+	started = time.monotonic()
+	if await wait_for_first_navigation(browser_session, timeout=navigation_timeout) is None:
+		logger.debug('No navigation within %.0fs, skipping screenshot', navigation_timeout)
+		return None
+	settled = await wait_until_stable(browser_session, timeout=settle_timeout)
+	await browser_session.take_screenshot(path=str(path), full_page=False)
+	logger.debug('Screenshot after %.1fs (settled=%s)', time.monotonic() - started, settled)
+	return path
+
+
+def last_step_actions(agent: Any) -> list[str]:
+	"""Names of the actions the agent took in its most recent step"""
+	history = agent.history.history
+	if not history or not history[-1].model_output:
+		return []
+	return [name for action in history[-1].model_output.action for name in action.model_dump(exclude_unset=True)]
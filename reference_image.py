@@ -0,0 +1,148 @@
+"""Per-URL preparation and upload of the landing-page reference image.
+
+Every ad for a URL uses the same screenshot as design reference. Rather than
+decoding, cropping and sending the full-resolution PNG inline with each image
+request, ``ReferenceImages`` prepares it once in a worker thread: centre-crop to
+a square, downsize to the resolution the image model works at, re-encode as
+JPEG. It then uploads that once through the Files API. Each ad request carries
+only a file reference. Concurrent ads for the same URL share a single
+preparation and upload.
+
+Prepared parts are keyed by the file's path, modification time and size, so a
+screenshot rewritten in place (a refreshed cache entry, say) is prepared and
+uploaded again rather than answered with the old image. An uploaded file
+expires after ``FILE_TTL`` (48 hours on the Files API), so a part is uploaded
+again shortly before its file does. At most ``max_entries`` parts are kept,
+the least recently used ones are dropped first.
+"""
+
+import asyncio
+import io
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import accounting
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_SIZE = 1024
+JPEG_QUALITY = 85
+# Files API uploads are deleted after 48 hours; re-upload an hour before that
+FILE_TTL = 48 * 3600
+EXPIRY_MARGIN = 3600
+
+
+def prepare_reference(path: Path, size: int = REFERENCE_SIZE, quality: int = JPEG_QUALITY) -> bytes:
+	"""Centre-crop the image at path to a square no larger than size x size and encode it as JPEG"""
+	from PIL import Image
+
+	with Image.open(path) as img:
+		w, h = img.size
+		side = min(w, h)
+		img = img.crop(((w - side) // 2, (h - side) // 2, (w + side) // 2, (h + side) // 2))
+		if side > size:
+			img = img.resize((size, size), Image.Resampling.LANCZOS)
+		buffer = io.BytesIO()
+		img.convert('RGB').save(buffer, format='JPEG', quality=quality, optimize=True)
+	return buffer.getvalue()
+
+
+@dataclass
+class ReferenceStats:
+	prepared: int = 0
+	source_bytes: int = 0
+	prepared_bytes: int = 0
+	uploaded_bytes: int = 0
+	uploads: int = 0
+	inline_fallbacks: int = 0
+
+	def summary(self) -> str:
+		if not self.prepared:
+			return 'no reference images'
+		return (
+			f'{self.prepared} reference image(s): {self.source_bytes / 1024:.0f} KB source -> '
+			f'{self.prepared_bytes / 1024:.0f} KB prepared, {self.uploaded_bytes / 1024:.0f} KB uploaded in {self.uploads} upload(s)'
+		)
+
+
+class ReferenceImages:
+	"""Prepare and upload each reference image once, handing every ad the same ``types.Part``"""
+
+	def __init__(self, client: Any, size: int = REFERENCE_SIZE, upload: bool = True, gateway: Any = None, max_entries: int = 64):
+		self.client = client
+		self.gateway = gateway
+		self.size = size
+		self.upload = upload
+		self.max_entries = max_entries
+		self.stats = ReferenceStats()
+		# (path, mtime, size) -> task resolving to (part, time.time() after which it must not be sent)
+		self._parts: OrderedDict[tuple[Path, int, int], asyncio.Task] = OrderedDict()
+
+	def _usable(self, task: asyncio.Task) -> bool:
+		if not task.done():
+			return True
+		return task.exception() is None and time.time() < task.result()[1]
+
+	async def get(self, path: Path) -> Any:
+		"""The request part referencing the prepared image at path (shared across concurrent callers)"""
+		path = Path(path).resolve()
+		stat = path.stat()
+		key = (path, stat.st_mtime_ns, stat.st_size)
+		task = self._parts.get(key)
+		if task is None or not self._usable(task):
+			# Earlier versions of the file are never asked for again
+			for stale in [other for other in self._parts if other[0] == path and other != key]:
+				del self._parts[stale]
+			task = self._parts[key] = asyncio.create_task(self._prepare(path))
+		self._parts.move_to_end(key)
+		while len(self._parts) > self.max_entries:
+			self._parts.popitem(last=False)
+		part, _ = await asyncio.shield(task)
+		return part
+
+	async def _prepare(self, path: Path) -> tuple[Any, float]:
+		from google.genai import types
+
+		data = await asyncio.to_thread(prepare_reference, path, self.size)
+		self.stats.prepared += 1
+		self.stats.source_bytes += path.stat().st_size
+		self.stats.prepared_bytes += len(data)
+
+		if self.upload:
+			try:
+				uploaded = await self._upload(data, path)
+				self.stats.uploads += 1
+				self.stats.uploaded_bytes += len(data)
+				accounting.record('files', request_bytes=len(data))
+				part = types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type or 'image/jpeg')
+				return part, self._expires_at(uploaded) - EXPIRY_MARGIN
+			except Exception as e:
+				logger.debug('Reference upload failed, sending it inline instead: %s', e)
+				self.stats.inline_fallbacks += 1
+
+		return types.Part.from_bytes(data=data, mime_type='image/jpeg'), math.inf
+
+	@staticmethod
+	def _expires_at(uploaded: Any) -> float:
+		"""When the Files API deletes uploaded: its expiration_time, or FILE_TTL from now if it has none"""
+		expiration = getattr(uploaded, 'expiration_time', None)
+		if expiration is not None and hasattr(expiration, 'timestamp'):
+			return expiration.timestamp()
+		return time.time() + FILE_TTL
+
+	async def _upload(self, data: bytes, path: Path) -> Any:
+		def request():
+			# A fresh stream per attempt, a retried upload must start from the first byte
+			return self.client.aio.files.upload(
+				file=io.BytesIO(data),
+				config={'mime_type': 'image/jpeg', 'display_name': f'reference-{path.stem}'},
+			)
+
+		if self.gateway is not None:
+			return await self.gateway.call('files', request)
+		return await request()
@@ -0,0 +1,222 @@
+"""Per-stage latency tracing for ad generation runs.
+
+Stages (landing page analysis, concept calls, image/video generation, Veo
+queue/render/poll phases, file writes, individual Gemini requests) are timed as
+spans. Context such as the URL and ad id, and the enclosing span, travels in
+contextvars, so concurrent ads each keep their own lineage without it being
+passed through every call.
+
+Finished spans are appended to a JSONL file, one object per line. The last
+``window`` durations of each stage are kept in memory (with an exact count and
+total) so ``summary()`` can report p50/p95 per stage for ``--profile`` without
+growing for the life of a long-running service. With
+``otel=True`` spans are also started through OpenTelemetry (if installed); which
+exporter receives them is left to the usual OpenTelemetry SDK configuration.
+"""
+
+import contextlib
+import functools
+import itertools
+import json
+import logging
+import math
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from collections.abc import Callable, Iterator, Mapping
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Read-only, so no context can change the attributes another context (or the default) sees; set a fresh mapping instead
+_attributes: ContextVar[Mapping[str, Any]] = ContextVar('trace_attributes', default=MappingProxyType({}))
+_current: ContextVar['Span | None'] = ContextVar('trace_span', default=None)
+# Innermost stage span (analyze, image, video, ...); requests such as gemini:<model> and phases such as video.queued are not stages
+_stage: ContextVar[str | None] = ContextVar('trace_stage', default=None)
+
+
+@dataclass
+class Span:
+	name: str
+	span_id: int
+	parent_id: int | None
+	started: float
+	attributes: dict[str, Any] = field(default_factory=dict)
+	otel: Any = None
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+	"""Nearest-rank percentile of already sorted values"""
+	return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def _otel_attributes(attributes: dict[str, Any]) -> dict[str, Any]:
+	return {k: v if isinstance(v, (str, bool, int, float)) else str(v) for k, v in attributes.items() if v is not None}
+
+
+class Tracer:
+	"""Collect spans for one run; path=None keeps them in memory only"""
+
+	def __init__(self, path: Path | str | None = None, otel: bool = False, window: int = 10_000):
+		self.run_id = uuid.uuid4().hex[:12]
+		self.path = Path(path) if path else None
+		# Recent durations per stage for the percentiles, every span in the counts and totals
+		self.durations: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+		self.counts: Counter[str] = Counter()
+		self.totals: dict[str, float] = defaultdict(float)
+		self._ids = itertools.count(1)
+		self._file = None
+		self._otel = self._otel_tracer() if otel else None
+
+	@staticmethod
+	def _otel_tracer():
+		try:
+			from opentelemetry import trace
+		except ImportError:
+			logger.warning('opentelemetry is not installed, spans are only written to the trace file')
+			return None
+		return trace.get_tracer('ad_generator')
+
+	@contextlib.contextmanager
+	def span(self, name: str, **attributes) -> Iterator[Span]:
+		"""Time the enclosed block as a child of the current span; attributes can be added while it runs"""
+		parent = _current.get()
+		span = Span(
+			name=name,
+			span_id=next(self._ids),
+			parent_id=parent.span_id if parent else None,
+			started=time.perf_counter(),
+			attributes={**_attributes.get(), **attributes},
+		)
+		if self._otel is not None:
+			from opentelemetry import trace
+
+			context = trace.set_span_in_context(parent.otel) if parent and parent.otel else None
+			span.otel = self._otel.start_span(name, context=context)
+		token = _current.set(span)
+		stage_token = _stage.set(name) if ':' not in name and '.' not in name else None
+		try:
+			yield span
+		except BaseException as e:
+			span.attributes['error'] = type(e).__name__
+			raise
+		finally:
+			if stage_token is not None:
+				_stage.reset(stage_token)
+			_current.reset(token)
+			self._finish(span, time.perf_counter() - span.started)
+
+	def record(self, name: str, duration: float, ago: float = 0.0, **attributes):
+		"""Record a phase that was measured elsewhere and ended ``ago`` seconds before now"""
+		parent = _current.get()
+		span = Span(
+			name=name,
+			span_id=next(self._ids),
+			parent_id=parent.span_id if parent else None,
+			started=time.perf_counter() - ago - duration,
+			attributes={**_attributes.get(), **attributes},
+		)
+		end_ns = time.time_ns() - int(ago * 1e9)
+		if self._otel is not None:
+			from opentelemetry import trace
+
+			context = trace.set_span_in_context(parent.otel) if parent and parent.otel else None
+			span.otel = self._otel.start_span(name, context=context, start_time=end_ns - int(duration * 1e9))
+		self._finish(span, duration, end_ns=end_ns)
+
+	def _finish(self, span: Span, duration: float, end_ns: int | None = None):
+		self.durations[span.name].append(duration)
+		self.counts[span.name] += 1
+		self.totals[span.name] += duration
+		if span.otel is not None:
+			span.otel.set_attributes(_otel_attributes(span.attributes))
+			span.otel.end(end_time=end_ns)
+		if self.path is None:
+			return
+		if self._file is None:
+			self.path.parent.mkdir(parents=True, exist_ok=True)
+			self._file = open(self.path, 'a', encoding='utf-8')
+		record = {
+			'run': self.run_id,
+			'name': span.name,
+			'span_id': span.span_id,
+			'parent_id': span.parent_id,
+			'start': time.time() - (time.perf_counter() - span.started),
+			'duration': round(duration, 6),
+			**{k: round(v, 6) if isinstance(v, float) else v for k, v in span.attributes.items()},
+		}
+		self._file.write(json.dumps(record, default=str) + '\n')
+
+	def summary(self) -> str:
+		"""Span count and total time per stage, with p50/p95 latency over its last ``window`` spans"""
+		if not self.durations:
+			return '⏱️ No spans recorded'
+		width = max(len(name) for name in self.durations)
+		lines = [f'⏱️ {"stage":<{width}}  {"count":>5}  {"p50":>8}  {"p95":>8}  {"total":>9}']
+		for name in sorted(self.durations):
+			ordered = sorted(self.durations[name])
+			lines.append(
+				f'   {name:<{width}}  {self.counts[name]:>5}  {_percentile(ordered, 0.5):>7.2f}s  {_percentile(ordered, 0.95):>7.2f}s  {self.totals[name]:>8.1f}s'
+			)
+		return '\n'.join(lines)
+
+	def close(self):
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+
+
+_tracer = Tracer()
+
+
+def configure(path: Path | str | None = None, otel: bool = False) -> Tracer:
+	"""Replace the process-wide tracer, e.g. to write this run's spans to path"""
+	global _tracer
+	_tracer.close()
+	_tracer = Tracer(path, otel=otel)
+	return _tracer
+
+
+def get_tracer() -> Tracer:
+	return _tracer
+
+
+def span(name: str, **attributes):
+	return _tracer.span(name, **attributes)
+
+
+def record(name: str, duration: float, ago: float = 0.0, **attributes):
+	_tracer.record(name, duration, ago, **attributes)
+
+
+@contextlib.contextmanager
+def context(**attributes) -> Iterator[None]:
+	"""Attach attributes (url, ad_id, ...) to every span started inside the block"""
+	token = _attributes.set(MappingProxyType({**_attributes.get(), **attributes}))
+	try:
+		yield
+	finally:
+		_attributes.reset(token)
+
+
+def current() -> dict[str, Any]:
+	"""The context attributes (url, ad_id, ...) in effect here, with the innermost stage under ``stage``"""
+	return {**_attributes.get(), 'stage': _stage.get()}
+
+
+def traced(name: str) -> Callable:
+	"""Decorator running an async function inside a span called name"""
+
+	def decorator(func):
+		@functools.wraps(func)
+		async def wrapper(*args, **kwargs):
+			with span(name):
+				return await func(*args, **kwargs)
+
+		return wrapper
+
+	return decorator
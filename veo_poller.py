@@ -0,0 +1,212 @@
+"""Centralized poller for long-running Gemini operations (Veo video jobs).
+
+Instead of every video task running its own ``while not operation.done`` loop,
+all pending operations are registered with one ``OperationPoller``. A single
+background loop refreshes the operations that are due together, spaces polls
+out adaptively from elapsed time and the completion times it has observed, and
+caps the status request rate. Each waiting coroutine resumes as soon as its
+operation is seen done, and records how long the job ran (until the last poll
+that still saw it pending) and how long polling took to notice it had finished.
+"""
+
+import asyncio
+import contextvars
+import logging
+import statistics
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingOperation:
+	operation: Any
+	future: asyncio.Future
+	submitted_at: float
+	next_poll_at: float
+	label: str = ''
+	last_pending_at: float = 0.0
+	done_at: float = 0.0
+	polls: int = 0
+	failures: int = 0
+
+
+@dataclass
+class PollerStats:
+	requests: int = 0
+	completed: int = 0
+	failed: int = 0
+	completion_times: deque = field(default_factory=lambda: deque(maxlen=50))
+
+
+class OperationPoller:
+	"""Track pending operations and refresh them from one shared loop.
+
+	``client`` only needs ``client.aio.operations.get(operation)``; with a
+	``gateway`` (see gemini_client) status requests also count against its
+	'operations' limits. Intervals are clamped to
+	``[min_interval, max_interval]``: polls stay sparse while an
+	operation is younger than the expected completion time (median of observed
+	completions, or ``expected_duration`` until there are any) and tighten to
+	``min_interval`` around it, easing off again the longer a job runs overdue.
+	"""
+
+	def __init__(
+		self,
+		client: Any,
+		min_interval: float = 2.0,
+		max_interval: float = 30.0,
+		expected_duration: float = 60.0,
+		max_requests_per_second: float = 2.0,
+		max_failures: int = 5,
+		clock: Callable[[], float] = time.monotonic,
+		gateway: Any = None,
+	):
+		self.client = client
+		self.gateway = gateway
+		self.min_interval = min_interval
+		self.max_interval = max_interval
+		self.expected_duration = expected_duration
+		self.max_requests_per_second = max_requests_per_second
+		self.max_failures = max_failures
+		self.clock = clock
+		self.stats = PollerStats()
+		self._pending: dict[int, _PendingOperation] = {}
+		self._wakeup = asyncio.Event()
+		self._task: asyncio.Task | None = None
+		self._last_request_at = float('-inf')
+
+	@property
+	def pending(self) -> int:
+		return len(self._pending)
+
+	def expected_completion(self) -> float:
+		if self.stats.completion_times:
+			return statistics.median(self.stats.completion_times)
+		return self.expected_duration
+
+	def next_interval(self, elapsed: float) -> float:
+		"""Seconds until the next poll of an operation that has been running for ``elapsed`` seconds"""
+		expected = self.expected_completion()
+		remaining = expected - elapsed
+		if remaining > self.min_interval:
+			# Far from the expected finish: halve the remaining gap each time
+			interval = remaining / 2
+		else:
+			# Around or past the expected finish: poll tightly, backing off as the job runs overdue
+			overdue = max(-remaining, 0.0)
+			interval = self.min_interval * (1 + overdue / max(expected, self.min_interval))
+		return min(max(interval, self.min_interval), self.max_interval)
+
+	async def wait(self, operation: Any, label: str = '') -> Any:
+		"""Register ``operation`` and return it refreshed once it is done"""
+		if operation.done:
+			return operation
+
+		now = self.clock()
+		key = id(operation)
+		future = asyncio.get_running_loop().create_future()
+		pending = self._pending[key] = _PendingOperation(
+			operation=operation,
+			future=future,
+			submitted_at=now,
+			next_poll_at=now + self.next_interval(0.0),
+			label=label,
+			last_pending_at=now,
+		)
+		self._ensure_running()
+		self._wakeup.set()
+		try:
+			operation = await future
+		finally:
+			self._pending.pop(key, None)
+
+		# Running ends at the last poll that still saw the job pending, the rest is detection lag
+		detected_ago = self.clock() - pending.done_at
+		lag = pending.done_at - pending.last_pending_at
+		tracing.record('video.running', pending.last_pending_at - pending.submitted_at, ago=detected_ago + lag, polls=pending.polls)
+		tracing.record('video.polling', lag, ago=detected_ago)
+		return operation
+
+	def _ensure_running(self):
+		if self._task is None or self._task.done():
+			# A fresh context, so status requests are not traced as part of whichever ad started the loop
+			self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+	async def _run(self):
+		while self._pending:
+			active = [p for p in self._pending.values() if not p.future.done()]
+			if not active:
+				# Resolved waiters unregister themselves on their next turn of the loop
+				await asyncio.sleep(0)
+				continue
+
+			now = self.clock()
+			next_due = min(p.next_poll_at for p in active)
+			if next_due > now:
+				self._wakeup.clear()
+				try:
+					await asyncio.wait_for(self._wakeup.wait(), timeout=next_due - now)
+				except asyncio.TimeoutError:
+					pass
+				continue
+
+			# Coalesce everything due within one min_interval so nearby jobs share a refresh round
+			horizon = now + self.min_interval
+			due = [p for p in active if p.next_poll_at <= horizon]
+			await asyncio.gather(*(self._refresh(p) for p in due))
+
+	async def _throttle(self):
+		if self.max_requests_per_second <= 0:
+			return
+		spacing = 1 / self.max_requests_per_second
+		now = self.clock()
+		slot = max(now, self._last_request_at + spacing)
+		self._last_request_at = slot
+		if slot > now:
+			await asyncio.sleep(slot - now)
+
+	async def _refresh(self, pending: _PendingOperation):
+		await self._throttle()
+		if pending.future.done():
+			return
+
+		self.stats.requests += 1
+		pending.polls += 1
+		try:
+			if self.gateway is not None:
+				operation = await self.gateway.call('operations', lambda: self.client.aio.operations.get(pending.operation))
+			else:
+				operation = await self.client.aio.operations.get(pending.operation)
+		except Exception as e:
+			pending.failures += 1
+			self.stats.failed += 1
+			logger.debug('Polling %s failed (%d/%d): %s', pending.label, pending.failures, self.max_failures, e)
+			if pending.failures >= self.max_failures:
+				if not pending.future.done():
+					pending.future.set_exception(e)
+				return
+			backoff = min(self.min_interval * 2**pending.failures, self.max_interval)
+			pending.next_poll_at = self.clock() + backoff
+			return
+
+		pending.failures = 0
+		pending.operation = operation
+		now = self.clock()
+		elapsed = now - pending.submitted_at
+		if operation.done:
+			pending.done_at = now
+			self.stats.completed += 1
+			self.stats.completion_times.append(elapsed)
+			logger.debug('%s finished after %.1fs and %d polls', pending.label, elapsed, pending.polls)
+			if not pending.future.done():
+				pending.future.set_result(operation)
+		else:
+			pending.last_pending_at = now
+			pending.next_poll_at = now + self.next_interval(elapsed)